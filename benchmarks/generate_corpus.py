@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from engram_server.corpus import CorpusSpec, generate_corpus
+
+
+def parse_args() -> argparse.Namespace:
+    defaults = CorpusSpec()
+    parser = argparse.ArgumentParser(description="Generate synthetic Engram packs")
+    parser.add_argument("target", help="Packs directory to create the packs in")
+    parser.add_argument("--packs", type=int, default=defaults.packs)
+    parser.add_argument("--knowledge-files", type=int, default=defaults.knowledge_files)
+    parser.add_argument("--index-depth", type=int, default=defaults.index_depth)
+    parser.add_argument("--memory-entries", type=int, default=defaults.memory_entries)
+    parser.add_argument("--trace-lines", type=int, default=defaults.trace_lines)
+    parser.add_argument(
+        "--cjk-ratio",
+        type=float,
+        default=defaults.cjk_ratio,
+        help="Share of Chinese words in generated text (0..1)",
+    )
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    spec = CorpusSpec(
+        packs=args.packs,
+        knowledge_files=args.knowledge_files,
+        index_depth=args.index_depth,
+        memory_entries=args.memory_entries,
+        trace_lines=args.trace_lines,
+        cjk_ratio=args.cjk_ratio,
+        seed=args.seed,
+    )
+    corpus = generate_corpus(Path(args.target), spec)
+    print(f"{len(corpus.packs)} packs -> {corpus.root}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
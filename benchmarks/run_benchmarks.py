@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from engram_server.bench import DEFAULT_ITERATIONS, SCALES, SCENARIOS, render_table, run_suite
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the Engram tool-latency benchmarks")
+    parser.add_argument(
+        "--scales",
+        default="small,medium",
+        help=f"Comma-separated scale points ({', '.join(SCALES)})",
+    )
+    parser.add_argument(
+        "--scenarios",
+        default="",
+        help=f"Comma-separated subset of: {', '.join(s.name for s in SCENARIOS)}",
+    )
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--output", default="", help="Write the JSON report to this file")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    names = [item.strip() for item in args.scales.split(",") if item.strip()]
+    unknown = [name for name in names if name not in SCALES]
+    if unknown:
+        print(f"unknown scale: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+    scenarios = [item.strip() for item in args.scenarios.split(",") if item.strip()] or None
+
+    report = run_suite(
+        {name: SCALES[name] for name in names},
+        iterations=max(1, args.iterations),
+        scenarios=scenarios,
+        progress=lambda line: print(line, file=sys.stderr),
+    )
+    print(render_table(report))
+    if args.output:
+        Path(args.output).write_text(
+            json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,145 @@
+"""Read-only packs served straight from `*.engram.zip` / `*.engram.tar` archives."""
+
+from __future__ import annotations
+
+import os
+import tarfile
+import threading
+import zipfile
+from pathlib import Path, PurePosixPath
+
+ARCHIVE_SUFFIXES = (".engram.zip", ".engram.tar")
+
+
+def archive_pack_name(path: Path) -> str | None:
+    """Pack name of an archive file ("coach.engram.zip" -> "coach"), else None."""
+    for suffix in ARCHIVE_SUFFIXES:
+        if path.name.endswith(suffix) and len(path.name) > len(suffix):
+            return path.name[: -len(suffix)]
+    return None
+
+
+def _normalize_member(name: str) -> str | None:
+    parts = [part for part in PurePosixPath(name.replace("\\", "/")).parts if part not in {"", "."}]
+    if not parts or ".." in parts or parts[0] == "/":
+        return None
+    return "/".join(parts)
+
+
+def _strip_common_root(members: dict[str, int]) -> dict[str, int]:
+    # 打包时常带一层顶层目录（coach/meta.json），统一去掉
+    if not members or "meta.json" in members:
+        return members
+    roots = {name.split("/", 1)[0] for name in members}
+    if len(roots) != 1 or any("/" not in name for name in members):
+        return members
+    prefix = f"{roots.pop()}/"
+    return {name[len(prefix) :]: value for name, value in members.items()}
+
+
+class ArchivePack:
+    """Member index of one pack archive, read on demand without extracting.
+
+    The index (zip central directory or tar headers) is built once at open time;
+    callers cache instances by the archive's (mtime_ns, size). Only uncompressed
+    tar is supported so members can be read with a single positioned read.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.mtime_ns = os.stat(path).st_mtime_ns
+        self._lock = threading.Lock()
+        self._zip: zipfile.ZipFile | None = None
+        # 成员相对路径 -> zip 中的原始名下标 / tar 中的数据偏移
+        self._sizes: dict[str, int] = {}
+        self._locators: dict[str, int] = {}
+        self._zip_names: list[str] = []
+        if path.name.endswith(".zip"):
+            self._index_zip()
+        else:
+            self._index_tar()
+        self.dirs = {
+            "/".join(name.split("/")[:depth])
+            for name in self._sizes
+            for depth in range(1, name.count("/") + 1)
+        }
+
+    @classmethod
+    def open(cls, path: Path) -> ArchivePack | None:
+        try:
+            return cls(path)
+        except (OSError, zipfile.BadZipFile, tarfile.TarError, ValueError):
+            return None
+
+    def _index_zip(self) -> None:
+        self._zip = zipfile.ZipFile(self.path)
+        located: dict[str, int] = {}
+        sizes: dict[str, int] = {}
+        for info in self._zip.infolist():
+            name = _normalize_member(info.filename)
+            if name is None or info.is_dir():
+                continue
+            self._zip_names.append(info.filename)
+            located[name] = len(self._zip_names) - 1
+            sizes[name] = info.file_size
+        self._set_index(located, sizes)
+
+    def _index_tar(self) -> None:
+        located: dict[str, int] = {}
+        sizes: dict[str, int] = {}
+        with tarfile.open(self.path, mode="r:") as tar:
+            for info in tar:
+                name = _normalize_member(info.name)
+                if name is None or not info.isfile():
+                    continue
+                located[name] = info.offset_data
+                sizes[name] = info.size
+        self._set_index(located, sizes)
+
+    def _set_index(self, located: dict[str, int], sizes: dict[str, int]) -> None:
+        sizes = _strip_common_root(sizes)
+        located = _strip_common_root(located)
+        self._sizes = sizes
+        self._locators = located
+
+    def is_file(self, relative: str) -> bool:
+        return relative in self._sizes
+
+    def is_dir(self, relative: str) -> bool:
+        return relative == "" or relative in self.dirs
+
+    def size(self, relative: str) -> int | None:
+        return self._sizes.get(relative)
+
+    def stamp(self, relative: str) -> tuple[int, int] | None:
+        """(mtime_ns, size) of a member: the archive's mtime with the member's size."""
+        size = self._sizes.get(relative)
+        return None if size is None else (self.mtime_ns, size)
+
+    def files(self, prefix: str = "") -> list[str]:
+        """Every member path under a directory prefix ("" for all), sorted."""
+        base = f"{prefix.rstrip('/')}/" if prefix else ""
+        return sorted(name for name in self._sizes if name.startswith(base))
+
+    def list_dir(self, relative: str) -> list[str]:
+        """Names of the files directly inside one directory."""
+        base = f"{relative.rstrip('/')}/" if relative else ""
+        return sorted(
+            name[len(base) :]
+            for name in self._sizes
+            if name.startswith(base) and "/" not in name[len(base) :]
+        )
+
+    def read(self, relative: str) -> bytes | None:
+        locator = self._locators.get(relative)
+        if locator is None:
+            return None
+        try:
+            if self._zip is not None:
+                with self._lock:
+                    return self._zip.read(self._zip_names[locator])
+            with self.path.open("rb") as f:
+                f.seek(locator)
+                return f.read(self._sizes[relative])
+        except (OSError, zipfile.BadZipFile, KeyError):
+            return None
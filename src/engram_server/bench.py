@@ -0,0 +1,443 @@
+"""Tool-latency benchmark matrix over synthetic corpora (see corpus.py)."""
+
+from __future__ import annotations
+
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from engram_server.corpus import Corpus, CorpusSpec, generate_corpus
+from engram_server.loader import EngramLoader
+
+BENCH_VERSION = 1
+DEFAULT_ITERATIONS = 20
+# 内存分配单独测几轮：tracemalloc 会显著拖慢被测代码，不能与计时混在一起
+_ALLOC_ITERATIONS = 3
+
+SCALES: dict[str, CorpusSpec] = {
+    "small": CorpusSpec(
+        packs=2, knowledge_files=10, index_depth=1, memory_entries=50, trace_lines=50
+    ),
+    "medium": CorpusSpec(
+        packs=5, knowledge_files=60, index_depth=2, memory_entries=500, trace_lines=500
+    ),
+    "large": CorpusSpec(
+        packs=10, knowledge_files=200, index_depth=3, memory_entries=3000, trace_lines=3000
+    ),
+}
+
+
+@dataclass
+class BenchContext:
+    corpus: Corpus
+    loader: EngramLoader
+    name: str
+
+    def knowledge_path(self, iteration: int) -> str:
+        paths = self.corpus.knowledge[self.name]
+        return paths[iteration % len(paths)]
+
+
+Operation = Callable[[BenchContext, int], object]
+
+
+def _load_engram(ctx: BenchContext, i: int) -> object:
+    return ctx.loader.load_engram_base(ctx.name, query="训练 recovery")
+
+
+def _load_engram_cold(ctx: BenchContext, i: int) -> object:
+    # 新建 loader：不命中上下文缓存与目录缓存，衡量首次加载
+    return EngramLoader(ctx.corpus.root).load_engram_base(ctx.name, query="训练 recovery")
+
+
+def _read_engram_file(ctx: BenchContext, i: int) -> object:
+    return ctx.loader.load_file(ctx.name, ctx.knowledge_path(i))
+
+
+def _capture_memory(ctx: BenchContext, i: int) -> object:
+    return ctx.loader.capture_memory(
+        ctx.name,
+        f"bench capture 偏好记录 #{i}",
+        "preferences",
+        f"bench capture #{i}",
+        throttle_seconds=0,
+    )
+
+
+def _setup_delete_memory(ctx: BenchContext, iterations: int) -> None:
+    ctx.loader.capture_memories(
+        ctx.name,
+        [
+            {
+                "content": f"bench delete 待删除 #{i}",
+                "category": "context",
+                "summary": f"bench delete #{i}",
+            }
+            for i in range(iterations)
+        ],
+        throttle_seconds=0,
+    )
+
+
+def _delete_memory(ctx: BenchContext, i: int) -> object:
+    return ctx.loader.delete_memory(ctx.name, "context", f"bench delete #{i}")
+
+
+def _list_tool_traces(ctx: BenchContext, i: int) -> object:
+    return ctx.loader.list_recent_memory_summaries(ctx.name, "tool-trace", limit=10)
+
+
+def _gather_stats(ctx: BenchContext, i: int) -> object:
+    from engram_server.stats import gather_stats
+
+    return gather_stats(ctx.loader)
+
+
+def _lint_engram(ctx: BenchContext, i: int) -> object:
+    from engram_server.lint import lint_engram
+
+    return lint_engram(ctx.corpus.root / ctx.name)
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    run: Operation
+    # 不计时的准备步骤，参数为本轮总调用次数
+    setup: Callable[[BenchContext, int], None] | None = None
+
+
+# 只读场景在前，写入场景在后，写入不会影响前面的测量
+SCENARIOS: tuple[Scenario, ...] = (
+    Scenario("load_engram", _load_engram),
+    Scenario("load_engram_cold", _load_engram_cold),
+    Scenario("read_engram_file", _read_engram_file),
+    Scenario("list_tool_traces", _list_tool_traces),
+    Scenario("gather_stats", _gather_stats),
+    Scenario("lint_engram", _lint_engram),
+    Scenario("capture_memory", _capture_memory),
+    Scenario("delete_memory", _delete_memory, setup=_setup_delete_memory),
+)
+
+
+@dataclass(frozen=True)
+class Tolerances:
+    """Allowed slowdown per metric (0.25 = +25%) before a scenario counts as regressed.
+
+    A change must also exceed the absolute floor, so sub-millisecond noise on fast
+    scenarios does not fail the gate.
+    """
+
+    p50: float = 0.25
+    p95: float = 0.50
+    rss: float = 0.20
+    min_delta_ms: float = 0.5
+    min_delta_rss_kb: float = 2048
+
+
+def _peak_rss_kb() -> float | None:
+    """Process peak resident set size so far (None where `resource` is unavailable).
+
+    This is a high-water mark, which is why every scenario runs in its own child
+    process (see `_measure_isolated`). On Linux ru_maxrss survives fork+exec, so
+    the child's own VmHWM is read from /proc instead.
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return float(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 以字节为单位，Linux 以 KB 为单位
+    return round(peak / 1024 if sys.platform == "darwin" else float(peak), 1)
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Linear-interpolated percentile (q in 0..100) of a non-empty list."""
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _measure(scenario: Scenario, ctx: BenchContext, iterations: int) -> dict[str, Any]:
+    total = iterations + 1 + _ALLOC_ITERATIONS
+    if scenario.setup is not None:
+        scenario.setup(ctx, total)
+
+    # 第 0 次调用作为预热，不计入
+    scenario.run(ctx, 0)
+    timings: list[float] = []
+    gc.collect()
+    for i in range(1, iterations + 1):
+        start = time.perf_counter()
+        scenario.run(ctx, i)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    peaks: list[int] = []
+    retained: list[int] = []
+    for i in range(iterations + 1, total):
+        tracemalloc.start()
+        scenario.run(ctx, i)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peaks.append(peak)
+        retained.append(current)
+
+    return {
+        "scenario": scenario.name,
+        "iterations": iterations,
+        "p50_ms": round(percentile(timings, 50), 4),
+        "p95_ms": round(percentile(timings, 95), 4),
+        "mean_ms": round(sum(timings) / len(timings), 4),
+        "max_ms": round(max(timings), 4),
+        "alloc_peak_kb": round(max(peaks) / 1024, 2),
+        "alloc_retained_kb": round(max(retained) / 1024, 2),
+    }
+
+
+def _write_manifest(path: Path, corpus: Corpus) -> None:
+    path.write_text(
+        json.dumps(
+            {
+                "root": str(corpus.root),
+                "spec": asdict(corpus.spec),
+                "packs": corpus.packs,
+                "knowledge": corpus.knowledge,
+            },
+            ensure_ascii=False,
+        ),
+        encoding="utf-8",
+    )
+
+
+def _measure_isolated(manifest: Path, scenario: str, iterations: int) -> dict[str, Any]:
+    """Measure one scenario in a fresh interpreter so its peak RSS is its own."""
+    env = dict(os.environ)
+    # 子进程须能导入与父进程相同的 engram_server（源码树运行时未必已安装）
+    package_root = str(Path(__file__).resolve().parents[1])
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [package_root, env.get("PYTHONPATH")]))
+    completed = subprocess.run(
+        [sys.executable, "-m", "engram_server.bench", str(manifest), scenario, str(iterations)],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=False,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"benchmark worker failed for {scenario}:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _worker(manifest: Path, scenario_name: str, iterations: int) -> dict[str, Any]:
+    data = json.loads(manifest.read_text(encoding="utf-8"))
+    corpus = Corpus(
+        root=Path(data["root"]),
+        spec=CorpusSpec(**data["spec"]),
+        packs=data["packs"],
+        knowledge=data["knowledge"],
+    )
+    scenario = next(s for s in SCENARIOS if s.name == scenario_name)
+    # 与 MCP 服务一样常驻一个 loader；不开后台维护，避免后台线程干扰计时
+    loader = EngramLoader(corpus.root)
+    ctx = BenchContext(corpus=corpus, loader=loader, name=corpus.packs[0])
+    before = _peak_rss_kb()
+    row = _measure(scenario, ctx, iterations)
+    peak = _peak_rss_kb()
+    row["peak_rss_kb"] = peak
+    # 场景本身带来的 RSS 增长（导入与 loader 初始化之后）
+    row["rss_delta_kb"] = None if peak is None or before is None else round(peak - before, 1)
+    return row
+
+
+def run_scale(
+    scale: str,
+    spec: CorpusSpec,
+    *,
+    iterations: int = DEFAULT_ITERATIONS,
+    scenarios: list[str] | None = None,
+    work_dir: Path | None = None,
+) -> list[dict[str, Any]]:
+    """Generate one corpus and measure every selected scenario against it.
+
+    Each scenario runs in its own child process, in SCENARIOS order, against the
+    same corpus; write scenarios come last so they do not skew the reads.
+    """
+    selected = [s for s in SCENARIOS if scenarios is None or s.name in scenarios]
+    with tempfile.TemporaryDirectory(prefix=f"engram-bench-{scale}-", dir=work_dir) as tmp:
+        corpus = generate_corpus(Path(tmp) / "packs", spec)
+        manifest = Path(tmp) / "corpus.json"
+        _write_manifest(manifest, corpus)
+        results = []
+        for scenario in selected:
+            row = _measure_isolated(manifest, scenario.name, iterations)
+            results.append({"scale": scale, **row})
+    return results
+
+
+def run_suite(
+    scales: dict[str, CorpusSpec] | None = None,
+    *,
+    iterations: int = DEFAULT_ITERATIONS,
+    scenarios: list[str] | None = None,
+    work_dir: Path | None = None,
+    progress: Callable[[str], None] | None = None,
+) -> dict[str, Any]:
+    """Run the scale x scenario matrix and return a JSON-serializable report."""
+    scales = SCALES if scales is None else scales
+    rows: list[dict[str, Any]] = []
+    for scale, spec in scales.items():
+        if progress is not None:
+            progress(f"{scale}: {spec.packs} packs x {spec.knowledge_files} knowledge files")
+        rows.extend(
+            run_scale(
+                scale, spec, iterations=iterations, scenarios=scenarios, work_dir=work_dir
+            )
+        )
+    return {
+        "version": BENCH_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": iterations,
+        "scales": {scale: asdict(spec) for scale, spec in scales.items()},
+        "results": rows,
+    }
+
+
+def render_table(report: dict[str, Any]) -> str:
+    lines = [
+        f"{'scale':<8} {'scenario':<18} {'p50 ms':>10} {'p95 ms':>10} "
+        f"{'peak KB':>10} {'kept KB':>10} {'RSS KB':>10} {'+RSS KB':>10}"
+    ]
+    for row in report.get("results", []):
+        lines.append(
+            f"{row['scale']:<8} {row['scenario']:<18} {row['p50_ms']:>10.3f} "
+            f"{row['p95_ms']:>10.3f} {row['alloc_peak_kb']:>10.1f} {row['alloc_retained_kb']:>10.1f} "
+            f"{row.get('peak_rss_kb') or 0:>10.0f} {row.get('rss_delta_kb') or 0:>10.0f}"
+        )
+    return "\n".join(lines)
+
+
+def specs_from_report(report: dict[str, Any]) -> dict[str, CorpusSpec]:
+    """Scale points recorded in a report, so a comparison reruns the same matrix."""
+    fields = set(CorpusSpec.__dataclass_fields__)
+    return {
+        scale: CorpusSpec(**{k: v for k, v in spec.items() if k in fields})
+        for scale, spec in report.get("scales", {}).items()
+        if isinstance(spec, dict)
+    }
+
+
+def _verdict(
+    metric: str, base: float | None, current: float | None, tolerances: Tolerances
+) -> tuple[float | None, str]:
+    if base is None or current is None:
+        return None, "n/a"
+    limit = {"p50_ms": tolerances.p50, "p95_ms": tolerances.p95}.get(metric, tolerances.rss)
+    floor = tolerances.min_delta_rss_kb if metric == "peak_rss_kb" else tolerances.min_delta_ms
+    if base <= 0:
+        # 基线为 0 时没有相对变化可言，只按绝对下限判断
+        return None, "REGRESSION" if current - base > floor else "ok"
+    change = (current - base) / base
+    if change > limit and current - base > floor:
+        return change, "REGRESSION"
+    if change < -limit and base - current > floor:
+        return change, "improved"
+    return change, "ok"
+
+
+def compare_reports(
+    current: dict[str, Any],
+    baseline: dict[str, Any],
+    tolerances: Tolerances | None = None,
+) -> list[dict[str, Any]]:
+    """One row per (scale, scenario, metric) with baseline/current values and a status.
+
+    Status is ok / improved / REGRESSION, "new" for scenarios missing from the
+    baseline and "missing" for baseline scenarios that were not run.
+    """
+    tolerances = tolerances or Tolerances()
+    base_rows = {(r["scale"], r["scenario"]): r for r in baseline.get("results", [])}
+    current_rows = {(r["scale"], r["scenario"]): r for r in current.get("results", [])}
+    rows: list[dict[str, Any]] = []
+    for key in [*current_rows, *(k for k in base_rows if k not in current_rows)]:
+        scale, scenario = key
+        base_row = base_rows.get(key)
+        current_row = current_rows.get(key)
+        if base_row is None or current_row is None:
+            rows.append(
+                {
+                    "scale": scale,
+                    "scenario": scenario,
+                    "metric": "-",
+                    "baseline": None,
+                    "current": None,
+                    "change": None,
+                    "status": "new" if base_row is None else "missing",
+                }
+            )
+            continue
+        for metric in ("p50_ms", "p95_ms", "peak_rss_kb"):
+            base_value = base_row.get(metric)
+            current_value = current_row.get(metric)
+            change, status = _verdict(metric, base_value, current_value, tolerances)
+            rows.append(
+                {
+                    "scale": scale,
+                    "scenario": scenario,
+                    "metric": metric,
+                    "baseline": base_value,
+                    "current": current_value,
+                    "change": change,
+                    "status": status,
+                }
+            )
+    return rows
+
+
+def has_regression(rows: list[dict[str, Any]]) -> bool:
+    return any(row["status"] == "REGRESSION" for row in rows)
+
+
+def render_comparison(rows: list[dict[str, Any]]) -> str:
+    lines = [
+        f"{'scale':<8} {'scenario':<18} {'metric':<12} {'baseline':>11} "
+        f"{'current':>11} {'change':>8}  status"
+    ]
+    for row in rows:
+        base = "-" if row["baseline"] is None else f"{row['baseline']:.3f}"
+        current = "-" if row["current"] is None else f"{row['current']:.3f}"
+        change = "-" if row["change"] is None else f"{row['change'] * 100:+.1f}%"
+        lines.append(
+            f"{row['scale']:<8} {row['scenario']:<18} {row['metric']:<12} {base:>11} "
+            f"{current:>11} {change:>8}  {row['status']}"
+        )
+    regressions = sum(1 for row in rows if row["status"] == "REGRESSION")
+    lines.append(f"{regressions} regression(s)")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # 基准子进程入口：python -m engram_server.bench <manifest> <scenario> <iterations>
+    print(json.dumps(_worker(Path(sys.argv[1]), sys.argv[2], int(sys.argv[3]))))
@@ -0,0 +1,181 @@
+"""Single-file compiled pack bundles (files + table of contents + indexes), read via mmap."""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from engram_server.sections import Section, parse_sections
+from engram_server.uses_graph import build_uses_graph, example_files
+
+BUNDLE_FILENAME = ".engram.bundle"
+_MAGIC = b"ENGRAMB\x01"
+_HEADER_LEN = struct.Struct("<Q")
+_BUNDLE_VERSION = 1
+# memory/ 频繁写入，始终从目录树读取
+_EXCLUDED_DIRS = {"memory"}
+
+
+@dataclass(frozen=True)
+class BundleEntry:
+    offset: int
+    length: int
+    # 编译时源文件的 (mtime_ns, size)，读取时与当前 stat 比对
+    mtime_ns: int
+    size: int
+    sections: tuple[Section, ...] = ()
+
+
+def bundle_sources(engram_dir: Path) -> list[Path]:
+    """Files that go into a pack bundle: everything except hidden files and memory/."""
+    sources: list[Path] = []
+    for path in sorted(engram_dir.rglob("*")):
+        relative = path.relative_to(engram_dir)
+        if relative.parts[0] in _EXCLUDED_DIRS:
+            continue
+        if any(part.startswith(".") for part in relative.parts):
+            continue
+        if path.is_file():
+            sources.append(path)
+    return sources
+
+
+def compile_bundle(engram_dir: Path) -> dict[str, Any]:
+    """Write `<pack>/.engram.bundle` and return {path, files, bytes}.
+
+    Layout: magic, 8-byte header length, JSON header (table of contents with
+    per-file offset/length/stamp, heading sections and the uses graph), then the
+    concatenated file bodies. The bundle is written to a temp file and swapped in.
+    """
+    toc: dict[str, dict[str, Any]] = {}
+    blobs: list[bytes] = []
+    offset = 0
+    for path in bundle_sources(engram_dir):
+        try:
+            # 先 stat 再读：读取后被改动的文件会因 stamp 不符而回退到目录树
+            st = os.stat(path)
+            data = path.read_bytes()
+        except OSError:
+            continue
+        relative = path.relative_to(engram_dir).as_posix()
+        entry: dict[str, Any] = {
+            "offset": offset,
+            "length": len(data),
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+        }
+        if path.suffix == ".md":
+            entry["sections"] = [
+                [s.level, s.title, list(s.path), s.start, s.end] for s in parse_sections(data)
+            ]
+        toc[relative] = entry
+        blobs.append(data)
+        offset += len(data)
+
+    header = json.dumps(
+        {
+            "version": _BUNDLE_VERSION,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "files": toc,
+            "uses": build_uses_graph(engram_dir).forward,
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+    target = engram_dir / BUNDLE_FILENAME
+    tmp = target.with_name(f"{target.name}.tmp")
+    with tmp.open("wb") as f:
+        f.write(_MAGIC)
+        f.write(_HEADER_LEN.pack(len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp, target)
+    return {"path": target, "files": len(toc), "bytes": target.stat().st_size}
+
+
+class PackBundle:
+    """Read-only view of a compiled bundle backed by one mmap.
+
+    Each entry is served only while its source file's (mtime_ns, size) still
+    matches the compile-time stamp; otherwise callers fall back to the tree.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        with path.open("rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[: len(_MAGIC)] != _MAGIC:
+            self._mm.close()
+            raise ValueError(f"not an engram bundle: {path}")
+        start = len(_MAGIC) + _HEADER_LEN.size
+        (header_len,) = _HEADER_LEN.unpack(self._mm[len(_MAGIC) : start])
+        header = json.loads(self._mm[start : start + header_len].decode("utf-8"))
+        if header.get("version") != _BUNDLE_VERSION:
+            self._mm.close()
+            raise ValueError(f"unsupported bundle version: {path}")
+        self._data_start = start + header_len
+        self.entries: dict[str, BundleEntry] = {
+            relative: BundleEntry(
+                offset=item["offset"],
+                length=item["length"],
+                mtime_ns=item["mtime_ns"],
+                size=item["size"],
+                sections=tuple(
+                    Section(level=level, title=title, path=tuple(chain), start=s, end=e)
+                    for level, title, chain, s, e in item.get("sections", [])
+                ),
+            )
+            for relative, item in header.get("files", {}).items()
+        }
+        self.uses: dict[str, list[str]] = header.get("uses", {})
+
+    @classmethod
+    def open(cls, path: Path) -> PackBundle | None:
+        try:
+            return cls(path)
+        except (OSError, ValueError, KeyError, TypeError, struct.error):
+            return None
+
+    def fresh_entry(self, relative: str, source: Path) -> BundleEntry | None:
+        """Return the entry if the source file is unchanged since compile time."""
+        entry = self.entries.get(relative)
+        if entry is None:
+            return None
+        try:
+            st = os.stat(source)
+        except OSError:
+            return None
+        if (st.st_mtime_ns, st.st_size) != (entry.mtime_ns, entry.size):
+            return None
+        return entry
+
+    def read(self, relative: str, source: Path) -> bytes | None:
+        entry = self.fresh_entry(relative, source)
+        if entry is None:
+            return None
+        start = self._data_start + entry.offset
+        return self._mm[start : start + entry.length]
+
+    def covers_examples(self, engram_dir: Path) -> bool:
+        """True when the bundled example set and stamps match the tree exactly."""
+        files = example_files(engram_dir)
+        relatives = {path.relative_to(engram_dir).as_posix() for path in files}
+        bundled = {
+            rel
+            for rel in self.entries
+            if rel.startswith("examples/") and rel.endswith(".md") and Path(rel).name != "_index.md"
+        }
+        if relatives != bundled:
+            return False
+        return all(
+            self.fresh_entry(path.relative_to(engram_dir).as_posix(), path) is not None
+            for path in files
+        )
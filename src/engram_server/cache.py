@@ -0,0 +1,73 @@
+"""Small in-process caches keyed by source-file fingerprints."""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable, Iterable
+from pathlib import Path
+from typing import Any
+
+Fingerprint = tuple[tuple[str, int | None, int | None], ...]
+
+
+def file_fingerprint(paths: Iterable[Path]) -> Fingerprint:
+    """Return the (path, mtime_ns, size) stamp of every path; missing files stamp as None."""
+    stamps: list[tuple[str, int | None, int | None]] = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            stamps.append((str(path), None, None))
+            continue
+        stamps.append((str(path), st.st_mtime_ns, st.st_size))
+    return tuple(stamps)
+
+
+class FingerprintLRU:
+    """Bounded LRU that serves a value only while its fingerprint still matches.
+
+    One slot is kept per key, so a changed source replaces the stale value instead
+    of piling up old generations.
+    """
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = max(1, maxsize)
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict[Hashable, tuple[Hashable, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, fingerprint: Hashable) -> Any | None:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item[0] != fingerprint:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key: Hashable, fingerprint: Hashable, value: Any) -> None:
+        with self._lock:
+            self._items[key] = (fingerprint, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def invalidate(self, key: Hashable | None = None) -> None:
+        with self._lock:
+            if key is None:
+                self._items.clear()
+            else:
+                self._items.pop(key, None)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._items),
+                "maxsize": self.maxsize,
+            }
@@ -0,0 +1,235 @@
+"""In-process catalog of Engram packs across loader roots."""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from engram_server.archive import ArchivePack, archive_pack_name
+from engram_server.overlay import lower_meta_path, read_lower_link
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogEntry:
+    name: str
+    root: Path
+    path: Path
+    meta: dict[str, Any] | None
+    meta_stamp: tuple[int, int, int] | None
+    contained: bool = True
+    # 分层 pack：只读下层（归档文件或 pack 目录），path 为可写的上层目录
+    lower: Path | None = None
+
+
+_Stamp = tuple[int, int, int]
+
+
+def _stamp(path: Path) -> _Stamp | None:
+    """Return (mtime_ns, size, nlink); nlink moves when subdirectories come and go."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_nlink)
+
+
+def _meta_stamp(path: Path, lower: Path | None) -> _Stamp | None:
+    # 上层的 meta.json 优先，其次是下层（归档文件本身或下层 meta.json）
+    stamp = _stamp(path / "meta.json")
+    if stamp is None and lower is not None:
+        return _stamp(lower_meta_path(lower))
+    return stamp
+
+
+def _parse_meta(meta_path: Path) -> dict[str, Any] | None:
+    try:
+        data = json.loads(meta_path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _parse_lower_meta(lower: Path) -> dict[str, Any] | None:
+    if lower.is_dir():
+        return _parse_meta(lower / "meta.json")
+    pack = ArchivePack.open(lower)
+    raw = pack.read("meta.json") if pack is not None else None
+    if raw is None:
+        return None
+    try:
+        data = json.loads(raw.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+class PackCatalog:
+    """Map pack directory names to (root, dir, parsed meta).
+
+    The catalog is rebuilt when any root directory's mtime changes (packs added,
+    removed or renamed) and a single entry is re-parsed when its meta.json stamp
+    changes, so lookups between changes are dictionary hits plus one stat.
+
+    With an `overlay_dir`, `*.engram.zip` / `*.engram.tar` files in a root and
+    every pack dir in a read-only `base_roots` root are listed as layered packs
+    whose entry path is the writable `overlay_dir/<name>`. A pack dir holding an
+    `.engram-lower` link is layered over the linked dir in place.
+    """
+
+    def __init__(
+        self,
+        roots: list[Path],
+        *,
+        overlay_dir: Path | None = None,
+        base_roots: list[Path] | None = None,
+    ):
+        self.roots = list(roots)
+        self.overlay_dir = overlay_dir
+        self.base_roots = set(base_roots or [])
+        self._lock = threading.RLock()
+        self._root_stamps: list[_Stamp | None] | None = None
+        self._by_name: dict[str, CatalogEntry] = {}
+        self._ordered: list[CatalogEntry] = []
+        # 上层目录 -> 分层 pack 条目，供按路径查找下层
+        self._by_upper: dict[Path, CatalogEntry] = {}
+
+    def get(self, name: str) -> CatalogEntry | None:
+        """Return the first-root entry for a pack directory name."""
+        with self._lock:
+            self._ensure_fresh()
+            entry = self._by_name.get(name)
+            if entry is None:
+                return None
+            return self._revalidate(entry)
+
+    def layered(self, upper: Path) -> CatalogEntry | None:
+        """Return the layered entry whose writable upper dir is `upper`."""
+        with self._lock:
+            self._ensure_fresh()
+            entry = self._by_upper.get(upper)
+            if entry is None or self._by_name.get(entry.name) is not entry:
+                return None
+            return self._revalidate(entry)
+
+    def entries(self) -> list[CatalogEntry]:
+        """Return every pack directory in listing order (roots, then name)."""
+        with self._lock:
+            self._ensure_fresh()
+            return [self._revalidate(entry) for entry in self._ordered]
+
+    def invalidate(self, name: str | None = None) -> None:
+        """Drop cached state for one pack, or for the whole catalog."""
+        with self._lock:
+            if name is None:
+                self._root_stamps = None
+                return
+            entry = self._by_name.get(name)
+            if entry is not None:
+                self._replace(
+                    entry,
+                    self._load_entry(
+                        entry.name,
+                        entry.root,
+                        entry.path,
+                        contained=entry.contained,
+                        lower=entry.lower,
+                    ),
+                )
+
+    def _ensure_fresh(self) -> None:
+        stamps = [_stamp(root) for root in self.roots]
+        if stamps != self._root_stamps:
+            self._rebuild(stamps)
+
+    def _rebuild(self, stamps: list[_Stamp | None]) -> None:
+        by_name: dict[str, CatalogEntry] = {}
+        ordered: list[CatalogEntry] = []
+        for root, stamp in zip(self.roots, stamps):
+            if stamp is None:
+                continue
+            try:
+                children = sorted(root.iterdir())
+            except OSError:
+                continue
+            layered_root = root in self.base_roots and self.overlay_dir is not None
+            for child in children:
+                pack_name = archive_pack_name(child)
+                if pack_name is not None and self.overlay_dir is not None and child.is_file():
+                    entry = self._load_entry(
+                        pack_name, root, self.overlay_dir / pack_name, lower=child
+                    )
+                    ordered.append(entry)
+                    by_name.setdefault(pack_name, entry)
+                    continue
+                if not child.is_dir():
+                    continue
+                if layered_root and not child.name.startswith("."):
+                    entry = self._load_entry(
+                        child.name, root, self.overlay_dir / child.name, lower=child.resolve()
+                    )
+                    ordered.append(entry)
+                    by_name.setdefault(child.name, entry)
+                    continue
+                resolved = child.resolve()
+                try:
+                    resolved.relative_to(root)
+                    contained = True
+                except ValueError:
+                    contained = False
+                entry = self._load_entry(
+                    child.name, root, resolved, contained=contained, lower=read_lower_link(child)
+                )
+                ordered.append(entry)
+                if contained and child.name not in by_name:
+                    by_name[child.name] = entry
+        self._by_name = by_name
+        self._ordered = ordered
+        self._by_upper = {entry.path: entry for entry in ordered if entry.lower is not None}
+        self._root_stamps = stamps
+
+    def _revalidate(self, entry: CatalogEntry) -> CatalogEntry:
+        if _meta_stamp(entry.path, entry.lower) == entry.meta_stamp:
+            return entry
+        fresh = self._load_entry(
+            entry.name, entry.root, entry.path, contained=entry.contained, lower=entry.lower
+        )
+        self._replace(entry, fresh)
+        return fresh
+
+    def _replace(self, old: CatalogEntry, new: CatalogEntry) -> None:
+        if self._by_name.get(old.name) is old:
+            self._by_name[old.name] = new
+        self._ordered = [new if item is old else item for item in self._ordered]
+        if self._by_upper.get(old.path) is old:
+            self._by_upper[old.path] = new
+
+    @staticmethod
+    def _load_entry(
+        name: str,
+        root: Path,
+        path: Path,
+        *,
+        contained: bool = True,
+        lower: Path | None = None,
+    ) -> CatalogEntry:
+        meta_path = path / "meta.json"
+        meta_stamp = _meta_stamp(path, lower)
+        if meta_stamp is None:
+            meta = None
+        elif lower is not None and not meta_path.is_file():
+            meta = _parse_lower_meta(lower)
+        else:
+            meta = _parse_meta(meta_path)
+        return CatalogEntry(
+            name=name,
+            root=root,
+            path=path,
+            meta=meta,
+            meta_stamp=meta_stamp,
+            contained=contained,
+            lower=lower,
+        )
@@ -0,0 +1,177 @@
+"""Query-aware trimming of the load_engram context to a token budget."""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+
+from engram_server.tokenizer import analyze, estimate_tokens, tokenize
+
+# 可裁剪的索引区块；其余区块（角色/规则/记忆等）始终完整保留
+RANKED_SECTIONS = ("inherited_knowledge", "knowledge", "examples")
+_STUB_PATHS = 3
+_REPORT_PATHS = 10
+_PATH_RE = re.compile(r"`([^`]+)`")
+
+
+@dataclass
+class _Entry:
+    text: str
+    path: str
+    group: str
+    tokens: int
+    score: float = 0.0
+    kept: bool = False
+
+
+@dataclass
+class _ParsedSection:
+    key: str
+    # 每项为普通行（str）或索引条目（_Entry），保持原始顺序
+    items: list[str | _Entry] = field(default_factory=list)
+
+
+def _parse_section(key: str, text: str) -> _ParsedSection:
+    """Split an index section into plain lines and `- ` entries with their continuation lines."""
+    parsed = _ParsedSection(key)
+    group = ""
+    current: list[str] | None = None
+    for line in text.splitlines():
+        if current is not None and line.startswith((" ", "\t")) and line.strip():
+            current.append(line)
+            continue
+        if current is not None:
+            parsed.items[-1] = _make_entry(current, group)
+            current = None
+        if line.startswith("- "):
+            current = [line]
+            parsed.items.append("")
+            continue
+        if line.startswith("#"):
+            group = line.lstrip("#").strip()
+        parsed.items.append(line)
+    if current is not None:
+        parsed.items[-1] = _make_entry(current, group)
+    return parsed
+
+
+def _make_entry(lines: list[str], group: str) -> _Entry:
+    text = "\n".join(lines)
+    match = _PATH_RE.search(lines[0])
+    path = match.group(1) if match else lines[0][2:].strip()
+    return _Entry(text=text, path=path, group=group, tokens=estimate_tokens(text) + 1)
+
+
+def _score(entry: _Entry, terms: list[str]) -> float:
+    if not terms:
+        return 0.0
+    body = analyze(entry.text)
+    heading = analyze(entry.group)
+    hits = sum(1 for term in terms if body.matches(term))
+    group_hits = sum(1 for term in terms if heading.matches(term))
+    return hits + 0.5 * group_hits
+
+
+def _stub(omitted: list[_Entry]) -> str:
+    paths = ", ".join(entry.path for entry in omitted[:_STUB_PATHS])
+    more = " …" if len(omitted) > _STUB_PATHS else ""
+    return f"- （另有 {len(omitted)} 条未展开：{paths}{more}）"
+
+
+def _render_section(parsed: _ParsedSection) -> tuple[str, list[_Entry]]:
+    out: list[str] = []
+    omitted: list[_Entry] = []
+    pending: list[_Entry] = []
+    stub_at = 0
+
+    def flush() -> None:
+        # 摘要行放在本组第一条被省略条目的位置
+        if pending:
+            out[stub_at] = _stub(pending)
+            omitted.extend(pending)
+            pending.clear()
+
+    for item in parsed.items:
+        if isinstance(item, _Entry):
+            if item.kept:
+                out.append(item.text)
+            else:
+                if not pending:
+                    stub_at = len(out)
+                    out.append("")
+                pending.append(item)
+            continue
+        if item.startswith("#"):
+            flush()
+        out.append(item)
+    flush()
+    return "\n".join(out).strip(), omitted
+
+
+def fit_to_budget(sections: list[tuple[str, str]], query: str, max_tokens: int) -> str:
+    """Render `(key, text)` sections within roughly `max_tokens` estimated tokens.
+
+    Non-index sections are always kept. Knowledge/example index entries are ranked
+    against the query and kept in full while they fit; the rest of each heading
+    group collapses into a one-line stub listing the omitted paths. A closing
+    "上下文预算" section reports the estimate and what was left out.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    # 以区块下标为键：多层继承时会出现多个同名区块
+    parsed: dict[int, _ParsedSection] = {}
+    fixed_tokens = 0
+    for position, (key, text) in enumerate(sections):
+        if key in RANKED_SECTIONS:
+            parsed[position] = _parse_section(key, text)
+        else:
+            fixed_tokens += estimate_tokens(text)
+
+    entries: list[_Entry] = []
+    skeleton_tokens = 0
+    stub_reserve = 0
+    for section in parsed.values():
+        groups: dict[str, list[_Entry]] = {}
+        for item in section.items:
+            if isinstance(item, _Entry):
+                item.score = _score(item, terms)
+                entries.append(item)
+                groups.setdefault(item.group, []).append(item)
+            else:
+                skeleton_tokens += estimate_tokens(item)
+        # 预留每组"全部省略"时的摘要行开销，保证裁剪后不超出预算
+        stub_reserve += sum(estimate_tokens(_stub(group)) for group in groups.values())
+
+    remaining = max_tokens - fixed_tokens - skeleton_tokens - stub_reserve
+    ranked = sorted(enumerate(entries), key=lambda item: (-item[1].score, item[0]))
+    for _, entry in ranked:
+        if entry.tokens <= remaining:
+            entry.kept = True
+            remaining -= entry.tokens
+
+    rendered: list[str] = []
+    omitted: list[_Entry] = []
+    for position, (_, text) in enumerate(sections):
+        if position not in parsed:
+            rendered.append(text)
+            continue
+        section_text, section_omitted = _render_section(parsed[position])
+        omitted.extend(section_omitted)
+        if section_text:
+            rendered.append(section_text)
+
+    body = "\n\n".join(rendered)
+    kept = len(entries) - len(omitted)
+    lines = [
+        "## 上下文预算",
+        f"max_tokens={max_tokens}，估算约 {estimate_tokens(body)} tokens；"
+        f"索引条目保留 {kept}/{len(entries)}，省略 {len(omitted)} 条。",
+    ]
+    if fixed_tokens > max_tokens:
+        lines.append("⚠️ 角色/工作流程/规则/记忆等基础层已超出预算，索引条目已全部折叠。")
+    if omitted:
+        ranked_omitted = sorted(omitted, key=lambda entry: -entry.score)
+        paths = ", ".join(entry.path for entry in ranked_omitted[:_REPORT_PATHS])
+        more = " …" if len(omitted) > _REPORT_PATHS else ""
+        lines.append(f"已省略：{paths}{more}")
+        lines.append("可调用 search_knowledge 检索，或 read_engram_file 直接读取被省略的文件。")
+    return f"{body}\n\n" + "\n".join(lines)
@@ -0,0 +1,200 @@
+"""Synthetic Engram packs at configurable scale, for benchmarks."""
+
+from __future__ import annotations
+
+import json
+import random
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from engram_server.loader import EngramLoader
+
+_CJK_WORDS = (
+    "训练", "恢复", "计划", "目标", "饮食", "睡眠", "节奏", "评估", "动作", "强度",
+    "复盘", "习惯", "记录", "风险", "原则", "步骤", "反馈", "调整", "周期", "细节",
+)
+_LATIN_WORDS = (
+    "squat", "protocol", "tempo", "volume", "recovery", "baseline", "metric", "review",
+    "cycle", "session", "progress", "threshold", "routine", "summary", "index", "signal",
+)
+_MEMORY_CATEGORIES = ("preferences", "context", "decisions", "history")
+_FILES_PER_GROUP = 4
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    """Scale knobs of a generated corpus; the same spec and seed give the same files."""
+
+    packs: int = 3
+    knowledge_files: int = 20
+    # 知识索引嵌套层数：1 为单层 knowledge/_index.md
+    index_depth: int = 1
+    memory_entries: int = 100
+    trace_lines: int = 100
+    # 文本中中文词的比例，其余为英文词
+    cjk_ratio: float = 0.5
+    paragraphs: int = 6
+    seed: int = 0
+
+
+@dataclass
+class Corpus:
+    root: Path
+    spec: CorpusSpec
+    packs: list[str] = field(default_factory=list)
+    # pack 名 -> knowledge 文件相对路径
+    knowledge: dict[str, list[str]] = field(default_factory=dict)
+
+
+def _words(rng: random.Random, count: int, cjk_ratio: float) -> str:
+    parts: list[str] = []
+    for _ in range(count):
+        if rng.random() < cjk_ratio:
+            parts.append(rng.choice(_CJK_WORDS))
+        else:
+            parts.append(rng.choice(_LATIN_WORDS))
+    return " ".join(parts)
+
+
+def _knowledge_body(rng: random.Random, title: str, spec: CorpusSpec) -> str:
+    lines = [f"# {title}", ""]
+    for number in range(spec.paragraphs):
+        if number % 2 == 0:
+            lines.extend([f"## {_words(rng, 2, spec.cjk_ratio)} {number}", ""])
+        lines.extend([_words(rng, 60, spec.cjk_ratio), ""])
+    return "\n".join(lines)
+
+
+def _write_knowledge(
+    pack_dir: Path,
+    relative_dir: str,
+    files: list[str],
+    depth: int,
+    rng: random.Random,
+    spec: CorpusSpec,
+) -> list[str]:
+    """Write one index level; split files into two sub-groups until depth runs out."""
+    directory = pack_dir / relative_dir
+    directory.mkdir(parents=True, exist_ok=True)
+    written: list[str] = []
+    lines = [f"## 知识索引（{relative_dir}）", ""]
+    if depth > 1 and len(files) > _FILES_PER_GROUP:
+        middle = len(files) // 2
+        for part, chunk in enumerate((files[:middle], files[middle:])):
+            child = f"{relative_dir}/part-{part}"
+            written.extend(_write_knowledge(pack_dir, child, chunk, depth - 1, rng, spec))
+            lines.extend(
+                [
+                    f"### 分组 {part}",
+                    f"- `{child}/_index.md` - 分组索引入口。",
+                    f"  → 详见 {child}/_index.md",
+                    "",
+                ]
+            )
+    else:
+        for start in range(0, len(files), _FILES_PER_GROUP):
+            lines.append(f"### {_words(rng, 2, spec.cjk_ratio)} {start // _FILES_PER_GROUP}")
+            for stem in files[start : start + _FILES_PER_GROUP]:
+                relative = f"{relative_dir}/{stem}.md"
+                (pack_dir / relative).write_text(
+                    _knowledge_body(rng, stem, spec), encoding="utf-8"
+                )
+                written.append(relative)
+                lines.append(f"- `{relative}` - {_words(rng, 6, spec.cjk_ratio)}。")
+                lines.append(f"  摘要：{_words(rng, 16, spec.cjk_ratio)}")
+            lines.append("")
+    (directory / "_index.md").write_text("\n".join(lines), encoding="utf-8")
+    return written
+
+
+def _write_examples(
+    pack_dir: Path, knowledge: list[str], rng: random.Random, spec: CorpusSpec
+) -> int:
+    examples_dir = pack_dir / "examples"
+    examples_dir.mkdir(parents=True, exist_ok=True)
+    count = max(1, len(knowledge) // 5)
+    lines = ["## 案例索引", ""]
+    for number in range(count):
+        uses = rng.sample(knowledge, k=min(2, len(knowledge)))
+        stem = f"case-{number:03d}"
+        frontmatter = ["---", f"title: {stem}", "uses:", *[f"  - {ref}" for ref in uses], "---"]
+        body = "\n\n".join(_words(rng, 40, spec.cjk_ratio) for _ in range(3))
+        (examples_dir / f"{stem}.md").write_text(
+            "\n".join(frontmatter) + f"\n\n{body}\n", encoding="utf-8"
+        )
+        lines.append(f"- `examples/{stem}.md` - {_words(rng, 6, spec.cjk_ratio)}。")
+        lines.append(f"  uses: {', '.join(uses)}")
+    (examples_dir / "_index.md").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return count
+
+
+def generate_corpus(root: Path, spec: CorpusSpec | None = None) -> Corpus:
+    """Create `spec.packs` packs named bench-000... under root (existing files are kept).
+
+    Knowledge, examples and indexes are written directly; memory entries and tool
+    traces go through EngramLoader so the memory log and indexes match real use.
+    """
+    spec = spec or CorpusSpec()
+    root = root.expanduser()
+    root.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(spec.seed)
+    corpus = Corpus(root=root, spec=spec)
+
+    for number in range(spec.packs):
+        name = f"bench-{number:03d}"
+        pack_dir = root / name
+        pack_dir.mkdir(exist_ok=True)
+        stems = [f"topic-{item:04d}" for item in range(spec.knowledge_files)]
+        knowledge = _write_knowledge(
+            pack_dir, "knowledge", stems, max(1, spec.index_depth), rng, spec
+        )
+        examples_count = _write_examples(pack_dir, knowledge, rng, spec) if knowledge else 0
+        for filename, title in (("role.md", "角色"), ("workflow.md", "工作流程"), ("rules.md", "规则")):
+            (pack_dir / filename).write_text(
+                f"# {title}\n\n{_words(rng, 80, spec.cjk_ratio)}\n", encoding="utf-8"
+            )
+        (pack_dir / "memory").mkdir(exist_ok=True)
+        (pack_dir / "meta.json").write_text(
+            json.dumps(
+                {
+                    "name": name,
+                    "author": "bench",
+                    "version": "1.0.0",
+                    "description": f"synthetic benchmark pack {number}",
+                    "tags": ["bench"],
+                    "knowledge_count": len(knowledge),
+                    "examples_count": examples_count,
+                },
+                ensure_ascii=False,
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+        corpus.packs.append(name)
+        corpus.knowledge[name] = knowledge
+
+    loader = EngramLoader(root)
+    for name in corpus.packs:
+        memories = [
+            {
+                "content": f"{_words(rng, 24, spec.cjk_ratio)} #{item}",
+                "category": _MEMORY_CATEGORIES[item % len(_MEMORY_CATEGORIES)],
+                "summary": f"{_words(rng, 5, spec.cjk_ratio)} #{item}",
+            }
+            for item in range(spec.memory_entries)
+        ]
+        if memories:
+            loader.capture_memories(name, memories, throttle_seconds=0)
+        traces = [
+            {
+                "tool_name": rng.choice(("load_engram", "read_engram_file", "capture_memory")),
+                "intent": f"{_words(rng, 4, spec.cjk_ratio)} #{item}",
+                "result_summary": _words(rng, 6, spec.cjk_ratio),
+                "args_summary": f"name={name}",
+            }
+            for item in range(spec.trace_lines)
+        ]
+        if traces:
+            loader.capture_tool_traces(name, traces)
+        loader.flush_memory_index(name)
+    return corpus
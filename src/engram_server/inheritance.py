@@ -0,0 +1,101 @@
+"""Resolution of multi-level `extends` chains and dedup of inherited index lines."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+# lookup(name) -> (pack 目录, meta)；找不到返回 None
+PackLookup = Callable[[str], "tuple[Path, dict[str, Any] | None] | None"]
+
+
+@dataclass(frozen=True)
+class ExtendsChain:
+    # 祖先 pack 名与目录，最近的父级在前
+    ancestors: tuple[tuple[str, Path], ...] = ()
+    # 检测到循环时的完整环路（如 a, b, a），否则为空
+    cycle: tuple[str, ...] = ()
+    # extends 指向但不存在的 pack 名
+    missing: str = ""
+
+    @property
+    def names(self) -> list[str]:
+        return [name for name, _ in self.ancestors]
+
+
+def _parent_of(meta: dict[str, Any] | None) -> str:
+    parent = (meta or {}).get("extends")
+    return parent.strip() if isinstance(parent, str) else ""
+
+
+def resolve_extends(name: str, meta: dict[str, Any] | None, lookup: PackLookup) -> ExtendsChain:
+    """Walk `extends` from one pack to the root; stop at a cycle or a missing parent."""
+    visited = [name]
+    ancestors: list[tuple[str, Path]] = []
+    parent = _parent_of(meta)
+    while parent:
+        if parent in visited:
+            cycle = tuple(visited[visited.index(parent) :]) + (parent,)
+            return ExtendsChain(ancestors=tuple(ancestors), cycle=cycle)
+        found = lookup(parent)
+        if found is None:
+            return ExtendsChain(ancestors=tuple(ancestors), missing=parent)
+        parent_dir, parent_meta = found
+        ancestors.append((parent, parent_dir))
+        visited.append(parent)
+        parent = _parent_of(parent_meta)
+    return ExtendsChain(ancestors=tuple(ancestors))
+
+
+def _level(heading: str) -> int:
+    return len(heading) - len(heading.lstrip("#"))
+
+
+def index_entry_lines(text: str) -> set[str]:
+    return {line.strip() for line in text.splitlines() if line.startswith("- ")}
+
+
+def dedupe_index_lines(text: str, seen: set[str]) -> str:
+    """Drop `- ` entries (and their continuation lines) already in `seen`; updates `seen`.
+
+    Headings left without any entry are dropped too; returns "" when nothing remains.
+    """
+    kept: list[str] = []
+    skipping = False
+    for line in text.strip().splitlines():
+        if line.startswith("- "):
+            key = line.strip()
+            skipping = key in seen
+            if not skipping:
+                seen.add(key)
+                kept.append(line)
+            continue
+        if skipping and line.startswith((" ", "\t")) and line.strip():
+            continue
+        skipping = False
+        kept.append(line)
+
+    if not any(line.startswith("- ") for line in kept):
+        return ""
+
+    # 去掉其下已无条目的标题，并合并多余空行
+    out: list[str] = []
+    for i, line in enumerate(kept):
+        if line.startswith("#") and not _has_entries(kept, i):
+            continue
+        if not line.strip() and (not out or not out[-1].strip()):
+            continue
+        out.append(line)
+    return "\n".join(out).strip()
+
+
+def _has_entries(lines: list[str], heading_at: int) -> bool:
+    level = _level(lines[heading_at])
+    for line in lines[heading_at + 1 :]:
+        if line.startswith("#") and _level(line) <= level:
+            return False
+        if line.startswith("- "):
+            return True
+    return False
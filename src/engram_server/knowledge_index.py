@@ -0,0 +1,309 @@
+"""Per-pack BM25 full-text index over knowledge/ and examples/ markdown files."""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import unicodedata
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from engram_server.tokenizer import normalize, tokenize
+
+if TYPE_CHECKING:
+    from engram_server.overlay import PackLayer
+
+INDEX_FILENAME = ".search_index.json"
+INDEXED_DIRS = ("knowledge", "examples")
+_INDEX_VERSION = 2
+_BM25_K1 = 1.2
+_BM25_B = 0.75
+_SNIPPET_RADIUS = 40
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    path: str
+    score: float
+    snippet: str
+
+
+class KnowledgeIndex:
+    """BM25 index of one pack, persisted as `{pack}/.search_index.json`.
+
+    Each document stores its stat stamp and term frequencies; postings are rebuilt
+    in memory on load. `refresh()` re-tokenizes only files whose (mtime_ns, size)
+    changed, `update(paths)` reindexes specific files right after a write.
+
+    For layered packs `lower` returns the read-only lower layer: its files are
+    indexed unless the upper dir has the same path, and each stamp records which
+    layer it came from.
+    """
+
+    def __init__(
+        self,
+        engram_dir: Path,
+        *,
+        lower: Callable[[], PackLayer | None] | None = None,
+    ):
+        self.engram_dir = engram_dir
+        self._lower = lower
+        self.index_path = engram_dir / INDEX_FILENAME
+        self.lock = threading.RLock()
+        self._docs: dict[str, dict[str, Any]] = {}
+        self._postings: dict[str, dict[str, int]] = {}
+        self._total_len = 0
+        self._loaded = False
+
+    def refresh(self) -> bool:
+        """Sync the index with the files on disk; return True when anything changed."""
+        with self.lock:
+            self._ensure_loaded()
+            seen = dict(self._scan())
+            changed = False
+            for rel in [rel for rel in self._docs if rel not in seen]:
+                self._remove(rel)
+                changed = True
+            for rel, stamp in seen.items():
+                doc = self._docs.get(rel)
+                if doc is not None and _doc_stamp(doc) == stamp:
+                    continue
+                changed = self._index_file(rel) or changed
+            if changed:
+                self._save()
+            return changed
+
+    def update(self, relative_paths: list[str]) -> None:
+        """Reindex (or drop, when missing) the given pack-relative paths and persist."""
+        with self.lock:
+            self._ensure_loaded()
+            changed = False
+            for rel in relative_paths:
+                if self._is_indexed_path(rel):
+                    # 文件已删除时 _index_file 会移除旧文档
+                    changed = self._index_file(rel) or changed
+            if changed:
+                self._save()
+
+    def search(self, query: str, top_k: int = 5) -> list[SearchHit]:
+        """Rank indexed files against the query with BM25."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self.lock:
+            self._ensure_loaded()
+            doc_count = len(self._docs)
+            if not terms or not doc_count:
+                return []
+            avg_len = self._total_len / doc_count or 1.0
+            scores: dict[str, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for rel, tf in postings.items():
+                    length = self._docs[rel]["len"]
+                    norm = tf + _BM25_K1 * (1 - _BM25_B + _BM25_B * length / avg_len)
+                    scores[rel] = scores.get(rel, 0.0) + idf * tf * (_BM25_K1 + 1) / norm
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[: max(1, top_k)]
+        return [
+            SearchHit(path=rel, score=round(score, 4), snippet=self._snippet(rel, terms))
+            for rel, score in ranked
+        ]
+
+    def stats(self) -> dict[str, int]:
+        with self.lock:
+            self._ensure_loaded()
+            return {"documents": len(self._docs), "terms": len(self._postings)}
+
+    @staticmethod
+    def _is_indexed_path(rel: str) -> bool:
+        parts = rel.split("/")
+        return (
+            len(parts) >= 2
+            and parts[0] in INDEXED_DIRS
+            and rel.endswith(".md")
+            and parts[-1] != "_index.md"
+        )
+
+    def _scan(self) -> list[tuple[str, tuple[int, int, bool]]]:
+        """(relative path, (mtime_ns, size, from_lower)) of every indexable file."""
+        found: list[tuple[str, tuple[int, int, bool]]] = []
+        for subdir in INDEXED_DIRS:
+            base = self.engram_dir / subdir
+            if not base.is_dir():
+                continue
+            for root, dirs, files in os.walk(base):
+                dirs.sort()
+                for filename in sorted(files):
+                    path = Path(root) / filename
+                    rel = path.relative_to(self.engram_dir).as_posix()
+                    if not self._is_indexed_path(rel):
+                        continue
+                    try:
+                        st = path.stat()
+                    except OSError:
+                        continue
+                    found.append((rel, (st.st_mtime_ns, st.st_size, False)))
+        layer = self._lower() if self._lower is not None else None
+        if layer is not None:
+            # 下层文件被上层同名文件覆盖
+            shadowed = {rel for rel, _ in found}
+            for subdir in INDEXED_DIRS:
+                for rel in layer.files(subdir):
+                    if rel in shadowed or not self._is_indexed_path(rel):
+                        continue
+                    stamp = layer.stamp(rel)
+                    if stamp is not None:
+                        found.append((rel, (*stamp, True)))
+        return found
+
+    def _read_source(self, rel: str) -> tuple[str, tuple[int, int, bool]] | None:
+        """Text and stamp of a file from the upper dir, else from the lower layer."""
+        path = self.engram_dir / rel
+        try:
+            if path.is_file():
+                st = path.stat()
+                return path.read_text(encoding="utf-8"), (st.st_mtime_ns, st.st_size, False)
+        except (OSError, UnicodeDecodeError):
+            return None
+        layer = self._lower() if self._lower is not None else None
+        if layer is None:
+            return None
+        stamp = layer.stamp(rel)
+        data = layer.read(rel)
+        if stamp is None or data is None:
+            return None
+        try:
+            return data.decode("utf-8"), (*stamp, True)
+        except UnicodeDecodeError:
+            return None
+
+    def _index_file(self, rel: str) -> bool:
+        source = self._read_source(rel)
+        if source is None:
+            if rel in self._docs:
+                self._remove(rel)
+                return True
+            return False
+        text, (mtime_ns, size, from_lower) = source
+        tokens = tokenize(text)
+        self._remove(rel)
+        tf = dict(Counter(tokens))
+        self._docs[rel] = {
+            "mtime_ns": mtime_ns,
+            "size": size,
+            "lower": from_lower,
+            "len": len(tokens),
+            "tf": tf,
+        }
+        self._add_postings(rel, tf)
+        self._total_len += len(tokens)
+        return True
+
+    def _remove(self, rel: str) -> None:
+        doc = self._docs.pop(rel, None)
+        if doc is None:
+            return
+        self._total_len -= doc["len"]
+        for term in doc["tf"]:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(rel, None)
+            if not postings:
+                del self._postings[term]
+
+    def _add_postings(self, rel: str, tf: dict[str, int]) -> None:
+        for term, count in tf.items():
+            self._postings.setdefault(term, {})[rel] = count
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            data = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return
+        if not isinstance(data, dict) or data.get("version") != _INDEX_VERSION:
+            return
+        docs = data.get("docs")
+        if not isinstance(docs, dict):
+            return
+        for rel, doc in docs.items():
+            if not isinstance(doc, dict) or not isinstance(doc.get("tf"), dict):
+                continue
+            self._docs[rel] = doc
+            self._add_postings(rel, doc["tf"])
+            self._total_len += int(doc.get("len", 0))
+
+    def _save(self) -> None:
+        payload = json.dumps(
+            {"version": _INDEX_VERSION, "docs": self._docs},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        tmp_path = self.index_path.with_name(f"{INDEX_FILENAME}.tmp")
+        try:
+            tmp_path.write_text(payload, encoding="utf-8")
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            # 索引只是加速结构，写失败时下次仍可从文件重建
+            tmp_path.unlink(missing_ok=True)
+
+    def _snippet(self, rel: str, terms: list[str]) -> str:
+        source = self._read_source(rel)
+        if source is None:
+            return ""
+        text = source[0]
+        lines = text.splitlines(keepends=True)
+        folded = [normalize(line) for line in lines]
+        normalized = "".join(folded)
+        positions = [pos for pos in (normalized.find(term) for term in terms) if pos >= 0]
+        # 命中位置在归一化文本里，需映射回原文再截取
+        start = _source_offset(lines, folded, min(positions)) if positions else 0
+        begin = max(0, start - _SNIPPET_RADIUS)
+        snippet = " ".join(text[begin : start + _SNIPPET_RADIUS * 2].split())
+        prefix = "…" if begin > 0 else ""
+        suffix = "…" if start + _SNIPPET_RADIUS * 2 < len(text) else ""
+        return f"{prefix}{snippet}{suffix}"
+
+
+def _source_offset(lines: list[str], folded: list[str], pos: int) -> int:
+    """Map an offset in the joined normalized lines back to the source text.
+
+    NFKC and casefold change lengths ("…" -> "...", "ß" -> "ss"), so only the line
+    holding the match is re-normalized, cluster by cluster up to the match.
+    """
+    base = 0
+    for line, normalized in zip(lines, folded):
+        if pos < len(normalized):
+            if line.isascii():
+                return base + pos
+            return base + _line_offset(line, pos)
+        pos -= len(normalized)
+        base += len(line)
+    return base
+
+
+def _line_offset(line: str, pos: int) -> int:
+    consumed = 0
+    begin = 0
+    for index in range(1, len(line) + 1):
+        # 组合字符与前一个字符一起归一化，保证 NFKC 组合结果一致
+        if index < len(line) and unicodedata.combining(line[index]):
+            continue
+        consumed += len(normalize(line[begin:index]))
+        if consumed > pos:
+            return begin
+        begin = index
+    return begin
+
+
+def _doc_stamp(doc: dict[str, Any]) -> tuple[int, int, bool]:
+    return (doc["mtime_ns"], doc["size"], bool(doc.get("lower", False)))
@@ -2,10 +2,16 @@ from __future__ import annotations
 
 import json
 import re
+from collections.abc import Iterable
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Literal
 
+from engram_server.archive import ARCHIVE_SUFFIXES, ArchivePack
+from engram_server.inheritance import PackLookup, resolve_extends
+from engram_server.overlay import read_lower_link
+from engram_server.uses_graph import parse_uses_frontmatter
+
 
 @dataclass(frozen=True, slots=True)
 class LintMessage:
@@ -41,47 +47,6 @@ def _read_text(path: Path) -> str:
         return ""
 
 
-def _parse_uses_from_frontmatter(content: str) -> list[str]:
-    lines = content.splitlines()
-    if not lines or lines[0].strip() != "---":
-        return []
-
-    end_idx = None
-    for idx in range(1, len(lines)):
-        if lines[idx].strip() == "---":
-            end_idx = idx
-            break
-    if end_idx is None:
-        return []
-
-    uses: list[str] = []
-    frontmatter = lines[1:end_idx]
-    i = 0
-    while i < len(frontmatter):
-        stripped = frontmatter[i].strip()
-        if stripped.startswith("uses:"):
-            inline = stripped[len("uses:"):].strip()
-            if inline.startswith("[") and inline.endswith("]"):
-                items = [part.strip() for part in inline[1:-1].split(",")]
-                uses.extend(item for item in items if item)
-                return uses
-
-            i += 1
-            while i < len(frontmatter):
-                entry = frontmatter[i].strip()
-                if not entry:
-                    i += 1
-                    continue
-                if entry.startswith("- "):
-                    uses.append(entry[2:].strip())
-                    i += 1
-                    continue
-                break
-            return uses
-        i += 1
-    return uses
-
-
 def _extract_index_references(content: str, section: str) -> tuple[set[str], set[str]]:
     listed_files: set[str] = set()
     nested_indexes: set[str] = set()
@@ -202,7 +167,7 @@ def _lint_examples_uses(
     for rel in sorted(example_files):
         path = engram_dir / rel
         content = _read_text(path)
-        uses = _parse_uses_from_frontmatter(content)
+        uses = parse_uses_frontmatter(content)
 
         for ref in uses:
             target = (engram_dir / ref).resolve()
@@ -228,7 +193,51 @@ def _lint_examples_uses(
                 )
 
 
-def _lint_meta(engram_dir: Path, messages: list[LintMessage]) -> dict | None:
+def _parse_meta(raw: str | bytes | None) -> dict | None:
+    if raw is None:
+        return None
+    try:
+        meta = json.loads(raw)
+    except ValueError:
+        return None
+    return meta if isinstance(meta, dict) else None
+
+
+def _read_meta_file(path: Path) -> dict | None:
+    try:
+        return _parse_meta(path.read_bytes())
+    except OSError:
+        return None
+
+
+# 按名称依次在各 packs 根目录中查找：普通目录、链接安装的上层目录、归档包
+def _pack_lookup(roots: list[Path]) -> PackLookup:
+
+    def lookup(name: str) -> tuple[Path, dict | None] | None:
+        for root in roots:
+            pack_dir = root / name
+            if pack_dir.is_dir():
+                meta_path = pack_dir / "meta.json"
+                lower = read_lower_link(pack_dir)
+                # 链接安装的上层目录可能没有 meta.json，此时读取只读下层的
+                if not meta_path.is_file() and lower is not None:
+                    meta_path = lower / "meta.json"
+                return pack_dir, _read_meta_file(meta_path)
+            for suffix in ARCHIVE_SUFFIXES:
+                archive_path = root / f"{name}{suffix}"
+                if not archive_path.is_file():
+                    continue
+                archive = ArchivePack.open(archive_path)
+                meta = _parse_meta(archive.read("meta.json")) if archive is not None else None
+                return archive_path, meta
+        return None
+
+    return lookup
+
+
+def _lint_meta(
+    engram_dir: Path, messages: list[LintMessage], roots: list[Path]
+) -> dict | None:
     meta_path = engram_dir / "meta.json"
     if not meta_path.is_file():
         _append_message(
@@ -271,8 +280,8 @@ def _lint_meta(engram_dir: Path, messages: list[LintMessage]) -> dict | None:
 
     parent = meta.get("extends")
     if isinstance(parent, str) and parent.strip():
-        parent_dir = engram_dir.parent / parent
-        if not parent_dir.is_dir():
+        lookup = _pack_lookup(roots)
+        if lookup(parent.strip()) is None:
             _append_message(
                 messages,
                 level="error",
@@ -280,11 +289,29 @@ def _lint_meta(engram_dir: Path, messages: list[LintMessage]) -> dict | None:
                 file_path=meta_path,
                 root=engram_dir,
             )
+        else:
+            chain = resolve_extends(engram_dir.name, meta, lookup)
+            if chain.cycle:
+                _append_message(
+                    messages,
+                    level="error",
+                    message=f"extends 存在循环引用：{' → '.join(chain.cycle)}",
+                    file_path=meta_path,
+                    root=engram_dir,
+                )
+            elif chain.missing:
+                _append_message(
+                    messages,
+                    level="warning",
+                    message=f"extends 继承链中的祖先 Engram 不存在：{chain.missing}",
+                    file_path=meta_path,
+                    root=engram_dir,
+                )
 
     return meta
 
 
-def lint_engram(pack_dir: str | Path) -> list[LintMessage]:
+def lint_engram(pack_dir: str | Path, *, roots: Iterable[Path] = ()) -> list[LintMessage]:
     engram_dir = Path(pack_dir).expanduser().resolve()
     messages: list[LintMessage] = []
 
@@ -294,7 +321,10 @@ def lint_engram(pack_dir: str | Path) -> list[LintMessage]:
         )
         return messages
 
-    _lint_meta(engram_dir, messages)
+    # extends 的父 Engram 先在同级目录找，再在调用方给出的其他根目录（--base-dir 等）中找
+    search_roots = [engram_dir.parent]
+    search_roots.extend(root for root in roots if root not in search_roots)
+    _lint_meta(engram_dir, messages, search_roots)
 
     role_path = engram_dir / "role.md"
     if not role_path.is_file():
@@ -1,13 +1,56 @@
 from __future__ import annotations
 
+import io
 import json
+import os
 import re
+import tempfile
+import threading
 import time
-from collections.abc import Iterable
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
-
+from typing import Any, BinaryIO
+
+from engram_server.archive import ArchivePack
+from engram_server.bundle import BUNDLE_FILENAME, PackBundle, compile_bundle
+from engram_server.cache import FingerprintLRU, file_fingerprint
+from engram_server.catalog import CatalogEntry, PackCatalog
+from engram_server.context_budget import fit_to_budget
+from engram_server.inheritance import (
+    ExtendsChain,
+    dedupe_index_lines,
+    index_entry_lines,
+    resolve_extends,
+)
+from engram_server.knowledge_index import INDEX_FILENAME, KnowledgeIndex
+from engram_server.maintenance import MaintenanceWorker
+from engram_server.metrics import ToolMetrics, timed
+from engram_server.overlay import PackLayer, open_layer
+from engram_server.tracing import NULL_TRACER, Tracer
+from engram_server.memory_log import (
+    FULL_INDEX_FILENAME,
+    HOT_INDEX_FILENAME,
+    LOG_FILENAME,
+    STATE_FILENAME,
+    MemoryEntry,
+    MemoryLog,
+    new_entry_id,
+    parse_index_line,
+    scan_block_starts,
+    scan_blocks,
+    splice_block,
+)
+from engram_server.sections import Section, find_section, parse_sections, read_section
+from engram_server.uses_graph import (
+    UsesGraph,
+    build_uses_graph,
+    example_files,
+    example_refs,
+    graph_from_forward,
+)
 
 _BASE_SECTIONS = {
     "role": "role.md",
@@ -15,8 +58,21 @@ _BASE_SECTIONS = {
     "rules": "rules.md",
 }
 
-_HOT_INDEX_LIMIT = 50
 _CONSOLIDATE_HINT_THRESHOLD = 30
+_INDEX_FLUSH_WRITES = 20
+_MEMORY_VIEW_PATHS = {f"memory/{HOT_INDEX_FILENAME}", f"memory/{FULL_INDEX_FILENAME}"}
+_CONTEXT_CACHE_SIZE = 64
+_BATCH_READ_MAX_BYTES = 256 * 1024
+_BATCH_READ_WORKERS = 8
+_SECTION_CACHE_SIZE = 256
+_OUTLINE_MAX_LEVEL = 3
+_BLOCK_INDEX_CACHE_SIZE = 64
+_PAGE_ENTRIES = 20
+_PAGE_BYTES = 64 * 1024
+_USES_GRAPH_CACHE_SIZE = 64
+_INHERITANCE_CACHE_SIZE = 64
+_LAYER_CACHE_SIZE = 256
+_OVERLAY_DIRNAME = ".overlay"
 
 
 class EngramLoader:
@@ -27,6 +83,12 @@ class EngramLoader:
         packs_dir: Path | str | Iterable[Path | str],
         *,
         default_packs_dir: Path | str | None = None,
+        context_cache_size: int = _CONTEXT_CACHE_SIZE,
+        background_maintenance: bool = False,
+        overlay_dir: Path | str | None = None,
+        base_dirs: Iterable[Path | str] = (),
+        metrics: ToolMetrics | None = None,
+        tracer: Tracer | None = None,
     ):
         if isinstance(packs_dir, (str, Path)):
             raw_dirs: list[Path | str] = [packs_dir]
@@ -44,117 +106,641 @@ class EngramLoader:
                 continue
             seen.add(resolved)
             normalized_dirs.append(resolved)
+        default_dir = normalized_dirs[0]
+
+        # 只读基础根（容器镜像/NFS）排在最后，其 pack 的写入落在 overlay 上层
+        self.base_dirs: list[Path] = []
+        for item in base_dirs:
+            resolved = Path(item).expanduser().resolve()
+            if resolved in seen:
+                continue
+            seen.add(resolved)
+            self.base_dirs.append(resolved)
+            normalized_dirs.append(resolved)
 
         self.packs_dirs = normalized_dirs
         if default_packs_dir is None:
-            self.packs_dir = self.packs_dirs[0]
+            self.packs_dir = default_dir
         else:
             self.packs_dir = Path(default_packs_dir).expanduser().resolve()
         self._throttle_cache: dict[str, float] = {}
-
+        # 主要读写方法的耗时/错误计数；为 None 时不做任何记录
+        self.metrics = metrics
+        # 文件系统 I/O 的嵌套 span；默认 NULL_TRACER 不做任何记录
+        self.tracer = tracer or NULL_TRACER
+        # 归档 pack 与只读基础根中 pack 的写入（记忆、add_knowledge 等）落在 overlay_dir/<name>
+        if overlay_dir is None:
+            self.overlay_dir = self.packs_dir / _OVERLAY_DIRNAME
+        else:
+            self.overlay_dir = Path(overlay_dir).expanduser().resolve()
+        self.catalog = PackCatalog(
+            self.packs_dirs, overlay_dir=self.overlay_dir, base_roots=self.base_dirs
+        )
+        self.context_cache = FingerprintLRU(context_cache_size)
+        self.section_cache = FingerprintLRU(_SECTION_CACHE_SIZE)
+        self.block_index_cache = FingerprintLRU(_BLOCK_INDEX_CACHE_SIZE)
+        self.uses_graph_cache = FingerprintLRU(_USES_GRAPH_CACHE_SIZE)
+        self.inheritance_cache = FingerprintLRU(_INHERITANCE_CACHE_SIZE)
+        self._bundles: dict[Path, tuple[Any, PackBundle | None]] = {}
+        self._bundles_lock = threading.Lock()
+        self.layer_cache = FingerprintLRU(_LAYER_CACHE_SIZE)
+        self._overlays_ready: set[Path] = set()
+        self._overlays_lock = threading.Lock()
+        self._memory_logs: dict[Path, MemoryLog] = {}
+        self._memory_logs_lock = threading.Lock()
+        self._knowledge_indexes: dict[Path, KnowledgeIndex] = {}
+        self._knowledge_indexes_lock = threading.Lock()
+        self._io_pool: ThreadPoolExecutor | None = None
+        self._io_pool_lock = threading.Lock()
+        self.maintenance = MaintenanceWorker() if background_maintenance else None
+
+    @timed("loader.list_engrams")
     def list_engrams(self) -> list[dict[str, Any]]:
         engrams: list[dict[str, Any]] = []
         seen_names: set[str] = set()
-        for packs_root in self.packs_dirs:
-            if not packs_root.exists():
+        for entry in self.catalog.entries():
+            meta = entry.meta
+            if meta is None:
                 continue
 
-            for entry in sorted(packs_root.iterdir()):
-                if not entry.is_dir():
-                    continue
-                meta = self._read_meta(entry / "meta.json")
-                if meta is None:
-                    continue
-
-                name = str(meta.get("name", entry.name))
-                if name in seen_names:
-                    continue
-                seen_names.add(name)
-
-                engrams.append(
-                    {
-                        "name": name,
-                        "description": meta.get("description", ""),
-                        "tags": meta.get("tags", []),
-                        "version": meta.get("version", ""),
-                        "author": meta.get("author", ""),
-                        "knowledge_count": meta.get("knowledge_count", 0),
-                        "examples_count": meta.get("examples_count", 0),
-                    }
-                )
+            # 分层 pack（归档、只读下层）按 catalog 键解析，文件名与 meta.name 可能不同
+            name = entry.name if entry.lower is not None else str(meta.get("name", entry.name))
+            if name in seen_names:
+                continue
+            seen_names.add(name)
+
+            engrams.append(
+                {
+                    "name": name,
+                    "description": meta.get("description", ""),
+                    "tags": meta.get("tags", []),
+                    "version": meta.get("version", ""),
+                    "author": meta.get("author", ""),
+                    "knowledge_count": meta.get("knowledge_count", 0),
+                    "examples_count": meta.get("examples_count", 0),
+                }
+            )
         return engrams
 
     def get_engram_info(self, name: str) -> dict[str, Any] | None:
+        if self._is_plain_name(name):
+            entry = self.catalog.get(name)
+            if entry is None or entry.meta is None:
+                return None
+            return dict(entry.meta)
+
         engram_dir = self._resolve_engram_dir(name)
         if engram_dir is None:
             return None
         return self._read_meta(engram_dir / "meta.json")
 
+    @timed("loader.load_file")
     def load_file(self, name: str, filepath: str) -> str | None:
+        if Path(filepath).as_posix() in _MEMORY_VIEW_PATHS:
+            self.flush_memory_index(name)
         target = self._resolve_file(name, filepath)
-        if target is None or not target.is_file():
+        if target is None:
+            return None
+        bundled = self._read_bundled(target)
+        if bundled is not None:
+            try:
+                return bundled.decode("utf-8")
+            except UnicodeDecodeError:
+                pass
+        if not target.is_file():
+            lower_data = self._read_lower(target)
+            if lower_data is None:
+                return None
+            return lower_data.decode("utf-8", errors="replace")
+
+        try:
+            with self.tracer.span("read", target) as span:
+                text = target.read_text(encoding="utf-8")
+                span.record(text)
+        except OSError:
             return None
+        return text
+
+    @timed("loader.load_files")
+    def load_files(
+        self,
+        name: str,
+        paths: list[str],
+        *,
+        max_total_bytes: int = _BATCH_READ_MAX_BYTES,
+    ) -> list[dict[str, Any]]:
+        """Read several files of one pack in parallel under a total size cap.
 
+        Returns one {path, content, error, bytes} dict per distinct path, in request
+        order; content is None when error is set. Sizes are checked (via stat) in
+        request order before reading, so files past the cap are skipped unread.
+        """
+        unique = list(dict.fromkeys(p for p in paths if p.strip()))
+        results: list[dict[str, Any]] = [
+            {"path": path, "content": None, "error": "", "bytes": 0} for path in unique
+        ]
+        if self._resolve_engram_dir(name) is None:
+            for result in results:
+                result["error"] = f"未找到 Engram: {name}"
+            return results
+
+        budget = max_total_bytes
+        to_read: list[dict[str, Any]] = []
+        for result in results:
+            target = self._resolve_file(name, result["path"])
+            if target is None:
+                result["error"] = "路径越界"
+                continue
+            try:
+                with self.tracer.span("stat", target):
+                    size = target.stat().st_size if target.is_file() else self._lower_size(target)
+            except OSError:
+                size = -1
+            if size < 0:
+                result["error"] = "文件不存在"
+                continue
+            if size > budget:
+                result["error"] = f"超出本次批量读取上限（{max_total_bytes} 字节）"
+                continue
+            budget -= size
+            to_read.append(result)
+
+        if not to_read:
+            return results
+        if len(to_read) == 1:
+            contents = [self.load_file(name, to_read[0]["path"])]
+        else:
+            pool = self._get_io_pool()
+            contents = list(pool.map(lambda item: self.load_file(name, item["path"]), to_read))
+        for result, content in zip(to_read, contents):
+            if content is None:
+                result["error"] = "读取失败"
+                continue
+            result["content"] = content
+            result["bytes"] = len(content.encode("utf-8"))
+        return results
+
+    def _get_io_pool(self) -> ThreadPoolExecutor:
+        with self._io_pool_lock:
+            if self._io_pool is None:
+                self._io_pool = ThreadPoolExecutor(
+                    max_workers=_BATCH_READ_WORKERS, thread_name_prefix="engram-io"
+                )
+            return self._io_pool
+
+    @timed("loader.load_file_page")
+    def load_file_page(
+        self,
+        name: str,
+        filepath: str,
+        *,
+        offset: int = 0,
+        limit: int = 0,
+        unit: str = "entry",
+    ) -> dict[str, Any] | None:
+        """Read one page of a file without loading the whole file.
+
+        unit="entry" pages over memory blocks (`\n---\n` separated entries) using a
+        block-offset index cached by (mtime_ns, size); text before the first block
+        is returned with page 0. unit="bytes" pages over raw bytes, snapped to UTF-8
+        character boundaries. Returns {content, unit, start, end, total, next, limit}
+        where `next` is the offset to continue from (None on the last page) and
+        `limit` the page size applied, or None when the file is missing or the unit
+        is unknown.
+        """
+        if unit not in {"entry", "bytes"}:
+            return None
+        target = self._resolve_file(name, filepath)
+        if target is None:
+            return None
+        # 下层文件（归档成员等）读入内存后按同样的规则分页
+        lower_data = None if target.is_file() else self._read_lower(target)
+        if lower_data is None and not target.is_file():
+            return None
+        offset = max(0, offset)
         try:
-            return target.read_text(encoding="utf-8")
+            size = target.stat().st_size if lower_data is None else len(lower_data)
+            if unit == "bytes":
+                limit = limit if limit > 0 else _PAGE_BYTES
+                source = self._open_page_source(target, lower_data)
+                return self._read_byte_page(source, size, offset, limit)
+            limit = limit if limit > 0 else _PAGE_ENTRIES
+            if lower_data is None:
+                starts = self._block_starts(target)
+            else:
+                starts = scan_block_starts(io.BytesIO(lower_data))
+            total = len(starts)
+            first = min(offset, total)
+            last = min(first + limit, total)
+            begin = 0 if first == 0 else starts[first]
+            end = starts[last] if last < total else size
+            with self._open_page_source(target, lower_data) as f:
+                f.seek(begin)
+                data = f.read(max(0, end - begin))
         except OSError:
             return None
+        return {
+            "content": data.decode("utf-8", errors="replace"),
+            "unit": "entry",
+            "start": first,
+            "end": last,
+            "total": total,
+            "next": last if last < total else None,
+            "limit": limit,
+        }
+
+    @staticmethod
+    def _open_page_source(target: Path, lower_data: bytes | None) -> BinaryIO:
+        return target.open("rb") if lower_data is None else io.BytesIO(lower_data)
+
+    @staticmethod
+    def _read_byte_page(source: BinaryIO, size: int, offset: int, limit: int) -> dict[str, Any]:
+        begin = min(offset, size)
+        with source as f:
+            f.seek(begin)
+            # 多读几个字节，便于把页首/页尾对齐到 UTF-8 字符边界
+            data = f.read(limit + 4)
+        # 跳过页首残缺的多字节字符续字节
+        skip = 0
+        while skip < len(data) and skip < 3 and data[skip] & 0xC0 == 0x80:
+            skip += 1
+        cut = min(len(data), skip + limit)
+        while skip < cut < len(data) and data[cut] & 0xC0 == 0x80:
+            cut -= 1
+        if cut == skip and skip < len(data):
+            # 页长小于一个字符时至少返回一个完整字符，保证游标前进
+            cut += 1
+            while cut < len(data) and data[cut] & 0xC0 == 0x80:
+                cut += 1
+        start = begin + skip
+        end = begin + cut
+        return {
+            "content": data[skip:cut].decode("utf-8", errors="replace"),
+            "unit": "bytes",
+            "start": start,
+            "end": end,
+            "total": size,
+            "next": end if end < size else None,
+            "limit": limit,
+        }
+
+    def _block_starts(self, path: Path) -> list[int]:
+        key = str(path)
+        fingerprint = file_fingerprint([path])
+        cached = self.block_index_cache.get(key, fingerprint)
+        if cached is not None:
+            return cached
+        starts = scan_block_starts(path)
+        self.block_index_cache.put(key, fingerprint, starts)
+        return starts
+
+    def uses_graph(self, name: str) -> UsesGraph | None:
+        """Return the pack's example -> knowledge `uses:` graph (and its reverse).
+
+        Cached per pack; any added, removed or modified example file rebuilds it.
+        """
+        engram_dir = self._resolve_engram_dir(name)
+        if engram_dir is None:
+            return None
+        files = example_files(engram_dir)
+        member = self._lower_member(engram_dir)
+        fingerprint = file_fingerprint(files + ([member[0].path] if member else []))
+        cached = self.uses_graph_cache.get(engram_dir, fingerprint)
+        if cached is not None:
+            return cached
+        bundle = self._pack_bundle(engram_dir)
+        if member is not None:
+            graph = self._layered_uses_graph(engram_dir, member[0], files)
+        elif bundle is not None and bundle.covers_examples(engram_dir):
+            graph = graph_from_forward(bundle.uses)
+        else:
+            graph = build_uses_graph(engram_dir, files)
+        self.uses_graph_cache.put(engram_dir, fingerprint, graph)
+        return graph
+
+    def _layered_uses_graph(
+        self, engram_dir: Path, layer: PackLayer, files: list[Path]
+    ) -> UsesGraph:
+        # 上层中的案例覆盖下层中的同名文件
+        forward = dict(build_uses_graph(engram_dir, files).forward)
+        shadowed = {path.relative_to(engram_dir).as_posix() for path in files}
+        for relative in layer.files("examples"):
+            if not relative.endswith(".md") or relative.endswith("/_index.md"):
+                continue
+            if relative in shadowed:
+                continue
+            data = layer.read(relative)
+            refs = example_refs(engram_dir, data.decode("utf-8", errors="replace")) if data else []
+            if refs:
+                forward[relative] = refs
+        return graph_from_forward(dict(sorted(forward.items())))
+
+    def related_files(self, name: str, filepath: str) -> list[str]:
+        """Knowledge files an example uses, or the examples that use a knowledge file."""
+        graph = self.uses_graph(name)
+        if graph is None:
+            return []
+        return graph.related(Path(filepath).as_posix())
+
+    def list_sections(self, name: str, filepath: str) -> list[Section] | None:
+        """Return the heading sections of a markdown file, cached by (mtime_ns, size)."""
+        target = self._resolve_file(name, filepath)
+        if target is None or (not target.is_file() and self._lower_size(target) < 0):
+            return None
+        return self._file_sections(target)
+
+    @timed("loader.load_section")
+    def load_section(self, name: str, filepath: str, heading: str) -> str | None:
+        """Return only the slice of a file under one heading (None when not found)."""
+        target = self._resolve_file(name, filepath)
+        if target is None or (not target.is_file() and self._lower_size(target) < 0):
+            return None
+        section = find_section(self._file_sections(target), heading)
+        if section is None:
+            return None
+        bundled = self._read_bundled(target)
+        if bundled is None and not target.is_file():
+            bundled = self._read_lower(target)
+        if bundled is not None:
+            return bundled[section.start : section.end].decode("utf-8", errors="replace")
+        try:
+            return read_section(target, section)
+        except OSError:
+            return None
+
+    def section_outline(self, name: str) -> dict[str, list[str]]:
+        """Map each knowledge/examples file to its level-2..3 heading titles."""
+        engram_dir = self._resolve_engram_dir(name)
+        if engram_dir is None:
+            return {}
+        files: dict[str, Path] = {}
+        member = self._lower_member(engram_dir)
+        for subdir in ("knowledge", "examples"):
+            base = engram_dir / subdir
+            if base.is_dir():
+                for path in base.rglob("*.md"):
+                    files[path.relative_to(engram_dir).as_posix()] = path
+            if member is not None:
+                for relative in member[0].files(subdir):
+                    if relative.endswith(".md"):
+                        files.setdefault(relative, engram_dir / relative)
+
+        outline: dict[str, list[str]] = {}
+        for relative, path in sorted(files.items()):
+            if path.name == "_index.md":
+                continue
+            titles = [
+                section.title
+                for section in self._file_sections(path)
+                if 2 <= section.level <= _OUTLINE_MAX_LEVEL
+            ]
+            if titles:
+                outline[relative] = titles
+        return outline
+
+    def _file_sections(self, path: Path) -> list[Section]:
+        key = str(path)
+        member = None if path.is_file() else self._lower_member(path)
+        fingerprint = file_fingerprint([path] if member is None else [path, member[0].path])
+        cached = self.section_cache.get(key, fingerprint)
+        if cached is not None:
+            return cached
+        located = self._bundle_for(path)
+        entry = located[0].fresh_entry(located[1], path) if located else None
+        if entry is not None:
+            sections = list(entry.sections)
+        elif member is not None:
+            data = member[0].read(member[1])
+            sections = parse_sections(data) if data is not None else []
+        else:
+            try:
+                sections = parse_sections(path.read_bytes())
+            except OSError:
+                return []
+        self.section_cache.put(key, fingerprint, sections)
+        return sections
+
+    def compile_bundle(self, name: str) -> dict[str, Any] | None:
+        """Write the pack's single-file bundle (see bundle.compile_bundle)."""
+        engram_dir = self._resolve_engram_dir(name)
+        if engram_dir is None:
+            return None
+        report = compile_bundle(engram_dir)
+        with self._bundles_lock:
+            self._bundles.pop(engram_dir, None)
+        return report
+
+    def _pack_bundle(self, engram_dir: Path) -> PackBundle | None:
+        """Open (and keep mapped) the pack's bundle; reopened when the file changes."""
+        stamp = file_fingerprint([engram_dir / BUNDLE_FILENAME])
+        with self._bundles_lock:
+            cached = self._bundles.get(engram_dir)
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+        # 旧映射不主动关闭：其他线程可能仍在读取，随引用释放自动回收
+        bundle = PackBundle.open(engram_dir / BUNDLE_FILENAME) if stamp[0][1] is not None else None
+        with self._bundles_lock:
+            self._bundles[engram_dir] = (stamp, bundle)
+        return bundle
+
+    def _bundle_for(self, path: Path) -> tuple[PackBundle, str] | None:
+        """Locate the bundle of the pack containing `path` and the path's key in it."""
+        for packs_root in self.packs_dirs:
+            try:
+                parts = path.relative_to(packs_root).parts
+            except ValueError:
+                continue
+            if len(parts) < 2:
+                return None
+            bundle = self._pack_bundle(packs_root / parts[0])
+            if bundle is None:
+                return None
+            return bundle, Path(*parts[1:]).as_posix()
+        return None
+
+    def _read_bundled(self, path: Path) -> bytes | None:
+        """Bytes of `path` from its pack bundle, or None when absent or stale."""
+        located = self._bundle_for(path)
+        if located is None:
+            return None
+        bundle, relative = located
+        return bundle.read(relative, path)
 
     def list_files(self, name: str, subdir: str) -> list[str]:
         target = self._resolve_file(name, subdir)
-        if target is None or not target.is_dir():
+        if target is None:
             return []
 
+        found: set[str] = set()
+        if target.is_dir():
+            with self.tracer.span("scandir", target):
+                found.update(
+                    path.name
+                    for path in target.iterdir()
+                    if path.is_file() and path.suffix == ".md"
+                )
+        member = self._lower_member(target)
+        if member is not None:
+            found.update(item for item in member[0].list_dir(member[1]) if item.endswith(".md"))
+
         base = Path(subdir)
-        names = [
-            str((base / path.name).as_posix())
-            for path in sorted(target.iterdir(), key=lambda p: p.name)
-            if path.is_file() and path.suffix == ".md"
-        ]
-        return names
+        return [str((base / item).as_posix()) for item in sorted(found)]
+
+    @timed("loader.load_engram_base")
+    def load_engram_base(
+        self, name: str, *, query: str = "", max_tokens: int | None = None
+    ) -> str | None:
+        """Assemble role/workflow/rules, indexes and memory of a pack.
+
+        With `max_tokens`, knowledge/example index entries are ranked against
+        `query` and trimmed to fit the estimated budget (see context_budget).
+        """
+        sections = self.load_engram_sections(name)
+        if sections is None:
+            return None
+        if max_tokens is not None:
+            return fit_to_budget(sections, query, max_tokens)
+        return "\n\n".join(text for _, text in sections)
+
+    def load_engram_sections(self, name: str) -> list[tuple[str, str]] | None:
+        """Return the `(key, text)` sections load_engram_base emits, served from cache."""
+        engram_dir = self._resolve_engram_dir(name)
+        if engram_dir is None:
+            return None
+
+        with self.tracer.span("load_engram_base", engram_dir):
+            # 动态记忆：物化积压写入、按水位线调度过期归档（须在计算指纹前完成）
+            memory_dir = engram_dir / "memory"
+            if memory_dir.is_dir():
+                self._maintain_memory_dir(memory_dir)
+            global_memory_dir = self._global_memory_dir()
+            self._maintain_memory_dir(global_memory_dir)
+
+            # 过期过滤依赖当天日期，一并纳入指纹
+            today = datetime.now(timezone.utc).date().isoformat()
+            with self.tracer.span("stat", engram_dir):
+                stamps = file_fingerprint(
+                    self._base_source_paths(name, engram_dir, global_memory_dir)
+                )
+            fingerprint = (today, stamps)
+            cached = self.context_cache.get(name, fingerprint)
+            if cached is not None:
+                return list(cached)
+
+            with self.tracer.span("load_engram_base.assemble", engram_dir):
+                sections = self._engram_base_sections(name, engram_dir, global_memory_dir)
+            self.context_cache.put(name, fingerprint, tuple(sections))
+            return sections
+
+    def context_cache_stats(self) -> dict[str, int]:
+        """Return hit/miss counters of the assembled-context cache."""
+        return self.context_cache.stats()
+
+    def _base_source_paths(
+        self, name: str, engram_dir: Path, global_memory_dir: Path
+    ) -> list[Path]:
+        """List every file whose content feeds load_engram_base for one pack."""
+        memory_dir = engram_dir / "memory"
+        paths = [engram_dir / filename for filename in _BASE_SECTIONS.values()]
+        paths.extend(
+            [
+                engram_dir / "meta.json",
+                engram_dir / "knowledge" / "_index.md",
+                engram_dir / "examples" / "_index.md",
+                memory_dir,
+                memory_dir / "_index.md",
+                memory_dir / "_onboarded",
+                global_memory_dir / "_index.md",
+            ]
+        )
+        paths.extend(self._extends_watch_paths(engram_dir, self.extends_chain(name)))
+        return paths
 
-    def load_engram_base(self, name: str) -> str | None:
+    def extends_chain(self, name: str) -> ExtendsChain:
+        """Resolve the full `extends` chain of a pack, nearest ancestor first."""
+        return resolve_extends(name, self.get_engram_info(name), self._lookup_pack)
+
+    def _lookup_pack(self, name: str) -> tuple[Path, dict[str, Any] | None] | None:
         engram_dir = self._resolve_engram_dir(name)
         if engram_dir is None:
             return None
+        return engram_dir, self.get_engram_info(name)
+
+    def _extends_watch_paths(self, engram_dir: Path, chain: ExtendsChain) -> list[Path]:
+        """Files whose change alters the inherited sections of one pack."""
+        paths = [engram_dir / "meta.json", engram_dir / "knowledge" / "_index.md"]
+        paths.extend(self._lower_paths(engram_dir))
+        for _, ancestor_dir in chain.ancestors:
+            paths.append(ancestor_dir / "meta.json")
+            paths.append(ancestor_dir / "knowledge" / "_index.md")
+            paths.extend(self._lower_paths(ancestor_dir))
+        # 父级暂不存在时也要盯住它将来出现的位置
+        if chain.missing and self._is_plain_name(chain.missing):
+            paths.extend(root / chain.missing / "meta.json" for root in self.packs_dirs)
+        return paths
+
+    def _inherited_sections(self, name: str, engram_dir: Path) -> tuple[tuple[str, str], ...]:
+        """Inherited knowledge index sections, deduplicated and memoized per chain."""
+        chain = self.extends_chain(name)
+        if not chain.ancestors and not chain.cycle:
+            return ()
+        with self.tracer.span("stat", engram_dir):
+            fingerprint = file_fingerprint(self._extends_watch_paths(engram_dir, chain))
+        cached = self.inheritance_cache.get(engram_dir, fingerprint)
+        if cached is not None:
+            return cached
+
+        # 与自身及更近祖先完全相同的索引行只保留一次
+        seen = index_entry_lines(self.load_file(name, "knowledge/_index.md") or "")
+        sections: list[tuple[str, str]] = []
+        for ancestor, _ in chain.ancestors:
+            text = dedupe_index_lines(self.load_file(ancestor, "knowledge/_index.md") or "", seen)
+            if text:
+                sections.append(
+                    ("inherited_knowledge", f"## 继承知识索引（来自 {ancestor}）\n{text}")
+                )
+        if chain.cycle:
+            sections.append(
+                (
+                    "extends_warning",
+                    f"## 继承告警\n⚠️ extends 存在循环引用：{' → '.join(chain.cycle)}，"
+                    "已在循环处停止继承。",
+                )
+            )
+        result = tuple(sections)
+        self.inheritance_cache.put(engram_dir, fingerprint, result)
+        return result
 
-        sections: list[str] = []
+    def _engram_base_sections(
+        self, name: str, engram_dir: Path, global_memory_dir: Path
+    ) -> list[tuple[str, str]]:
+        sections: list[tuple[str, str]] = []
 
         role = self._render_section(name, "角色", "role")
         if role:
-            sections.append(role)
+            sections.append(("role", role))
 
         workflow = self._render_section(name, "工作流程", "workflow")
         if workflow:
-            sections.append(workflow)
+            sections.append(("workflow", workflow))
 
         rules_content = self.load_file(name, "rules.md") or ""
         rules = self._render_section(name, "规则", "rules")
         if rules:
-            sections.append(rules)
-
-        # Engram 继承：合并父 Engram 的 knowledge index
-        meta = self.get_engram_info(name) or {}
-        parent_name = meta.get("extends")
-        if parent_name and self._resolve_engram_dir(parent_name):
-            parent_knowledge = self.load_file(parent_name, "knowledge/_index.md")
-            if parent_knowledge and parent_knowledge.strip():
-                sections.append(
-                    f"## 继承知识索引（来自 {parent_name}）\n{parent_knowledge.strip()}"
-                )
+            sections.append(("rules", rules))
+
+        # Engram 继承：按继承链合并各祖先的 knowledge index（最近的父级在前）
+        sections.extend(self._inherited_sections(name, engram_dir))
 
         knowledge_index = self.load_file(name, "knowledge/_index.md")
         if knowledge_index and knowledge_index.strip():
-            sections.append(f"## 知识索引\n{knowledge_index.strip()}")
+            sections.append(("knowledge", f"## 知识索引\n{knowledge_index.strip()}"))
 
         examples_index = self.load_file(name, "examples/_index.md")
         if examples_index and examples_index.strip():
-            sections.append(f"## 案例索引\n{examples_index.strip()}")
+            sections.append(("examples", f"## 案例索引\n{examples_index.strip()}"))
 
-        # 动态记忆：归档并过滤已过期条目
-        memory_dir = engram_dir / "memory"
-        if memory_dir.is_dir():
-            self._archive_expired_entries(memory_dir)
+        # 动态记忆：过滤已过期条目
         memory_index = self.load_file(name, "memory/_index.md")
         if memory_index and memory_index.strip():
             active_lines = [
@@ -172,16 +758,16 @@ class EngramLoader:
                     if entry_count >= _CONSOLIDATE_HINT_THRESHOLD else ""
                 )
                 sections.append(
-                    f"## 动态记忆\n<memory>\n{active_content}\n</memory>{hint}"
+                    ("memory", f"## 动态记忆\n<memory>\n{active_content}\n</memory>{hint}")
                 )
 
         # 全局用户记忆
-        global_memory_dir = self._global_memory_dir()
-        self._archive_expired_entries(global_memory_dir)
         global_index_file = global_memory_dir / "_index.md"
         if global_index_file.is_file():
             try:
-                global_index = global_index_file.read_text(encoding="utf-8")
+                with self.tracer.span("read", global_index_file) as span:
+                    global_index = global_index_file.read_text(encoding="utf-8")
+                    span.record(global_index)
             except OSError:
                 global_index = ""
             if global_index.strip():
@@ -191,20 +777,21 @@ class EngramLoader:
                 ]
                 if active_global:
                     sections.append(
-                        f"## 全局用户记忆\n<global_memory>\n"
-                        f"{''.join(active_global).strip()}\n</global_memory>"
+                        (
+                            "global_memory",
+                            f"## 全局用户记忆\n<global_memory>\n"
+                            f"{''.join(active_global).strip()}\n</global_memory>",
+                        )
                     )
 
         # 冷启动引导
         onboarding = self._get_onboarding_prompt(name, rules_content)
         if onboarding:
-            sections.append(onboarding)
-
-        if not sections:
-            return ""
+            sections.append(("onboarding", onboarding))
 
-        return "\n\n".join(sections)
+        return sections
 
+    @timed("loader.write_file")
     def write_file(
         self, name: str, relative_path: str, content: str, *, append: bool = False
     ) -> bool:
@@ -225,14 +812,32 @@ class EngramLoader:
         target.parent.mkdir(parents=True, exist_ok=True)
         try:
             if append:
-                with target.open("a", encoding="utf-8") as f:
+                self._copy_up(target)
+                with self.tracer.span("append", target) as span, target.open(
+                    "a", encoding="utf-8"
+                ) as f:
                     f.write(content)
+                    span.record(content)
             else:
-                target.write_text(content, encoding="utf-8")
+                with self.tracer.span("write", target) as span:
+                    target.write_text(content, encoding="utf-8")
+                    span.record(content)
         except OSError:
             return False
+        if target == engram_dir / "meta.json":
+            self.catalog.invalidate(name)
+        elif target == engram_dir / "memory" / FULL_INDEX_FILENAME:
+            # 手工改写完整索引：丢弃日志，下次访问时以新索引重新初始化
+            self._memory_log(target.parent).reset()
+        elif target.parent == engram_dir / "memory" and target.name in {
+            LOG_FILENAME, STATE_FILENAME,
+        }:
+            self._memory_log(target.parent).forget()
+        else:
+            self._update_knowledge_index(engram_dir, target)
         return True
 
+    @timed("loader.capture_memory")
     def capture_memory(
         self,
         name: str,
@@ -252,23 +857,120 @@ class EngramLoader:
         Duplicate content within throttle_seconds is silently skipped (returns True).
         When is_global=True, writes to the shared _global/memory/ directory.
         """
+        if self._is_throttled(name, category, content, throttle_seconds):
+            return True
+
+        memory_dir = self._capture_memory_dir(name, is_global)
+        if memory_dir is None:
+            return False
+
+        entry = self._format_memory_entry(
+            content, category, summary,
+            memory_type=memory_type,
+            tags=tags,
+            conversation_id=conversation_id,
+            expires=expires,
+        )
+        if not self._write_memory_entries(memory_dir, [entry]):
+            return False
+        if not is_global:
+            self._mark_onboarded(memory_dir)
+        return True
+
+    @timed("loader.capture_memories")
+    def capture_memories(
+        self,
+        name: str,
+        entries: list[dict[str, Any]],
+        *,
+        throttle_seconds: int = 30,
+        materialize: bool = True,
+    ) -> list[bool]:
+        """Capture many memory entries in one pass.
+
+        Each entry is a dict with content/category/summary and the optional
+        capture_memory keywords (memory_type, tags, conversation_id, expires,
+        is_global). Entries are appended with one write per category file, one
+        memory-log append and one _index_full.md append per memory dir, followed by
+        a single hot-index rebuild (deferred like capture_memory when materialize is
+        False). Returns one success flag per entry.
+        """
+        results = [False] * len(entries)
+        batches: dict[Path, tuple[bool, list[int], list[dict[str, Any]]]] = {}
+        for position, item in enumerate(entries):
+            if not isinstance(item, dict):
+                continue
+            content = item.get("content")
+            category = item.get("category")
+            summary = item.get("summary")
+            if not all(isinstance(v, str) and v.strip() for v in (content, category, summary)):
+                continue
+            if self._is_throttled(name, category, content, throttle_seconds):
+                results[position] = True
+                continue
+
+            is_global = bool(item.get("is_global", False))
+            memory_dir = self._capture_memory_dir(name, is_global)
+            if memory_dir is None:
+                continue
+            tags = item.get("tags")
+            entry = self._format_memory_entry(
+                content, category, summary,
+                memory_type=str(item.get("memory_type") or "general"),
+                tags=[str(t) for t in tags] if isinstance(tags, list) else None,
+                conversation_id=item.get("conversation_id") or None,
+                expires=item.get("expires") or None,
+            )
+            batch = batches.setdefault(memory_dir, (is_global, [], []))
+            batch[1].append(position)
+            batch[2].append(entry)
+
+        for memory_dir, (is_global, positions, batch_entries) in batches.items():
+            if not self._write_memory_entries(
+                memory_dir, batch_entries, materialize=materialize
+            ):
+                continue
+            for position in positions:
+                results[position] = True
+            if not is_global:
+                self._mark_onboarded(memory_dir)
+        return results
+
+    def _is_throttled(
+        self, name: str, category: str, content: str, throttle_seconds: int
+    ) -> bool:
         throttle_key = f"{name}:{category}:{content[:120]}"
         now = time.monotonic()
         if throttle_key in self._throttle_cache:
             if now - self._throttle_cache[throttle_key] < throttle_seconds:
                 return True
         self._throttle_cache[throttle_key] = now
+        return False
 
+    def _capture_memory_dir(self, name: str, is_global: bool) -> Path | None:
         if is_global:
-            memory_dir = self._global_memory_dir()
-        else:
-            engram_dir = self._resolve_engram_dir(name)
-            if engram_dir is None:
-                return False
-            memory_dir = engram_dir / "memory"
-            memory_dir.mkdir(parents=True, exist_ok=True)
+            return self._global_memory_dir()
+        engram_dir = self._resolve_engram_dir(name)
+        if engram_dir is None:
+            return None
+        memory_dir = engram_dir / "memory"
+        memory_dir.mkdir(parents=True, exist_ok=True)
+        return memory_dir
 
+    @staticmethod
+    def _format_memory_entry(
+        content: str,
+        category: str,
+        summary: str,
+        *,
+        memory_type: str = "general",
+        tags: list[str] | None = None,
+        conversation_id: str | None = None,
+        expires: str | None = None,
+    ) -> dict[str, Any]:
+        """Build the category-file block and index line of one new memory entry."""
         ts = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M")
+        entry_id = new_entry_id()
 
         meta_parts = [f"[{ts}]", f"type:{memory_type}"]
         if expires:
@@ -277,52 +979,96 @@ class EngramLoader:
             meta_parts.append(f"tags:{','.join(tags)}")
         if conversation_id:
             meta_parts.append(f"conv:{conversation_id}")
+        meta_parts.append(f"id:{entry_id}")
         meta_line = " ".join(meta_parts)
 
-        entry = f"\n---\n{meta_line}\n{content.strip()}\n"
-        category_file = memory_dir / f"{category}.md"
-        try:
-            with category_file.open("a", encoding="utf-8") as f:
-                f.write(entry)
-        except OSError:
-            return False
-
-        # 首次记忆写入后标记 onboarding 完成
-        if not is_global:
-            onboarded_marker = memory_dir / "_onboarded"
-            if not onboarded_marker.exists():
-                try:
-                    onboarded_marker.touch()
-                except OSError:
-                    pass
-
         expires_str = f" expires:{expires}" if expires else ""
         tag_str = f" [{','.join(tags)}]" if tags else ""
         index_line = (
             f"- `memory/{category}.md` [{ts}] [{memory_type}]{expires_str}{tag_str}"
-            f" {summary.strip()}\n"
+            f" {summary.strip()} (id:{entry_id})"
         )
+        return {
+            "id": entry_id,
+            "category": category,
+            "block": f"\n---\n{meta_line}\n{content.strip()}\n".encode("utf-8"),
+            "line": index_line,
+        }
 
-        # 分层 index：追加到 _index_full.md，重建 _index.md（热层）
-        full_index = memory_dir / "_index_full.md"
-        hot_index = memory_dir / "_index.md"
+    def _write_memory_entries(
+        self,
+        memory_dir: Path,
+        entries: list[dict[str, Any]],
+        *,
+        materialize: bool = False,
+    ) -> bool:
+        """Append formatted entries: one write per category file, one log append.
 
-        # 迁移：若 _index_full.md 不存在但 _index.md 存在，以其为初始内容
-        if not full_index.is_file() and hot_index.is_file():
+        The memory log is the index source of truth (legacy data is migrated on first
+        access); _index_full.md only gets the new lines appended and the hot
+        _index.md is materialized lazily unless `materialize` is set. The log lock is
+        held so background archival never rewrites a category file mid-append.
+        """
+        by_category: dict[str, list[dict[str, Any]]] = {}
+        for entry in entries:
+            by_category.setdefault(entry["category"], []).append(entry)
+
+        memory_log = self._memory_log(memory_dir)
+        with memory_log.lock:
+            records: list[dict[str, Any]] = []
+            for category, items in by_category.items():
+                category_file = memory_dir / f"{category}.md"
+                try:
+                    with self.tracer.span("append", category_file) as span, category_file.open(
+                        "ab"
+                    ) as f:
+                        offset = f.seek(0, os.SEEK_END)
+                        payload = b"".join(item["block"] for item in items)
+                        f.write(payload)
+                        span.record(payload)
+                except OSError:
+                    return False
+                for item in items:
+                    records.append(
+                        {
+                            "op": "add",
+                            "id": item["id"],
+                            "line": item["line"],
+                            "category": category,
+                            "at": offset,
+                            "len": len(item["block"]),
+                        }
+                    )
+                    offset += len(item["block"])
+
+            if not memory_log.append(records):
+                return False
+            full_index = memory_dir / FULL_INDEX_FILENAME
             try:
-                full_index.write_text(hot_index.read_text(encoding="utf-8"), encoding="utf-8")
+                with self.tracer.span("append", full_index) as span, full_index.open(
+                    "a", encoding="utf-8"
+                ) as f:
+                    lines = "".join(f"{record['line']}\n" for record in records)
+                    f.write(lines)
+                    span.record(lines)
             except OSError:
-                pass
-
-        try:
-            with full_index.open("a", encoding="utf-8") as f:
-                f.write(index_line)
-        except OSError:
-            return False
+                return False
 
-        self._rebuild_hot_index(memory_dir)
+            if materialize or memory_log.pending_writes >= _INDEX_FLUSH_WRITES:
+                memory_log.materialize()
         return True
 
+    @staticmethod
+    def _mark_onboarded(memory_dir: Path) -> None:
+        # 首次记忆写入后标记 onboarding 完成
+        onboarded_marker = memory_dir / "_onboarded"
+        if not onboarded_marker.exists():
+            try:
+                onboarded_marker.touch()
+            except OSError:
+                pass
+
+    @timed("loader.consolidate_memory")
     def consolidate_memory(
         self,
         name: str,
@@ -338,56 +1084,54 @@ class EngramLoader:
         memory_dir = engram_dir / "memory"
         category_file = memory_dir / f"{category}.md"
         archive_file = memory_dir / f"{category}-archive.md"
-        full_index = memory_dir / "_index_full.md"
-        hot_index = memory_dir / "_index.md"
 
         ts = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M")
+        entry_id = new_entry_id()
 
-        # 1. Archive existing raw entries
-        if category_file.is_file():
-            try:
-                existing = category_file.read_text(encoding="utf-8")
-                with archive_file.open("a", encoding="utf-8") as f:
-                    f.write(f"\n\n# 归档于 {ts}\n{existing}")
-            except OSError:
-                return False
-
-        # 2. Write consolidated content
-        try:
-            category_file.write_text(
-                f"\n---\n[{ts}] type:consolidated\n{consolidated_content.strip()}\n",
-                encoding="utf-8",
-            )
-        except OSError:
-            return False
-
-        # 3. Update _index_full.md（迁移兼容）
-        new_line = f"- `memory/{category}.md` [{ts}] [consolidated] {summary.strip()}\n"
-        if not full_index.is_file() and hot_index.is_file():
-            try:
-                full_index.write_text(hot_index.read_text(encoding="utf-8"), encoding="utf-8")
-            except OSError:
-                pass
+        memory_log = self._memory_log(memory_dir)
+        with memory_log.lock:
+            # 1. Archive existing raw entries
+            if category_file.is_file():
+                try:
+                    with self.tracer.span("read", category_file) as span:
+                        existing = category_file.read_text(encoding="utf-8")
+                        span.record(existing)
+                    archived = f"\n\n# 归档于 {ts}\n{existing}"
+                    with self.tracer.span("append", archive_file) as span, archive_file.open(
+                        "a", encoding="utf-8"
+                    ) as f:
+                        f.write(archived)
+                        span.record(archived)
+                except OSError:
+                    return False
 
-        if full_index.is_file():
-            try:
-                lines = full_index.read_text(encoding="utf-8").splitlines(keepends=True)
-            except OSError:
-                return False
-            filtered = [l for l in lines if f"`memory/{category}.md`" not in l]
-            filtered.append(new_line)
-            try:
-                full_index.write_text("".join(filtered), encoding="utf-8")
-            except OSError:
-                return False
-        else:
+            # 2. Write consolidated content
+            block = (
+                f"\n---\n[{ts}] type:consolidated id:{entry_id}\n"
+                f"{consolidated_content.strip()}\n"
+            ).encode("utf-8")
             try:
                 memory_dir.mkdir(parents=True, exist_ok=True)
-                full_index.write_text(new_line, encoding="utf-8")
+                category_file.write_bytes(block)
             except OSError:
                 return False
 
-        self._rebuild_hot_index(memory_dir)
+            # 3. 日志中整类作废并追加压缩条目，随后物化索引
+            new_line = (
+                f"- `memory/{category}.md` [{ts}] [consolidated] {summary.strip()}"
+                f" (id:{entry_id})"
+            )
+            add_record = {
+                "op": "add",
+                "id": entry_id,
+                "line": new_line,
+                "category": category,
+                "at": 0,
+                "len": len(block),
+            }
+            if not memory_log.append([{"op": "drop", "category": category}, add_record]):
+                return False
+            memory_log.materialize()
         return True
 
     def capture_tool_trace(
@@ -404,12 +1148,60 @@ class EngramLoader:
         conversation_id: str | None = None,
     ) -> bool:
         """Capture one structured tool trace into memory/tool-trace.md."""
+        entry = self._format_tool_trace(
+            tool_name,
+            intent,
+            result_summary,
+            args_summary=args_summary,
+            status=status,
+            summary=summary,
+            tags=tags,
+            conversation_id=conversation_id,
+        )
+        if entry is None:
+            return False
+        return self.capture_memory(
+            name=name,
+            content=entry["content"],
+            category=entry["category"],
+            summary=entry["summary"],
+            memory_type=entry["memory_type"],
+            tags=entry["tags"],
+            conversation_id=entry["conversation_id"],
+            throttle_seconds=5,
+        )
+
+    def capture_tool_traces(self, name: str, traces: list[dict[str, Any]]) -> list[bool]:
+        """Capture a group of tool traces (capture_tool_trace keyword dicts) in one pass."""
+        entries: list[dict[str, Any] | None] = [
+            self._format_tool_trace(**trace) if isinstance(trace, dict) else None
+            for trace in traces
+        ]
+        valid = [entry for entry in entries if entry is not None]
+        written = iter(
+            self.capture_memories(name, valid, throttle_seconds=5, materialize=False)
+        )
+        return [next(written) if entry is not None else False for entry in entries]
+
+    @staticmethod
+    def _format_tool_trace(
+        tool_name: str,
+        intent: str,
+        result_summary: str,
+        *,
+        args_summary: str | None = None,
+        status: str = "ok",
+        summary: str | None = None,
+        tags: list[str] | None = None,
+        conversation_id: str | None = None,
+    ) -> dict[str, Any] | None:
+        """Build the capture_memories entry for one tool trace (None when invalid)."""
         normalized_tool = tool_name.strip()
         normalized_intent = intent.strip()
         normalized_result = result_summary.strip()
         normalized_status = status.strip().lower() if status else "ok"
         if not normalized_tool or not normalized_intent or not normalized_result:
-            return False
+            return None
         if not normalized_status:
             normalized_status = "ok"
 
@@ -438,16 +1230,14 @@ class EngramLoader:
             if summary and summary.strip()
             else f"{normalized_tool} [{normalized_status}] {normalized_intent}"
         )
-        return self.capture_memory(
-            name=name,
-            content="\n".join(content_lines),
-            category="tool-trace",
-            summary=index_summary,
-            memory_type="tool_trace",
-            tags=deduped_tags,
-            conversation_id=conversation_id,
-            throttle_seconds=5,
-        )
+        return {
+            "content": "\n".join(content_lines),
+            "category": "tool-trace",
+            "summary": index_summary,
+            "memory_type": "tool_trace",
+            "tags": deduped_tags,
+            "conversation_id": conversation_id,
+        }
 
     def list_recent_memory_summaries(
         self,
@@ -467,75 +1257,58 @@ class EngramLoader:
         memory_dir = engram_dir / "memory"
         if not memory_dir.is_dir():
             return []
-        self._archive_expired_entries(memory_dir)
-
-        index_file = self._pick_memory_index_source(memory_dir)
-        if index_file is None:
-            return []
-
-        try:
-            lines = index_file.read_text(encoding="utf-8").splitlines()
-        except OSError:
-            return []
+        self._maintain_memory_dir(memory_dir)
 
         needle = f"`memory/{category}.md`"
-        matched = [line for line in lines if needle in line and not self._is_expired(line)]
-        return matched[-limit:]
-
-    def delete_memory(self, name: str, category: str, summary: str) -> bool:
-        """Delete a specific memory entry by matching its summary in the index.
+        matched: list[str] = []
+        for entry in reversed(self._memory_log(memory_dir).entries()):
+            if needle in entry.line and not self._is_expired(entry.line):
+                matched.append(entry.line)
+                if len(matched) >= limit:
+                    break
+        matched.reverse()
+        return matched
+
+    @timed("loader.delete_memory")
+    def delete_memory(
+        self,
+        name: str,
+        category: str,
+        summary: str = "",
+        *,
+        entry_id: str | None = None,
+    ) -> bool:
+        """Delete a specific memory entry by its id or by matching its summary.
 
-        Removes the matching line from _index_full.md/_index.md and the corresponding entry
-        from memory/{category}.md (matched by timestamp).
+        Appends a tombstone to the memory log, refreshes the index views and splices
+        the entry's block out of memory/{category}.md using the recorded offset
+        (full-file scan only when the offset is stale or the entry predates ids).
+        An empty category is accepted together with entry_id.
         """
         engram_dir = self._resolve_engram_dir(name)
         if engram_dir is None:
             return False
 
         memory_dir = engram_dir / "memory"
-        index_file = self._pick_memory_index_source(memory_dir)
-        category_file = memory_dir / f"{category}.md"
-
-        if index_file is None:
-            return False
-
-        try:
-            index_lines = index_file.read_text(encoding="utf-8").splitlines(keepends=True)
-        except OSError:
-            return False
-
-        target_line = None
-        target_ts = None
-        for line in index_lines:
-            if f"`memory/{category}.md`" in line and summary.strip() in line:
-                target_line = line
-                m = re.search(r"\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2})\]", line)
-                if m:
-                    target_ts = m.group(1)
-                break
-
-        if target_line is None:
-            return False
-
-        new_lines = [l for l in index_lines if l != target_line]
-        try:
-            index_file.write_text("".join(new_lines), encoding="utf-8")
-        except OSError:
+        if not memory_dir.is_dir():
             return False
-        if index_file.name == "_index_full.md":
-            self._rebuild_hot_index(memory_dir)
-
-        if target_ts and category_file.is_file():
-            try:
-                content = category_file.read_text(encoding="utf-8")
-                parts = content.split("\n---\n")
-                new_parts = [p for p in parts if target_ts not in p]
-                category_file.write_text("\n---\n".join(new_parts), encoding="utf-8")
-            except OSError:
-                pass  # index already updated; best-effort on category file
+        memory_log = self._memory_log(memory_dir)
+        with memory_log.lock:
+            target = self._find_memory_entry(memory_log, category, summary, entry_id)
+            if target is None:
+                return False
 
+            # 先按偏移剪除正文块（tombstone 会一并丢弃偏移），再追加删除记录
+            self._replace_memory_block(
+                memory_log, memory_dir, target.category, target.id,
+                target.parsed["timestamp"], None,
+            )
+            if not memory_log.append([{"op": "del", "id": target.id}]):
+                return False
+            memory_log.materialize()
         return True
 
+    @timed("loader.correct_memory")
     def correct_memory(
         self,
         name: str,
@@ -546,76 +1319,158 @@ class EngramLoader:
         *,
         memory_type: str = "general",
         tags: list[str] | None = None,
+        entry_id: str | None = None,
     ) -> bool:
         """Replace an existing memory entry with corrected content.
 
-        Finds the entry by old_summary in _index_full.md/_index.md, updates the index line
-        and replaces the raw content in memory/{category}.md.
+        Finds the entry by entry_id or old_summary, appends a replacement record to
+        the memory log and splices the new content into memory/{category}.md.
         """
         engram_dir = self._resolve_engram_dir(name)
         if engram_dir is None:
             return False
 
         memory_dir = engram_dir / "memory"
-        index_file = self._pick_memory_index_source(memory_dir)
+        if not memory_dir.is_dir():
+            return False
+        memory_log = self._memory_log(memory_dir)
+        with memory_log.lock:
+            target = self._find_memory_entry(memory_log, category, old_summary, entry_id)
+            if target is None:
+                return False
+
+            category = target.category
+            ts = target.parsed["timestamp"]
+            tag_str = f" [{','.join(tags)}]" if tags else ""
+            new_index_line = (
+                f"- `memory/{category}.md` [{ts}] [{memory_type}]{tag_str}"
+                f" {new_summary.strip()} (id:{target.id})"
+            )
+            if not memory_log.append([{"op": "put", "id": target.id, "line": new_index_line}]):
+                return False
+            memory_log.materialize()
+
+            meta_parts = [f"[{ts}]", f"type:{memory_type}"]
+            if tags:
+                meta_parts.append(f"tags:{','.join(tags)}")
+            meta_parts.append(f"id:{target.id}")
+            meta_line = " ".join(meta_parts)
+            self._replace_memory_block(
+                memory_log, memory_dir, category, target.id, ts,
+                f"{meta_line}\n{new_content.strip()}\n",
+            )
+        return True
+
+    @staticmethod
+    def _find_memory_entry(
+        memory_log: MemoryLog, category: str, summary: str, entry_id: str | None
+    ) -> MemoryEntry | None:
+        """Look an entry up by id (category optional) or by category + summary."""
+        if entry_id:
+            entry = memory_log.get(entry_id.strip())
+            if entry is None or entry.parsed is None:
+                return None
+            if category and entry.category != category:
+                return None
+            return entry
+        if not category or not summary.strip():
+            return None
+        entry = memory_log.find(category, summary)
+        if entry is None or entry.parsed is None:
+            return None
+        return entry
+
+    def _replace_memory_block(
+        self,
+        memory_log: MemoryLog,
+        memory_dir: Path,
+        category: str,
+        entry_id: str,
+        timestamp: str | None,
+        body: str | None,
+    ) -> list[str]:
+        """Replace (body) or remove (None) one entry's block in its category file.
+
+        Uses the offset index from the memory log; falls back to scanning the file
+        when the recorded location is stale, then re-records the category's offsets.
+        Returns the removed block texts.
+        """
         category_file = memory_dir / f"{category}.md"
+        payload = f"\n---\n{body}".encode("utf-8") if body is not None else b""
+        location = memory_log.location(entry_id)
+        if location is not None and location[0] == category:
+            _, offset, length = location
+            old = splice_block(category_file, offset, length, payload, entry_id)
+            if old is not None:
+                memory_log.append(
+                    [
+                        {
+                            "op": "block",
+                            "category": category,
+                            "id": entry_id,
+                            "at": offset,
+                            "old": length,
+                            "new": len(payload),
+                        }
+                    ]
+                )
+                return [old.decode("utf-8").strip().removeprefix("---").strip()]
 
-        if index_file is None:
-            return False
+        # 偏移失效或旧条目（无 id）：整文件扫描，完成后重建该分类的偏移索引
+        removed = self._rewrite_category_block(category_file, entry_id, timestamp, body)
+        if category_file.is_file():
+            memory_log.append(
+                [{"op": "locate", "category": category, "blocks": scan_blocks(category_file)}]
+            )
+        return removed
 
+    def _rewrite_category_block(
+        self,
+        category_file: Path,
+        entry_id: str,
+        timestamp: str | None,
+        replacement: str | None,
+    ) -> list[str]:
+        """Replace (or drop when replacement is None) one block of a category file.
+
+        Blocks are matched by their `id:` marker; legacy blocks without ids fall back
+        to the timestamp match used before entries had stable ids. Returns the
+        removed block texts.
+        """
+        if not category_file.is_file():
+            return []
         try:
-            index_lines = index_file.read_text(encoding="utf-8").splitlines(keepends=True)
+            with self.tracer.span("read", category_file) as span:
+                content = category_file.read_text(encoding="utf-8")
+                span.record(content)
         except OSError:
-            return False
-
-        target_line = None
-        target_ts = None
-        for line in index_lines:
-            if f"`memory/{category}.md`" in line and old_summary.strip() in line:
-                target_line = line
-                m = re.search(r"\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2})\]", line)
-                if m:
-                    target_ts = m.group(1)
-                break
-
-        if target_line is None:
-            return False
-
-        ts = target_ts or datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M")
-        tag_str = f" [{','.join(tags)}]" if tags else ""
-        new_index_line = (
-            f"- `memory/{category}.md` [{ts}] [{memory_type}]{tag_str} {new_summary.strip()}\n"
-        )
-        new_index_lines = [
-            new_index_line if l == target_line else l for l in index_lines
+            return []
+        parts = content.split("\n---\n")
+        id_marker = f" id:{entry_id}"
+        matched = [
+            i for i, part in enumerate(parts)
+            if id_marker in part.strip().split("\n", 1)[0]
         ]
+        if not matched and timestamp:
+            matched = [i for i, part in enumerate(parts) if timestamp in part]
+        if not matched:
+            return []
+        new_parts: list[str] = []
+        for i, part in enumerate(parts):
+            if i not in matched:
+                new_parts.append(part)
+            elif replacement is not None:
+                new_parts.append(replacement)
+        rewritten = "\n---\n".join(new_parts)
         try:
-            index_file.write_text("".join(new_index_lines), encoding="utf-8")
+            with self.tracer.span("write", category_file) as span:
+                category_file.write_text(rewritten, encoding="utf-8")
+                span.record(rewritten)
         except OSError:
-            return False
-        if index_file.name == "_index_full.md":
-            self._rebuild_hot_index(memory_dir)
-
-        if target_ts and category_file.is_file():
-            try:
-                content = category_file.read_text(encoding="utf-8")
-                parts = content.split("\n---\n")
-                new_parts = []
-                for part in parts:
-                    if target_ts in part:
-                        meta_parts = [f"[{ts}]", f"type:{memory_type}"]
-                        if tags:
-                            meta_parts.append(f"tags:{','.join(tags)}")
-                        meta_line = " ".join(meta_parts)
-                        new_parts.append(f"\n{meta_line}\n{new_content.strip()}\n")
-                    else:
-                        new_parts.append(part)
-                category_file.write_text("\n---\n".join(new_parts), encoding="utf-8")
-            except OSError:
-                pass  # index already updated; best-effort on category file
-
-        return True
+            return []  # index already updated; best-effort on category file
+        return [parts[i].strip() for i in matched if parts[i].strip()]
 
+    @timed("loader.add_knowledge")
     def add_knowledge(
         self, name: str, filename: str, content: str, summary: str
     ) -> bool:
@@ -646,13 +1501,18 @@ class EngramLoader:
 
         target.parent.mkdir(parents=True, exist_ok=True)
         try:
-            target.write_text(content, encoding="utf-8")
+            with self.tracer.span("write", target) as span:
+                target.write_text(content, encoding="utf-8")
+                span.record(content)
         except OSError:
             return False
 
         knowledge_root = engram_dir / "knowledge"
         top_index = knowledge_root / "_index.md"
         subdir_index = target.parent / "_index.md"
+        # 分层 pack：先把下层索引复制到上层，再在其上追加
+        self._copy_up(subdir_index)
+        self._copy_up(top_index)
 
         if target.parent != knowledge_root and subdir_index.is_file():
             index_file = subdir_index
@@ -668,13 +1528,55 @@ class EngramLoader:
 
         index_line = f"- `{knowledge_rel.as_posix()}` - {summary.strip()}\n"
         try:
-            with index_file.open("a", encoding="utf-8") as f:
+            with self.tracer.span("append", index_file) as span, index_file.open(
+                "a", encoding="utf-8"
+            ) as f:
                 f.write(index_line)
+                span.record(index_line)
         except OSError:
             return False
 
+        self._update_knowledge_index(engram_dir, target)
         return True
 
+    @timed("loader.search_knowledge")
+    def search_knowledge(
+        self, name: str, query: str, top_k: int = 5
+    ) -> list[dict[str, Any]] | None:
+        """BM25-rank knowledge/ and examples/ files of a pack against a query.
+
+        Returns a list of {path, score, snippet}, or None when the pack is missing.
+        The on-disk index is refreshed incrementally (only changed files are
+        re-tokenized) before searching.
+        """
+        engram_dir = self._resolve_engram_dir(name)
+        if engram_dir is None:
+            return None
+        index = self._knowledge_index(engram_dir)
+        index.refresh()
+        return [
+            {"path": hit.path, "score": hit.score, "snippet": hit.snippet}
+            for hit in index.search(query, top_k)
+        ]
+
+    def _knowledge_index(self, engram_dir: Path) -> KnowledgeIndex:
+        """Return the shared KnowledgeIndex for a pack directory."""
+        with self._knowledge_indexes_lock:
+            index = self._knowledge_indexes.get(engram_dir)
+            if index is None:
+                index = KnowledgeIndex(engram_dir, lower=lambda: self._pack_layer(engram_dir))
+                self._knowledge_indexes[engram_dir] = index
+            return index
+
+    def _update_knowledge_index(self, engram_dir: Path, target: Path) -> None:
+        # 只在索引已建立时增量更新；未建立的包在首次搜索时整体构建
+        if engram_dir not in self._knowledge_indexes and not (
+            engram_dir / INDEX_FILENAME
+        ).is_file():
+            return
+        relative = target.relative_to(engram_dir).as_posix()
+        self._knowledge_index(engram_dir).update([relative])
+
     def count_memory_entries(self, name: str, category: str) -> int:
         """Count raw (non-consolidated) entries in a memory category file."""
         content = self.load_file(name, f"memory/{category}.md")
@@ -682,6 +1584,31 @@ class EngramLoader:
             return 0
         return content.count("\n---\n")
 
+    @timed("loader.flush_memory_index")
+    def flush_memory_index(self, name: str, *, is_global: bool = False) -> bool:
+        """Materialize pending memory-log writes into _index_full.md/_index.md."""
+        if is_global:
+            memory_dir = self._global_memory_dir()
+        else:
+            engram_dir = self._resolve_engram_dir(name)
+            if engram_dir is None:
+                return False
+            memory_dir = engram_dir / "memory"
+        if not memory_dir.is_dir():
+            return False
+        self._memory_log(memory_dir).materialize()
+        return True
+
+    def _memory_log(self, memory_dir: Path) -> MemoryLog:
+        """Return the shared MemoryLog for a memory directory."""
+        key = memory_dir.resolve()
+        with self._memory_logs_lock:
+            memory_log = self._memory_logs.get(key)
+            if memory_log is None:
+                memory_log = MemoryLog(key, tracer=self.tracer)
+                self._memory_logs[key] = memory_log
+            return memory_log
+
     def _global_memory_dir(self) -> Path:
         """Return the shared global memory directory, creating it if needed."""
         d = self.packs_dir / "_global" / "memory"
@@ -699,156 +1626,102 @@ class EngramLoader:
             return hot_index
         return None
 
-    def _archive_expired_entries(self, memory_dir: Path) -> None:
-        """Move expired memory entries to {category}-expired.md and trim indexes."""
-        full_index = memory_dir / "_index_full.md"
-        hot_index = memory_dir / "_index.md"
-
-        # Migration: bootstrap full index from hot index if needed.
-        if not full_index.is_file() and hot_index.is_file():
-            try:
-                full_index.write_text(hot_index.read_text(encoding="utf-8"), encoding="utf-8")
-            except OSError:
-                return
+    def _maintain_memory_dir(self, memory_dir: Path) -> None:
+        """Bring the index views up to date and archive expired entries when due.
 
-        if not full_index.is_file():
-            return
-
-        try:
-            lines = full_index.read_text(encoding="utf-8").splitlines(keepends=True)
-        except OSError:
+        Only the persisted next-expiry watermark is checked here; the scan itself
+        runs on the maintenance worker when one is configured (expired lines are
+        already filtered out at read time), otherwise inline.
+        """
+        if not memory_dir.is_dir():
             return
+        with self.tracer.span("memory.maintain", memory_dir):
+            memory_log = self._memory_log(memory_dir)
+            if memory_log.is_dirty():
+                memory_log.materialize()
+            today = datetime.now(timezone.utc).date().isoformat()
+            if not memory_log.expiry_due(today):
+                return
+            if self.maintenance is None:
+                self._archive_expired_entries(memory_dir)
+            else:
+                self.maintenance.submit(
+                    ("archive", memory_dir.resolve()),
+                    lambda: self._archive_expired_entries(memory_dir),
+                )
 
-        active_lines: list[str] = []
-        expired_entries: list[tuple[str, str, str]] = []
-
-        for line in lines:
-            if not line.strip().startswith("- `memory/"):
-                active_lines.append(line)
-                continue
-            if not self._is_expired(line):
-                active_lines.append(line)
-                continue
-            parsed = self._parse_index_entry(line)
-            if parsed is None:
-                # Keep legacy/unparseable lines instead of dropping data silently.
-                active_lines.append(line)
-                continue
-            expired_entries.append((parsed["category"], parsed["timestamp"], line))
+    def drain_maintenance(self, timeout: float | None = None) -> bool:
+        """Wait for queued background maintenance; True when nothing is left."""
+        if self.maintenance is None:
+            return True
+        return self.maintenance.drain(timeout)
 
-        if not expired_entries:
-            # Keep hot index aligned with full index (for migration and summaries).
-            self._rebuild_hot_index(memory_dir)
+    def _archive_expired_entries(self, memory_dir: Path) -> None:
+        """Move expired memory entries to {category}-expired.md and refresh the indexes."""
+        if not memory_dir.is_dir():
             return
+        memory_log = self._memory_log(memory_dir)
+        with memory_log.lock, self.tracer.span("memory.archive_expired", memory_dir):
+            expired = [
+                entry
+                for entry in memory_log.entries()
+                if entry.is_entry
+                and entry.parsed is not None
+                and self._is_expired(entry.line)
+            ]
 
-        try:
-            full_index.write_text("".join(active_lines), encoding="utf-8")
-        except OSError:
-            return
+            if not expired:
+                # 水位线偏低（条目已被删除/更正）：按现存条目重算
+                memory_log.recompute_next_expiry()
+                return
 
-        for category, ts, original_line in expired_entries:
-            self._move_expired_entry(memory_dir, category, ts, original_line)
+            for entry in expired:
+                self._move_expired_entry(
+                    memory_log,
+                    memory_dir,
+                    entry.parsed["category"],
+                    entry.parsed["timestamp"],
+                    entry.line,
+                    entry_id=entry.id,
+                )
 
-        self._rebuild_hot_index(memory_dir)
+            if not memory_log.append([{"op": "del", "id": entry.id} for entry in expired]):
+                return
+            memory_log.recompute_next_expiry()
+            memory_log.materialize()
 
     def _move_expired_entry(
-        self, memory_dir: Path, category: str, timestamp: str, original_line: str
+        self,
+        memory_log: MemoryLog,
+        memory_dir: Path,
+        category: str,
+        timestamp: str,
+        original_line: str,
+        *,
+        entry_id: str,
     ) -> None:
         """Move one entry from category file to category-expired file."""
-        category_file = memory_dir / f"{category}.md"
         expired_file = memory_dir / f"{category}-expired.md"
-        moved_blocks: list[str] = []
-        kept_blocks: list[str] = []
-
-        if category_file.is_file():
-            try:
-                content = category_file.read_text(encoding="utf-8")
-            except OSError:
-                return
-
-            for block in content.split("\n---\n"):
-                text = block.strip()
-                if not text:
-                    continue
-                if timestamp in text:
-                    moved_blocks.append(text)
-                else:
-                    kept_blocks.append(text)
-
-            rebuilt = "".join(f"\n---\n{block}\n" for block in kept_blocks)
-            try:
-                category_file.write_text(rebuilt, encoding="utf-8")
-            except OSError:
-                return
-
+        moved_blocks = self._replace_memory_block(
+            memory_log, memory_dir, category, entry_id, timestamp, None
+        )
         if not moved_blocks:
             moved_blocks.append(f"[index-only] {original_line.strip()}")
 
+        payload = "".join(f"\n---\n{block}\n" for block in moved_blocks)
         try:
-            with expired_file.open("a", encoding="utf-8") as f:
-                for block in moved_blocks:
-                    f.write(f"\n---\n{block}\n")
+            with self.tracer.span("append", expired_file) as span, expired_file.open(
+                "a", encoding="utf-8"
+            ) as f:
+                f.write(payload)
+                span.record(payload)
         except OSError:
             return
 
     @staticmethod
     def _parse_index_entry(line: str) -> dict[str, str] | None:
         """Parse one memory index line into structured fields."""
-        m = re.search(
-            r"- `memory/(?P<category>[^`]+)\.md` "
-            r"\[(?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2})\] "
-            r"\[(?P<memory_type>[^\]]+)\]"
-            r"(?: expires:\d{4}-\d{2}-\d{2})?"
-            r"(?: \[[^\]]+\])?"
-            r"\s*(?P<summary>.*)$",
-            line.strip(),
-        )
-        if not m:
-            return None
-        return {
-            "category": m.group("category"),
-            "timestamp": m.group("timestamp"),
-            "memory_type": m.group("memory_type"),
-            "summary": m.group("summary").strip(),
-        }
-
-    def _rebuild_hot_index(self, memory_dir: Path) -> None:
-        """Rebuild _index.md (hot layer) from _index_full.md."""
-        full_index = memory_dir / "_index_full.md"
-        hot_index = memory_dir / "_index.md"
-        if not full_index.is_file():
-            return
-        try:
-            lines = full_index.read_text(encoding="utf-8").splitlines(keepends=True)
-        except OSError:
-            return
-        entry_lines = [l for l in lines if l.strip().startswith("- `memory/")]
-        hot_lines = entry_lines[-_HOT_INDEX_LIMIT:]
-        latest_by_category: dict[str, dict[str, str]] = {}
-        for line in reversed(entry_lines):
-            parsed = self._parse_index_entry(line)
-            if parsed is None:
-                continue
-            if parsed["category"] not in latest_by_category:
-                latest_by_category[parsed["category"]] = parsed
-
-        hot_content: list[str] = []
-        if latest_by_category:
-            hot_content.append("## 分类摘要\n")
-            for category in sorted(latest_by_category):
-                item = latest_by_category[category]
-                summary = item["summary"] or "(无摘要)"
-                hot_content.append(
-                    f"- `{category}` [{item['timestamp']}] "
-                    f"[{item['memory_type']}] {summary}\n"
-                )
-            hot_content.append("\n## 最近记忆（最多50条）\n")
-
-        hot_content.extend(hot_lines)
-        try:
-            hot_index.write_text("".join(hot_content), encoding="utf-8")
-        except OSError:
-            pass
+        return parse_index_line(line)
 
     @staticmethod
     def _is_expired(line: str) -> bool:
@@ -876,11 +1749,14 @@ class EngramLoader:
 
         # Has any category files already?
         if memory_dir.is_dir():
-            skip_names = {"_index.md", "_index_full.md", "_onboarded"}
-            has_entries = any(
-                f.is_file() and f.name not in skip_names
-                for f in memory_dir.iterdir()
-            )
+            skip_names = {
+                "_index.md", "_index_full.md", "_onboarded", LOG_FILENAME, STATE_FILENAME
+            }
+            with self.tracer.span("scandir", memory_dir):
+                has_entries = any(
+                    f.is_file() and f.name not in skip_names
+                    for f in memory_dir.iterdir()
+                )
             if has_entries:
                 return ""
 
@@ -907,7 +1783,21 @@ class EngramLoader:
             return ""
         return f"## {title}\n{content.strip()}"
 
+    @staticmethod
+    def _is_plain_name(name: str) -> bool:
+        """Return True for names that map to a direct child of a packs root."""
+        return bool(name) and name not in {".", ".."} and "/" not in name and "\\" not in name
+
     def _resolve_engram_dir(self, name: str) -> Path | None:
+        if self._is_plain_name(name):
+            entry = self.catalog.get(name)
+            if entry is None:
+                return None
+            if entry.lower is not None:
+                self._prepare_overlay(entry)
+            return entry.path
+
+        # 非普通名称（嵌套路径等）走原始解析逻辑
         for packs_root in self.packs_dirs:
             engram_dir = (packs_root / name).resolve()
 
@@ -920,6 +1810,142 @@ class EngramLoader:
                 return engram_dir
         return None
 
+    def source_dir(self, name: str) -> Path | None:
+        """Directory holding a pack's base content, e.g. for lint.
+
+        For packs layered over a read-only pack dir this is the lower dir; archive
+        packs have no such dir and resolve to their upper dir (lint goes through
+        `lint_source` instead).
+        """
+        engram_dir = self._resolve_engram_dir(name)
+        if engram_dir is None:
+            return None
+        entry = self._layered_entry(engram_dir)
+        if entry is not None and entry.lower is not None and entry.lower.is_dir():
+            return entry.lower
+        return engram_dir
+
+    @contextmanager
+    def lint_source(self, name: str) -> Iterator[Path | None]:
+        """Yield the directory to lint for a pack, or None when it is missing.
+
+        Archive packs are extracted into a temporary dir named after the pack for
+        the duration of the block, so lint checks the archive members rather than
+        the write overlay.
+        """
+        engram_dir = self._resolve_engram_dir(name)
+        layer = self._pack_layer(engram_dir) if engram_dir is not None else None
+        if engram_dir is None or not isinstance(layer, ArchivePack):
+            yield self.source_dir(name)
+            return
+        with tempfile.TemporaryDirectory(prefix="engram-lint-") as tmp:
+            target = Path(tmp) / engram_dir.name
+            target.mkdir()
+            for relative in layer.files():
+                data = layer.read(relative)
+                if data is None:
+                    continue
+                path = target / relative
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(data)
+            yield target
+
+    def _lower_layer(self, lower: Path) -> PackLayer | None:
+        """Open a lower layer once per stamp and keep its member/path map.
+
+        Archives are keyed by the file's (mtime_ns, size); read-only pack dirs by
+        the dir and its meta.json, since base roots are not expected to change.
+        """
+        watched = [lower] if lower.is_file() else [lower, lower / "meta.json"]
+        fingerprint = file_fingerprint(watched)
+        cached = self.layer_cache.get(lower, fingerprint)
+        if cached is not None:
+            return cached
+        layer = open_layer(lower)
+        if layer is not None:
+            self.layer_cache.put(lower, fingerprint, layer)
+        return layer
+
+    def _pack_layer(self, engram_dir: Path) -> PackLayer | None:
+        """Read-only lower layer of a layered pack, or None for a plain pack dir."""
+        lower = self._lower_paths(engram_dir)
+        return self._lower_layer(lower[0]) if lower else None
+
+    def _layered_entry(self, engram_dir: Path) -> CatalogEntry | None:
+        """Catalog entry of a layered pack whose writable upper dir is `engram_dir`."""
+        return self.catalog.layered(engram_dir)
+
+    def _lower_paths(self, engram_dir: Path) -> list[Path]:
+        entry = self._layered_entry(engram_dir)
+        return [entry.lower] if entry is not None and entry.lower is not None else []
+
+    def _lower_member(self, path: Path) -> tuple[PackLayer, str] | None:
+        """Map an upper-layer path to its lower layer and member path ("" for the root)."""
+        for base in (self.overlay_dir, *self.packs_dirs):
+            try:
+                parts = path.relative_to(base).parts
+            except ValueError:
+                continue
+            if not parts:
+                continue
+            entry = self._layered_entry(base / parts[0])
+            if entry is None or entry.lower is None:
+                continue
+            layer = self._lower_layer(entry.lower)
+            if layer is None:
+                return None
+            return layer, "/".join(parts[1:])
+        return None
+
+    def _read_lower(self, path: Path) -> bytes | None:
+        member = self._lower_member(path)
+        if member is None:
+            return None
+        with self.tracer.span("read", path) as span:
+            data = member[0].read(member[1])
+            if data is not None:
+                span.record(data)
+        return data
+
+    def _lower_size(self, path: Path) -> int:
+        member = self._lower_member(path)
+        size = member[0].size(member[1]) if member is not None else None
+        return -1 if size is None else size
+
+    def _copy_up(self, path: Path) -> None:
+        """Copy a lower-layer file into the upper layer before it is modified in place."""
+        if path.exists():
+            return
+        data = self._read_lower(path)
+        if data is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+        except OSError:
+            pass
+
+    def _prepare_overlay(self, entry: CatalogEntry) -> None:
+        """Create a layered pack's upper dir on first use, seeding it with memory/."""
+        with self._overlays_lock:
+            if entry.path in self._overlays_ready:
+                return
+            layer = self._lower_layer(entry.lower) if entry.lower else None
+            try:
+                entry.path.mkdir(parents=True, exist_ok=True)
+                # memory/ 由 MemoryLog 直接按文件读写，整体复制一次
+                if layer is not None and not (entry.path / "memory").exists():
+                    for relative in layer.files("memory"):
+                        data = layer.read(relative)
+                        if data is None:
+                            continue
+                        target = entry.path / relative
+                        target.parent.mkdir(parents=True, exist_ok=True)
+                        target.write_bytes(data)
+            except OSError:
+                return
+            self._overlays_ready.add(entry.path)
+
     def _resolve_file(self, name: str, relative_path: str) -> Path | None:
         engram_dir = self._resolve_engram_dir(name)
         if engram_dir is None:
@@ -0,0 +1,73 @@
+"""Background worker for deferred housekeeping (e.g. archiving expired memories)."""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class MaintenanceWorker:
+    """Run submitted jobs on one daemon thread, coalescing jobs with the same key.
+
+    A job submitted while an identical key is still pending is dropped, so a burst
+    of requests noticing the same overdue work schedules it only once.
+    """
+
+    def __init__(self, name: str = "engram-maintenance"):
+        self._name = name
+        self._pending: OrderedDict[Hashable, Callable[[], None]] = OrderedDict()
+        self._cond = threading.Condition()
+        self._running = 0
+        self._closed = False
+        self._thread: threading.Thread | None = None
+
+    def submit(self, key: Hashable, job: Callable[[], None]) -> bool:
+        """Queue a job; return False when the same key is already pending or closed."""
+        with self._cond:
+            if self._closed or key in self._pending:
+                return False
+            self._pending[key] = job
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=self._name, daemon=True
+                )
+                self._thread.start()
+            self._cond.notify_all()
+            return True
+
+    def drain(self, timeout: float | None = None) -> bool:
+        """Block until no job is pending or running; return False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._pending and not self._running, timeout
+            )
+
+    def close(self, timeout: float | None = None) -> None:
+        """Finish queued jobs and stop the worker thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                _, job = self._pending.popitem(last=False)
+                self._running += 1
+            try:
+                job()
+            except Exception:  # noqa: BLE001
+                logger.exception("maintenance job failed")
+            finally:
+                with self._cond:
+                    self._running -= 1
+                    self._cond.notify_all()
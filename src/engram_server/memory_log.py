@@ -0,0 +1,620 @@
+"""Append-only memory log backing the markdown memory indexes.
+
+Each memory directory keeps ``_log.jsonl`` as the source of truth for its index:
+one JSON record per line, every entry carrying a stable id. Deletes and
+corrections are tombstone/replace records, so capturing a memory is a constant
+time append. ``_index_full.md`` and ``_index.md`` are materialized views rebuilt
+lazily from the replayed log, and ``compact()`` rewrites the log without dead
+records once they outnumber live entries. The sidecar ``_log_state.json`` also
+persists the earliest ``expires:`` date (the next-expiry watermark), so callers
+can tell whether archival is due without replaying or scanning the log.
+
+The log doubles as the offset index of the category files: ``add`` records
+carry the byte offset and length of the entry's block in ``{category}.md``, and
+``block``/``locate`` records keep those locations current as blocks are spliced
+out or a category file is rescanned, so deletes and corrections touch only the
+target block and the bytes after it.
+
+Record shapes::
+
+    {"op": "add", "id": "...", "line": "- `memory/x.md` [...] ...",
+     "category": "x", "at": 120, "len": 64}        # at/len optional
+    {"op": "put", "id": "...", "line": "..."}      # replace one entry
+    {"op": "del", "id": "..."}                     # tombstone one entry
+    {"op": "drop", "category": "..."}              # tombstone a whole category
+    {"op": "block", "category": "x", "id": "...", "at": 120, "old": 64, "new": 70}
+    {"op": "locate", "category": "x", "blocks": {"<id>": [offset, length]}}
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import uuid
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from engram_server.tracing import NULL_TRACER, Tracer
+
+LOG_FILENAME = "_log.jsonl"
+STATE_FILENAME = "_log_state.json"
+FULL_INDEX_FILENAME = "_index_full.md"
+HOT_INDEX_FILENAME = "_index.md"
+
+HOT_INDEX_LIMIT = 50
+_COMPACT_MIN_DEAD = 64
+BLOCK_SEPARATOR = b"\n---\n"
+
+_EXPIRES_RE = re.compile(r"expires:(\d{4}-\d{2}-\d{2})")
+_BLOCK_ID_RE = re.compile(rb"(?:^| )id:([0-9a-f]+)(?: |$)")
+_INDEX_LINE_RE = re.compile(
+    r"- `memory/(?P<category>[^`]+)\.md` "
+    r"\[(?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2})\] "
+    r"\[(?P<memory_type>[^\]]+)\]"
+    r"(?: expires:(?P<expires>\d{4}-\d{2}-\d{2}))?"
+    r"(?: \[[^\]]+\])?"
+    r"\s*(?P<summary>.*?)"
+    r"(?: \(id:(?P<id>[0-9a-f]+)\))?$"
+)
+
+
+def new_entry_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def parse_index_line(line: str) -> dict[str, str] | None:
+    """Parse one memory index line into structured fields."""
+    m = _INDEX_LINE_RE.search(line.strip())
+    if not m:
+        return None
+    return {
+        "category": m.group("category"),
+        "timestamp": m.group("timestamp"),
+        "memory_type": m.group("memory_type"),
+        "expires": m.group("expires") or "",
+        "summary": m.group("summary").strip(),
+        "id": m.group("id") or "",
+    }
+
+
+def scan_block_starts(source: Path | BinaryIO, *, chunk_size: int = 1 << 20) -> list[int]:
+    """Return the byte offset of every block separator, reading the file in chunks."""
+    starts: list[int] = []
+    overlap = len(BLOCK_SEPARATOR) - 1
+    try:
+        with source.open("rb") if isinstance(source, Path) else nullcontext(source) as f:
+            base = 0
+            tail = b""
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                window = tail + chunk
+                window_base = base - len(tail)
+                position = window.find(BLOCK_SEPARATOR)
+                while position != -1:
+                    offset = window_base + position
+                    if not starts or offset >= starts[-1] + len(BLOCK_SEPARATOR):
+                        starts.append(offset)
+                    position = window.find(BLOCK_SEPARATOR, position + len(BLOCK_SEPARATOR))
+                base += len(chunk)
+                tail = window[-overlap:]
+    except OSError:
+        return []
+    return starts
+
+
+def scan_blocks(category_file: Path) -> dict[str, list[int]]:
+    """Map entry ids to [offset, length] of their blocks in a category file."""
+    try:
+        data = category_file.read_bytes()
+    except OSError:
+        return {}
+    starts: list[int] = []
+    position = data.find(BLOCK_SEPARATOR)
+    while position != -1:
+        starts.append(position)
+        position = data.find(BLOCK_SEPARATOR, position + len(BLOCK_SEPARATOR))
+    blocks: dict[str, list[int]] = {}
+    for index, start in enumerate(starts):
+        end = starts[index + 1] if index + 1 < len(starts) else len(data)
+        entry_id = _block_id(data[start:end])
+        if entry_id and entry_id not in blocks:
+            blocks[entry_id] = [start, end - start]
+    return blocks
+
+
+def splice_block(
+    category_file: Path, offset: int, length: int, replacement: bytes, entry_id: str
+) -> bytes | None:
+    """Replace the block at [offset, offset+length) after checking it is `entry_id`'s.
+
+    Only the block and the bytes after it are read and rewritten. Returns the old
+    block bytes, or None when the recorded location no longer matches the file.
+    """
+    try:
+        with category_file.open("r+b") as f:
+            size = f.seek(0, os.SEEK_END)
+            if offset + length > size:
+                return None
+            f.seek(offset)
+            old = f.read(length)
+            tail = f.read()
+            if _block_id(old) != entry_id:
+                return None
+            if tail and not tail.startswith(BLOCK_SEPARATOR):
+                return None
+            f.seek(offset)
+            f.write(replacement + tail)
+            f.truncate()
+    except OSError:
+        return None
+    return old
+
+
+def _block_id(block: bytes) -> str | None:
+    if not block.startswith(BLOCK_SEPARATOR):
+        return None
+    body = block[len(BLOCK_SEPARATOR):]
+    newline = body.find(b"\n")
+    meta_line = body if newline == -1 else body[:newline]
+    m = _BLOCK_ID_RE.search(meta_line)
+    return m.group(1).decode("ascii") if m else None
+
+
+def render_hot_index(entry_lines: list[str], latest_by_category: dict[str, dict[str, str]]) -> str:
+    """Render the hot `_index.md` layer from recent entry lines and per-category latest."""
+    hot_content: list[str] = []
+    if latest_by_category:
+        hot_content.append("## 分类摘要\n")
+        for category in sorted(latest_by_category):
+            item = latest_by_category[category]
+            summary = item["summary"] or "(无摘要)"
+            # 保留过期标记，读取时与明细行一样按日期过滤
+            expires = f" expires:{item['expires']}" if item.get("expires") else ""
+            hot_content.append(
+                f"- `{category}` [{item['timestamp']}] "
+                f"[{item['memory_type']}]{expires} {summary}\n"
+            )
+        hot_content.append(f"\n## 最近记忆（最多{HOT_INDEX_LIMIT}条）\n")
+    hot_content.extend(f"{line}\n" for line in entry_lines)
+    return "".join(hot_content)
+
+
+class MemoryEntry:
+    __slots__ = ("id", "line", "parsed", "is_entry")
+
+    def __init__(self, entry_id: str, line: str):
+        self.id = entry_id
+        self.set_line(line)
+
+    def set_line(self, line: str) -> None:
+        self.line = line
+        self.parsed = parse_index_line(line)
+        self.is_entry = line.strip().startswith("- `memory/")
+
+    @property
+    def category(self) -> str | None:
+        return self.parsed["category"] if self.parsed else None
+
+
+class MemoryLog:
+    """Replayed state of one memory directory's append-only log."""
+
+    def __init__(self, memory_dir: Path, *, tracer: Tracer = NULL_TRACER):
+        self.memory_dir = memory_dir
+        self.tracer = tracer
+        self.log_path = memory_dir / LOG_FILENAME
+        self.state_path = memory_dir / STATE_FILENAME
+        self.lock = threading.RLock()
+        self._reset_state()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def entries(self) -> list[MemoryEntry]:
+        """Return live entries in index order."""
+        with self.lock:
+            self._refresh()
+            return list(self._entries.values())
+
+    def get(self, entry_id: str) -> MemoryEntry | None:
+        with self.lock:
+            self._refresh()
+            return self._entries.get(entry_id)
+
+    def location(self, entry_id: str) -> tuple[str, int, int] | None:
+        """Return (category, byte offset, length) of an entry's block, if known."""
+        with self.lock:
+            self._refresh()
+            return self._locations.get(entry_id)
+
+    def find(self, category: str, summary: str) -> MemoryEntry | None:
+        """Return the first live entry of a category whose line contains summary."""
+        needle = f"`memory/{category}.md`"
+        text = summary.strip()
+        with self.lock:
+            self._refresh()
+            for entry in self._entries.values():
+                if needle in entry.line and text in entry.line:
+                    return entry
+        return None
+
+    def append(self, records: list[dict[str, Any]]) -> bool:
+        """Append records to the log and apply them to the in-memory state."""
+        if not records:
+            return True
+        payload = "".join(
+            json.dumps(record, ensure_ascii=False) + "\n" for record in records
+        ).encode("utf-8")
+        with self.lock:
+            self._refresh()
+            try:
+                self.memory_dir.mkdir(parents=True, exist_ok=True)
+                with self.tracer.span("append", self.log_path) as span, self.log_path.open(
+                    "ab"
+                ) as f:
+                    f.write(payload)
+                    span.record(payload)
+            except OSError:
+                return False
+            # 重放尾部而非直接套用：其他进程可能在此之前追加过记录
+            self._refresh()
+            self.pending_writes += len(records)
+        return True
+
+    def is_dirty(self) -> bool:
+        """Return True when the markdown views lag behind the log."""
+        with self.lock:
+            if self._cold_state() is not None:
+                return False
+            self._refresh()
+            return self._size != self._materialized_size or self._needs_bootstrap_views
+
+    def next_expiry(self) -> str | None:
+        """Return the earliest `expires:` date (YYYY-MM-DD) among entries, if any.
+
+        The watermark only moves down as entries are added; it may lag behind
+        deletions until ``recompute_next_expiry()`` runs after archival.
+        """
+        with self.lock:
+            cold = self._cold_state()
+            if cold is not None:
+                return cold.get("next_expiry")
+            self._refresh()
+            return self._next_expiry
+
+    def expiry_due(self, today: str) -> bool:
+        """Return True when some entry may have expired before `today` (YYYY-MM-DD)."""
+        watermark = self.next_expiry()
+        return watermark is not None and watermark < today
+
+    def recompute_next_expiry(self) -> str | None:
+        """Recompute the watermark exactly from live entries and persist it."""
+        with self.lock:
+            self._refresh()
+            self._next_expiry = min(
+                (d for d in (_expiry_of(e.line) for e in self._entries.values()) if d),
+                default=None,
+            )
+            if self._size == self._materialized_size and not self._needs_bootstrap_views:
+                self._write_state()
+            return self._next_expiry
+
+    def materialize(self, *, force: bool = False) -> None:
+        """Rewrite `_index_full.md` (when needed) and `_index.md` from the log."""
+        with self.lock:
+            self._refresh()
+            if not force and not (
+                self._size != self._materialized_size or self._needs_bootstrap_views
+            ):
+                return
+            with self.tracer.span("memory.rebuild_hot_index", self.memory_dir):
+                if self._full_dirty or force:
+                    full = "".join(f"{entry.line}\n" for entry in self._entries.values())
+                    self._write_view(self.memory_dir / FULL_INDEX_FILENAME, full)
+                self._write_view(self.memory_dir / HOT_INDEX_FILENAME, self._render_hot())
+            self._materialized_size = self._size
+            self._full_dirty = False
+            self._needs_bootstrap_views = False
+            self.pending_writes = 0
+            self._write_state()
+            if self._dead_records() >= max(_COMPACT_MIN_DEAD, len(self._entries)):
+                self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the log with only live entries, dropping tombstones."""
+        with self.lock:
+            self._refresh()
+            payload = "".join(
+                json.dumps(self._add_record(e), ensure_ascii=False) + "\n"
+                for e in self._entries.values()
+            ).encode("utf-8")
+            if not _atomic_write_bytes(self.log_path, payload):
+                return
+            views_current = self._size == self._materialized_size
+            self._size = len(payload)
+            self._stamp = _stat_stamp(self.log_path)
+            self._records = len(self._entries)
+            if views_current:
+                self._materialized_size = self._size
+                self._write_state()
+
+    def _add_record(self, entry: MemoryEntry) -> dict[str, Any]:
+        record: dict[str, Any] = {"op": "add", "id": entry.id, "line": entry.line}
+        location = self._locations.get(entry.id)
+        if location is not None:
+            record.update(category=location[0], at=location[1], len=location[2])
+        return record
+
+    def reset(self) -> None:
+        """Forget the log so it is re-bootstrapped from `_index_full.md`."""
+        with self.lock:
+            for path in (self.log_path, self.state_path):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            self._reset_state()
+
+    def forget(self) -> None:
+        """Drop the in-memory replay so the next access re-reads the log from disk."""
+        with self.lock:
+            self._reset_state()
+
+    def state(self) -> dict[str, Any]:
+        """Return the persisted sidecar state (empty when missing or invalid)."""
+        try:
+            data = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    # ------------------------------------------------------------------
+    # Replay
+    # ------------------------------------------------------------------
+
+    def _reset_state(self) -> None:
+        self._entries: dict[str, MemoryEntry] = {}
+        self._locations: dict[str, tuple[str, int, int]] = {}
+        self._size = 0
+        self._stamp: tuple[int, int] | None = None
+        self._loaded = False
+        self._records = 0
+        self._materialized_size = 0
+        self._full_dirty = False
+        self._needs_bootstrap_views = False
+        self._next_expiry: str | None = None
+        self.pending_writes = 0
+
+    def _cold_state(self) -> dict[str, Any] | None:
+        """Return the persisted state when it still describes the on-disk log.
+
+        Lets a fresh process answer dirty/expiry questions with one stat and one
+        small JSON read instead of replaying the whole log.
+        """
+        if self._loaded:
+            return None
+        stamp = _stat_stamp(self.log_path)
+        if stamp is None:
+            return None
+        state = self.state()
+        if "next_expiry" not in state or state.get("materialized_size") != stamp[1]:
+            return None
+        return state
+
+    def _refresh(self) -> None:
+        stamp = _stat_stamp(self.log_path)
+        if stamp is None:
+            if self._loaded and self._stamp is None:
+                return
+            self._reset_state()
+            self._bootstrap()
+            return
+        if self._loaded and stamp == self._stamp:
+            return
+        if not self._loaded or stamp[1] < self._size:
+            self._reset_state()
+            state = self.state()
+            self._materialized_size = int(state.get("materialized_size", 0))
+            # 从未物化过：_index_full.md 可能不完整，下次物化时整体重写
+            self._full_dirty = "materialized_size" not in state
+            self._replay_from(0)
+        else:
+            self._replay_from(self._size)
+        self._stamp = _stat_stamp(self.log_path)
+        self._loaded = True
+
+    def _replay_from(self, offset: int) -> None:
+        try:
+            with self.tracer.span("read", self.log_path) as span, self.log_path.open("rb") as f:
+                f.seek(offset)
+                data = f.read()
+                span.record(data)
+        except OSError:
+            return
+        # 只消费完整的行，半行（并发写入中）留待下次
+        end = data.rfind(b"\n") + 1
+        position = offset
+        for raw in data[:end].splitlines(keepends=True):
+            record_offset = position
+            position += len(raw)
+            try:
+                record = json.loads(raw)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(record, dict):
+                self._apply(record, mutation=record_offset >= self._materialized_size)
+        self._size = offset + end
+
+    def _apply(self, record: dict[str, Any], *, mutation: bool) -> None:
+        self._records += 1
+        op = record.get("op")
+        entry_id = str(record.get("id", ""))
+        if op == "add" and entry_id:
+            line = str(record.get("line", ""))
+            entry = MemoryEntry(entry_id, line)
+            self._entries[entry_id] = entry
+            self._lower_next_expiry(line)
+            category = record.get("category") or entry.category
+            if category and isinstance(record.get("at"), int) and isinstance(record.get("len"), int):
+                self._locations[entry_id] = (str(category), record["at"], record["len"])
+            return
+        if op == "block":
+            self._apply_block(record)
+            return
+        if op == "locate":
+            category = str(record.get("category", ""))
+            self._locations = {
+                key: value for key, value in self._locations.items() if value[0] != category
+            }
+            for block_id, (offset, length) in dict(record.get("blocks") or {}).items():
+                if block_id in self._entries:
+                    self._locations[block_id] = (category, int(offset), int(length))
+            return
+        if mutation:
+            self._full_dirty = True
+        if op == "put" and entry_id in self._entries:
+            line = str(record.get("line", ""))
+            self._entries[entry_id].set_line(line)
+            self._lower_next_expiry(line)
+        elif op == "del":
+            self._entries.pop(entry_id, None)
+            self._locations.pop(entry_id, None)
+        elif op == "drop":
+            category = str(record.get("category", ""))
+            needle = f"`memory/{category}.md`"
+            doomed = [e.id for e in self._entries.values() if needle in e.line]
+            for doomed_id in doomed:
+                del self._entries[doomed_id]
+            self._locations = {
+                key: value for key, value in self._locations.items() if value[0] != category
+            }
+
+    def _apply_block(self, record: dict[str, Any]) -> None:
+        """Shift block locations after [at, at+old) was replaced by `new` bytes."""
+        category = str(record.get("category", ""))
+        at, old, new = int(record.get("at", 0)), int(record.get("old", 0)), int(record.get("new", 0))
+        delta = new - old
+        for key, (block_category, offset, length) in list(self._locations.items()):
+            if block_category == category and offset >= at + old:
+                self._locations[key] = (block_category, offset + delta, length)
+        entry_id = str(record.get("id", ""))
+        if new and entry_id in self._entries:
+            self._locations[entry_id] = (category, at, new)
+        else:
+            self._locations.pop(entry_id, None)
+
+    def _lower_next_expiry(self, line: str) -> None:
+        expires = _expiry_of(line)
+        if expires and (self._next_expiry is None or expires < self._next_expiry):
+            self._next_expiry = expires
+
+    def _dead_records(self) -> int:
+        return self._records - len(self._entries)
+
+    def _bootstrap(self) -> None:
+        """Seed the log from a legacy `_index_full.md` / `_index.md`."""
+        self._loaded = True
+        source = self.memory_dir / FULL_INDEX_FILENAME
+        if not source.is_file():
+            source = self.memory_dir / HOT_INDEX_FILENAME
+        if not source.is_file():
+            return
+        try:
+            lines = source.read_text(encoding="utf-8").splitlines()
+        except OSError:
+            return
+        records = []
+        for line in lines:
+            parsed = parse_index_line(line)
+            entry_id = parsed["id"] if parsed and parsed["id"] else new_entry_id()
+            if parsed and not parsed["id"]:
+                line = f"{line.rstrip()} (id:{entry_id})"
+            records.append({"op": "add", "id": entry_id, "line": line})
+        payload = "".join(
+            json.dumps(record, ensure_ascii=False) + "\n" for record in records
+        ).encode("utf-8")
+        if not _atomic_write_bytes(self.log_path, payload):
+            return
+        for record in records:
+            self._apply(record, mutation=False)
+        self._size = len(payload)
+        self._stamp = _stat_stamp(self.log_path)
+        # 旧数据首次接入：视图需按新格式重建一次
+        self._full_dirty = True
+        self._needs_bootstrap_views = True
+
+    # ------------------------------------------------------------------
+    # Views
+    # ------------------------------------------------------------------
+
+    def _render_hot(self) -> str:
+        recent: list[str] = []
+        latest_by_category: dict[str, dict[str, str]] = {}
+        for entry in reversed(list(self._entries.values())):
+            if not entry.is_entry:
+                continue
+            if len(recent) < HOT_INDEX_LIMIT:
+                recent.append(entry.line)
+            if entry.parsed and entry.parsed["category"] not in latest_by_category:
+                latest_by_category[entry.parsed["category"]] = entry.parsed
+        recent.reverse()
+        return render_hot_index(recent, latest_by_category)
+
+    def _write_view(self, path: Path, content: str) -> None:
+        with self.tracer.span("write", path) as span:
+            if _write_if_changed(path, content):
+                span.record(content)
+
+    def _write_state(self) -> None:
+        state = self.state()
+        state["materialized_size"] = self._materialized_size
+        state["next_expiry"] = self._next_expiry
+        payload = (json.dumps(state, ensure_ascii=False) + "\n").encode("utf-8")
+        with self.tracer.span("write", self.state_path) as span:
+            if _atomic_write_bytes(self.state_path, payload):
+                span.record(payload)
+
+
+def _expiry_of(line: str) -> str | None:
+    m = _EXPIRES_RE.search(line)
+    return m.group(1) if m else None
+
+
+def _stat_stamp(path: Path) -> tuple[int, int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _atomic_write_bytes(path: Path, payload: bytes) -> bool:
+    tmp = path.with_name(f".{path.name}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_bytes(payload)
+        os.replace(tmp, path)
+    except OSError:
+        return False
+    return True
+
+
+def _write_if_changed(path: Path, content: str) -> bool:
+    """Write content unless the file already holds it; True when it was written."""
+    # 内容未变时不重写，保持 mtime 稳定（load_engram 缓存依赖文件指纹）
+    try:
+        if path.is_file() and path.read_text(encoding="utf-8") == content:
+            return False
+    except OSError:
+        pass
+    try:
+        path.write_text(content, encoding="utf-8")
+    except OSError:
+        return False
+    return True
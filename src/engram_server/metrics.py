@@ -0,0 +1,227 @@
+"""In-process latency histograms and call/error counters per (pack, tool)."""
+
+from __future__ import annotations
+
+import functools
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, TypeVar
+
+# 直方图桶上界（秒），与 Prometheus 默认桶相近，另补 1ms 以下的细分
+BUCKETS: tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+F = TypeVar("F", bound=Callable[..., Any])
+# 客户端传入但无法解析的 pack 名统一记在这个标签下，指标序列数不随拼错的名称增长
+UNKNOWN_PACK = "<unknown>"
+
+
+class ToolFailure(str):
+    """Failure message returned from an explicit error branch of an MCP tool.
+
+    Clients still receive plain text; only the metrics wrapper tells it apart, so
+    empty-but-valid answers ("未找到与…相关的知识") never count as errors.
+    """
+
+    __slots__ = ()
+
+
+class _Cell:
+    __slots__ = ("calls", "errors", "total", "max", "buckets")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        # 非累计计数，最后一格为 +Inf
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+
+class ToolMetrics:
+    """Thread-safe counters and latency histograms keyed by (pack, tool).
+
+    Calls without a pack are recorded under pack "", calls naming a pack that does
+    not resolve under `UNKNOWN_PACK`. Loader methods are recorded with a "loader."
+    prefix next to the MCP tools that call them.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._cells: dict[tuple[str, str], _Cell] = {}
+        self._known_packs: set[str] = set()
+
+    def pack_label(self, name: str, exists: Callable[[str], bool]) -> str:
+        """Label for a client-supplied pack name: the name once it resolves, else UNKNOWN_PACK."""
+        if not name:
+            return ""
+        with self._lock:
+            if name in self._known_packs:
+                return name
+        if not exists(name):
+            return UNKNOWN_PACK
+        with self._lock:
+            self._known_packs.add(name)
+        return name
+
+    def observe(self, pack: str, tool: str, seconds: float, *, error: bool = False) -> None:
+        slot = bisect_left(BUCKETS, seconds)
+        with self._lock:
+            cell = self._cells.get((pack, tool))
+            if cell is None:
+                cell = self._cells[(pack, tool)] = _Cell()
+            cell.calls += 1
+            cell.errors += int(error)
+            cell.total += seconds
+            cell.max = max(cell.max, seconds)
+            cell.buckets[slot] += 1
+
+    def snapshot(self, pack: str | None = None) -> list[dict[str, Any]]:
+        """One dict per (pack, tool): calls, errors, sum/max ms and cumulative buckets."""
+        with self._lock:
+            cells = [
+                (key, cell.calls, cell.errors, cell.total, cell.max, list(cell.buckets))
+                for key, cell in self._cells.items()
+                if pack is None or key[0] == pack
+            ]
+        rows: list[dict[str, Any]] = []
+        for (pack_name, tool), calls, errors, total, peak, buckets in sorted(cells):
+            cumulative: dict[str, int] = {}
+            running = 0
+            for bound, count in zip([*map(str, BUCKETS), "+Inf"], buckets):
+                running += count
+                cumulative[bound] = running
+            rows.append(
+                {
+                    "pack": pack_name,
+                    "tool": tool,
+                    "calls": calls,
+                    "errors": errors,
+                    "sum_ms": round(total * 1000, 3),
+                    "max_ms": round(peak * 1000, 3),
+                    "p95_ms": _bucket_quantile(cumulative, calls, 0.95),
+                    "buckets": cumulative,
+                }
+            )
+        return rows
+
+    def render_plain(self, pack: str | None = None) -> str:
+        rows = self.snapshot(pack)
+        if not rows:
+            return "暂无指标数据"
+        lines = [
+            f"{'pack':<20} {'tool':<34} {'calls':>6} {'errors':>6} "
+            f"{'avg ms':>9} {'p95<= ms':>9} {'max ms':>9}"
+        ]
+        for row in rows:
+            avg = row["sum_ms"] / row["calls"] if row["calls"] else 0.0
+            p95 = "inf" if row["p95_ms"] is None else f"{row['p95_ms']:.1f}"
+            lines.append(
+                f"{row['pack'] or '-':<20} {row['tool']:<34} {row['calls']:>6} "
+                f"{row['errors']:>6} {avg:>9.2f} {p95:>9} {row['max_ms']:>9.2f}"
+            )
+        return "\n".join(lines)
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = [
+            "# HELP engram_tool_calls_total Tool and loader calls.",
+            "# TYPE engram_tool_calls_total counter",
+        ]
+        rows = self.snapshot()
+        for row in rows:
+            lines.append(f"engram_tool_calls_total{{{_labels(row)}}} {row['calls']}")
+        lines += [
+            "# HELP engram_tool_errors_total Calls that raised or returned a failure message.",
+            "# TYPE engram_tool_errors_total counter",
+        ]
+        for row in rows:
+            lines.append(f"engram_tool_errors_total{{{_labels(row)}}} {row['errors']}")
+        lines += [
+            "# HELP engram_tool_duration_seconds Call latency.",
+            "# TYPE engram_tool_duration_seconds histogram",
+        ]
+        for row in rows:
+            labels = _labels(row)
+            for bound, count in row["buckets"].items():
+                lines.append(
+                    f'engram_tool_duration_seconds_bucket{{{labels},le="{bound}"}} {count}'
+                )
+            lines.append(
+                f"engram_tool_duration_seconds_sum{{{labels}}} {row['sum_ms'] / 1000:.6f}"
+            )
+            lines.append(f"engram_tool_duration_seconds_count{{{labels}}} {row['calls']}")
+        return "\n".join(lines) + "\n"
+
+    def dump_jsonl(self, path: Path) -> int:
+        """Append one JSON line per (pack, tool) cell; return the number of lines."""
+        rows = self.snapshot()
+        if not rows:
+            return 0
+        stamp = datetime.now(timezone.utc).isoformat()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("a", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps({"ts": stamp, **row}, ensure_ascii=False) + "\n")
+        return len(rows)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._cells.clear()
+
+
+def _bucket_quantile(cumulative: dict[str, int], calls: int, q: float) -> float | None:
+    """Upper bound (ms) of the bucket holding the q-quantile; None when it is +Inf."""
+    if not calls:
+        return 0.0
+    target = calls * q
+    for bound, count in cumulative.items():
+        if count >= target:
+            return None if bound == "+Inf" else float(bound) * 1000
+    return None
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(row: dict[str, Any]) -> str:
+    return f'pack="{_escape(row["pack"])}",tool="{_escape(row["tool"])}"'
+
+
+def timed(label: str) -> Callable[[F], F]:
+    """Record an EngramLoader method in `self.metrics` (skipped when it is None).
+
+    The pack label is the method's first argument (`name`), bucketed under
+    UNKNOWN_PACK when it does not resolve. Only raised exceptions
+    count as errors: None/False results are normal "not found" answers here.
+    """
+
+    def decorate(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+            metrics: ToolMetrics | None = self.metrics
+            if metrics is None:
+                return fn(self, *args, **kwargs)
+            name = args[0] if args and isinstance(args[0], str) else kwargs.get("name", "")
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = fn(self, *args, **kwargs)
+                failed = False
+                return result
+            finally:
+                elapsed = time.perf_counter() - start
+                pack = metrics.pack_label(
+                    str(name or ""), lambda item: self.get_engram_info(item) is not None
+                )
+                metrics.observe(pack, label, elapsed, error=failed)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
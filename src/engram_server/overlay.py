@@ -0,0 +1,112 @@
+"""Copy-on-write layering of a writable upper pack dir over a read-only lower pack."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from engram_server.archive import ArchivePack
+
+# 上层目录中的指针文件：内容为只读下层 pack 目录的绝对路径
+LOWER_LINK_FILENAME = ".engram-lower"
+
+
+def read_lower_link(upper_dir: Path) -> Path | None:
+    """Return the lower pack dir an upper dir points at, if it has a valid link."""
+    try:
+        raw = (upper_dir / LOWER_LINK_FILENAME).read_text(encoding="utf-8").strip()
+    except (OSError, UnicodeDecodeError):
+        return None
+    if not raw:
+        return None
+    lower = Path(raw).expanduser()
+    return lower.resolve() if lower.is_dir() else None
+
+
+def write_lower_link(upper_dir: Path, lower_dir: Path) -> None:
+    upper_dir.mkdir(parents=True, exist_ok=True)
+    (upper_dir / LOWER_LINK_FILENAME).write_text(f"{lower_dir.resolve()}\n", encoding="utf-8")
+
+
+class DirectoryLayer:
+    """Read-only lower pack directory with a cached path map.
+
+    The tree is walked once (hidden entries skipped) and lookups are dictionary
+    hits; callers rebuild it when the pack dir or its meta.json stamp changes.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._sizes: dict[str, int] = {}
+        self.dirs: set[str] = set()
+        for current, dirnames, filenames in os.walk(path):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+            base = Path(current).relative_to(path).as_posix()
+            prefix = "" if base == "." else f"{base}/"
+            if prefix:
+                self.dirs.add(base)
+            for filename in filenames:
+                if filename.startswith("."):
+                    continue
+                try:
+                    self._sizes[f"{prefix}{filename}"] = os.stat(Path(current) / filename).st_size
+                except OSError:
+                    continue
+
+    @classmethod
+    def open(cls, path: Path) -> DirectoryLayer | None:
+        return cls(path) if path.is_dir() else None
+
+    def is_file(self, relative: str) -> bool:
+        return relative in self._sizes
+
+    def is_dir(self, relative: str) -> bool:
+        return relative == "" or relative in self.dirs
+
+    def size(self, relative: str) -> int | None:
+        return self._sizes.get(relative)
+
+    def stamp(self, relative: str) -> tuple[int, int] | None:
+        """(mtime_ns, size) of a file in the lower dir, read from the file itself."""
+        if relative not in self._sizes:
+            return None
+        try:
+            st = os.stat(self.path / relative)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def files(self, prefix: str = "") -> list[str]:
+        base = f"{prefix.rstrip('/')}/" if prefix else ""
+        return sorted(name for name in self._sizes if name.startswith(base))
+
+    def list_dir(self, relative: str) -> list[str]:
+        base = f"{relative.rstrip('/')}/" if relative else ""
+        return sorted(
+            name[len(base) :]
+            for name in self._sizes
+            if name.startswith(base) and "/" not in name[len(base) :]
+        )
+
+    def read(self, relative: str) -> bytes | None:
+        if relative not in self._sizes:
+            return None
+        try:
+            return (self.path / relative).read_bytes()
+        except OSError:
+            return None
+
+
+PackLayer = ArchivePack | DirectoryLayer
+
+
+def open_layer(lower: Path) -> PackLayer | None:
+    """Open a lower layer: an `*.engram.zip/.tar` archive or a pack directory."""
+    if lower.is_dir():
+        return DirectoryLayer.open(lower)
+    return ArchivePack.open(lower)
+
+
+def lower_meta_path(lower: Path) -> Path:
+    """The file whose stamp tracks a lower layer's metadata."""
+    return lower if lower.is_file() else lower / "meta.json"
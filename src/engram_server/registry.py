@@ -1,10 +1,10 @@
 from __future__ import annotations
 
 import json
-import re
 from pathlib import Path
-from urllib.error import URLError
-from urllib.request import urlopen
+from typing import Any
+
+from engram_server.tokenizer import analyze, is_cjk, normalize, tokenize
 
 
 REGISTRY_URL = (
@@ -28,11 +28,18 @@ _LIST_ALL_QUERIES = {
 }
 
 
+def urlopen(url: str, *, timeout: float) -> Any:
+    # urllib.request 会连带导入 http.client/ssl，只在真正联网时加载
+    from urllib.request import urlopen as _urlopen
+
+    return _urlopen(url, timeout=timeout)  # nosec: B310
+
+
 def fetch_registry() -> list[dict]:
     try:
-        with urlopen(REGISTRY_URL, timeout=30) as response:  # nosec: B310
+        with urlopen(REGISTRY_URL, timeout=30) as response:
             payload = response.read().decode("utf-8")
-    except (OSError, URLError, TimeoutError):
+    except (OSError, TimeoutError):  # URLError 是 OSError 的子类
         return []
 
     try:
@@ -87,48 +94,58 @@ def merge_registry_entries(*entry_sets: list[dict]) -> list[dict]:
 
 
 def search_registry(query: str, entries: list[dict]) -> list[dict]:
-    q = query.strip().lower()
+    q = normalize(query).strip()
     if q in _LIST_ALL_QUERIES:
         return entries
 
-    tokens = [token for token in re.split(r"\s+", q) if token]
+    tokens = list(dict.fromkeys(tokenize(q, normalized=True)))
     if not tokens:
         return entries
+    word_tokens = [token for token in tokens if not is_cjk(token)]
+    cjk_tokens = [token for token in tokens if is_cjk(token)]
+    # 拉丁词须全部命中；中文二元组命中过半即可（查询可能跨越字段里的词边界）
+    min_cjk_hits = (len(cjk_tokens) + 1) // 2
 
     scored: list[tuple[int, dict]] = []
     for entry in entries:
-        name = str(entry.get("name", "")).strip()
-        description = str(entry.get("description", "")).strip()
+        name = analyze(str(entry.get("name", "")))
+        description = analyze(str(entry.get("description", "")))
         tags = entry.get("tags", [])
         if not isinstance(tags, list):
             tags = [str(tags)]
         tags_text = " ".join(str(tag).strip() for tag in tags if str(tag).strip())
-
-        name_l = name.lower()
-        desc_l = description.lower()
-        tags_l = [str(tag).strip().lower() for tag in tags if str(tag).strip()]
-        haystack = f"{name_l} {desc_l} {' '.join(tags_l)}"
-
-        if not all(token in haystack for token in tokens):
-            continue
+        tag_fields = [analyze(str(tag)) for tag in tags if str(tag).strip()]
 
         score = 0
+        hits: set[str] = set()
         for token in tokens:
-            if token == name_l:
-                score += 12
-            elif name_l.startswith(token):
-                score += 8
-            elif token in name_l:
-                score += 6
+            token_score = 0
+            if name.normalized.startswith(token):
+                token_score += 8
+            elif name.matches(token):
+                token_score += 6
+
+            if any(tag.normalized == token for tag in tag_fields):
+                token_score += 5
+            elif any(tag.matches(token) for tag in tag_fields):
+                token_score += 4
+
+            if description.matches(token):
+                token_score += 2
 
-            if token in tags_l:
-                score += 5
-            elif any(token in tag for tag in tags_l):
-                score += 4
+            if token_score:
+                hits.add(token)
+                score += token_score
 
-            if token in desc_l:
-                score += 2
+        if not all(token in hits for token in word_tokens):
+            continue
+        if sum(1 for token in cjk_tokens if token in hits) < min_cjk_hits:
+            continue
+        if not hits:
+            continue
 
+        if q == name.normalized:
+            score += 12
         score += min(len(tags_text), 60) // 20
         scored.append((score, entry))
 
@@ -0,0 +1,84 @@
+"""Heading-tree section index of markdown files (byte offsets per heading)."""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+_HEADING_RE = re.compile(rb"^(#{1,6})[ \t]+(.+?)[ \t]*#*[ \t]*$")
+_FENCE_RE = re.compile(rb"^[ \t]{0,3}(```|~~~)")
+PATH_SEPARATOR = " > "
+
+
+@dataclass(frozen=True)
+class Section:
+    level: int
+    title: str
+    # 从顶层到本标题的标题链
+    path: tuple[str, ...]
+    # 字节区间 [start, end)：从标题行开始，到下一个同级或更高级标题之前
+    start: int
+    end: int
+
+    @property
+    def heading_path(self) -> str:
+        return PATH_SEPARATOR.join(self.path)
+
+
+def parse_sections(data: bytes) -> list[Section]:
+    """Parse ATX headings (outside fenced code blocks) into a flat, ordered section list."""
+    found: list[tuple[int, str, int]] = []
+    offset = 0
+    in_fence = False
+    for line in data.splitlines(keepends=True):
+        stripped = line.rstrip(b"\r\n")
+        if _FENCE_RE.match(stripped):
+            in_fence = not in_fence
+        elif not in_fence:
+            match = _HEADING_RE.match(stripped)
+            if match:
+                title = match.group(2).decode("utf-8", errors="replace").strip()
+                found.append((len(match.group(1)), title, offset))
+        offset += len(line)
+
+    paths: list[tuple[str, ...]] = []
+    ends = [len(data)] * len(found)
+    # 栈中保存尚未闭合的标题下标；遇到同级或更高级标题时闭合
+    open_stack: list[int] = []
+    for i, (level, title, start) in enumerate(found):
+        while open_stack and found[open_stack[-1]][0] >= level:
+            ends[open_stack.pop()] = start
+        paths.append(tuple(found[j][1] for j in open_stack) + (title,))
+        open_stack.append(i)
+
+    return [
+        Section(level=level, title=title, path=paths[i], start=start, end=ends[i])
+        for i, (level, title, start) in enumerate(found)
+    ]
+
+
+def find_section(sections: list[Section], heading: str) -> Section | None:
+    """Match a heading by (trailing) path ("A > B"), exact title, then title substring."""
+    wanted = heading.strip().lstrip("#").strip().casefold()
+    if not wanted:
+        return None
+    for section in sections:
+        full = section.heading_path.casefold()
+        if full == wanted or full.endswith(f"{PATH_SEPARATOR}{wanted}"):
+            return section
+    for section in sections:
+        if section.title.casefold() == wanted:
+            return section
+    for section in sections:
+        if wanted in section.title.casefold():
+            return section
+    return None
+
+
+def read_section(path: Path, section: Section) -> str:
+    """Read only the byte range of one section."""
+    with path.open("rb") as f:
+        f.seek(section.start)
+        data = f.read(section.end - section.start)
+    return data.decode("utf-8", errors="replace")
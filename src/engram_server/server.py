@@ -1,24 +1,29 @@
 from __future__ import annotations
 
 import argparse
+import atexit
+import functools
 import json
 import shutil
 import subprocess
 import sys
 import tempfile
+import threading
+import time
+import weakref
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
 from urllib.parse import urlparse
 
-from mcp.server.fastmcp import FastMCP
-
-from engram_server.creator import (
-    build_engram_draft,
-    draft_response_payload,
-    materialize_draft,
-    parse_draft_payload,
-)
-from engram_server.lint import lint_engram
 from engram_server.loader import EngramLoader
+from engram_server.metrics import ToolFailure, ToolMetrics
+from engram_server.tracing import RecordingTracer
+from engram_server.overlay import write_lower_link
+from engram_server.token_meter import TokenMeter
+from engram_server.tokenizer import estimate_tokens
+from engram_server.trace_writer import TraceWriter
 from engram_server.registry import (
     fetch_registry,
     load_registry_file,
@@ -26,11 +31,34 @@ from engram_server.registry import (
     resolve_name,
     search_registry,
 )
+from engram_server.startup import StartupProfile, import_breakdown
+
+if TYPE_CHECKING:
+    from mcp.server.fastmcp import FastMCP
+
+    from engram_server.tool_pool import BlockingToolPool
 
 DEFAULT_PACKS_DIR = Path("~/.engram").expanduser()
 _PROJECT_BOOTSTRAP_COMPLETE_NAME = "starter-complete"
 _PROJECT_BOOTSTRAP_TEMPLATE_NAME = "starter-template"
 _MAIN_REPO_GIT_URL = "https://github.com/DazhuangJammy/Engram.git"
+_BATCH_READ_MAX_PATHS = 20
+# create_mcp_app 自建的轨迹写入器；弱引用，不延长 loader 的生命周期
+_APP_TRACE_WRITERS: weakref.WeakSet[TraceWriter] = weakref.WeakSet()
+
+
+_SECTION_LABELS = {
+    "role": "角色",
+    "workflow": "工作流程",
+    "rules": "规则",
+    "inherited_knowledge": "继承知识索引",
+    "extends_warning": "继承告警",
+    "knowledge": "知识索引",
+    "examples": "案例索引",
+    "memory": "动态记忆",
+    "global_memory": "全局用户记忆",
+    "onboarding": "首次引导",
+}
 
 
 def _format_engrams(engrams: list[dict]) -> str:
@@ -124,11 +152,12 @@ def _build_loader_roots(
     packs_dir: Path | str,
     *,
     cwd: Path | None = None,
+    include_project: bool = False,
 ) -> list[Path]:
     """Build search roots for Engram loading.
 
     Priority:
-    1) project-level .claude/engram (if exists)
+    1) project-level .claude/engram (if exists, or always with include_project)
     2) configured --packs-dir (global/default)
     """
     configured = Path(packs_dir).expanduser().resolve()
@@ -136,7 +165,7 @@ def _build_loader_roots(
     project_engram = (project_root / ".claude" / "engram").resolve()
 
     roots: list[Path] = []
-    if project_engram.is_dir():
+    if include_project or project_engram.is_dir():
         roots.append(project_engram)
     roots.append(configured)
 
@@ -298,6 +327,29 @@ def _ensure_project_engram_workspace(*, cwd: Path | None = None) -> Path:
     return project_engram
 
 
+class _ProjectWorkspace:
+    """Materialize the project .claude/engram workspace once, on first use.
+
+    The stdio server defers this until the first tool call so the MCP handshake
+    is not held up by creating starter packs.
+    """
+
+    def __init__(self, *, cwd: Path | None = None):
+        self.path = _project_engram_dir(cwd=cwd)
+        self._cwd = cwd
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def ensure(self) -> Path:
+        if self._ready:
+            return self.path
+        with self._lock:
+            if not self._ready:
+                _ensure_project_engram_workspace(cwd=self._cwd)
+                self._ready = True
+        return self.path
+
+
 def install_engram_from_source(source: str, packs_dir: Path) -> dict[str, str | bool]:
     packs_dir = packs_dir.expanduser()
     packs_dir.mkdir(parents=True, exist_ok=True)
@@ -377,6 +429,42 @@ def _install_engram_from_directory(
     return _finalize_installed_pack(target_dir)
 
 
+def _link_engram_from_directory(
+    source_dir: Path,
+    packs_dir: Path,
+    *,
+    target_name: str,
+) -> dict[str, str | bool]:
+    """Zero-copy install: an empty upper dir layered over a read-only source pack."""
+    packs_dir = packs_dir.expanduser()
+    packs_dir.mkdir(parents=True, exist_ok=True)
+
+    target_dir = packs_dir / target_name
+    if target_dir.exists():
+        return {
+            "ok": False,
+            "message": f"安装失败：目标目录已存在 {target_dir.name}",
+        }
+
+    try:
+        meta = json.loads((source_dir / "meta.json").read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {"ok": False, "message": "安装失败：meta.json 不是合法 JSON。"}
+
+    try:
+        write_lower_link(target_dir, source_dir)
+    except OSError as exc:
+        shutil.rmtree(target_dir, ignore_errors=True)
+        return {"ok": False, "message": f"安装失败：创建 overlay 目录出错。{exc}"}
+
+    name = meta.get("name", target_name)
+    description = meta.get("description", "")
+    return {
+        "ok": True,
+        "message": f"安装成功：{name} - {description}",
+    }
+
+
 def _install_engram_from_local_examples(
     name: str,
     packs_dir: Path,
@@ -393,7 +481,8 @@ def _install_engram_from_local_examples(
     if not (source_dir / "meta.json").is_file():
         return None
 
-    result = _install_engram_from_directory(
+    # 随包附带的示例只读引用，写入（记忆等）落在 packs_dir/<name> 上层
+    result = _link_engram_from_directory(
         source_dir,
         packs_dir,
         target_name=name,
@@ -600,8 +689,81 @@ def _build_engram_system_prompt(engrams: list[dict]) -> str:
     )
 
 
-def create_mcp_app(loader: EngramLoader, packs_dir: Path) -> FastMCP:
-    app = FastMCP(name="engram-server")
+def _close_app_trace_writers() -> None:
+    for writer in list(_APP_TRACE_WRITERS):
+        writer.close()
+
+
+# 未经 lifespan 运行的 app（嵌入调用、测试）退出时也把队列里的轨迹落盘
+atexit.register(_close_app_trace_writers)
+
+
+def create_mcp_app(
+    loader: EngramLoader,
+    packs_dir: Path,
+    *,
+    trace_writer: TraceWriter | None = None,
+    tool_pool: BlockingToolPool | None = None,
+    token_meter: TokenMeter | None = None,
+    prepare_workspace: Callable[[], object] | None = None,
+    metrics: ToolMetrics | None = None,
+) -> FastMCP:
+    # mcp（及 asyncio 线程池）导入较重，只在真正启动 MCP 服务时加载，CLI 子命令不受影响
+    from mcp.server.fastmcp import FastMCP
+
+    from engram_server.tool_pool import BlockingToolPool
+
+    # 自动轨迹先进内存队列，由后台线程分组写盘；只读工具不再同步落盘
+    lifespan = None
+    if trace_writer is None:
+        owned_writer = trace_writer = TraceWriter(loader.capture_tool_traces)
+        _APP_TRACE_WRITERS.add(owned_writer)
+
+        # 自建的写入器没有调用方负责关闭，服务停止时由 app 自己关闭
+        @asynccontextmanager
+        async def lifespan(_app: FastMCP) -> AsyncIterator[dict[str, Any]]:
+            try:
+                yield {}
+            finally:
+                owned_writer.close()
+
+    app = FastMCP(name="engram-server", lifespan=lifespan)
+    # 阻塞型工具（文件读写、lint、统计、git clone）在有界线程池里执行，事件循环不被占住
+    if tool_pool is None:
+        tool_pool = BlockingToolPool()
+
+    # 每次工具响应按 (pack, tool) 累计估算 token 数
+    if token_meter is None:
+        token_meter = TokenMeter()
+
+    # 每个工具按 (pack, tool) 记录调用次数、错误数与耗时直方图；与 loader 共用一份
+    if metrics is None:
+        metrics = loader.metrics or ToolMetrics()
+
+    def blocking_tool() -> Any:
+        def register(fn: Any) -> Any:
+            @functools.wraps(fn)
+            def measured(*args: Any, **kwargs: Any) -> Any:
+                # 项目工作区在握手之后、首次工具调用时才落盘
+                if prepare_workspace is not None:
+                    prepare_workspace()
+                name = str(kwargs.get("name") or "")
+                start = time.perf_counter()
+                failed = True
+                try:
+                    result = fn(*args, **kwargs)
+                    failed = isinstance(result, ToolFailure)
+                finally:
+                    elapsed = time.perf_counter() - start
+                    # 标签只用 loader 能解析的 pack 名，拼错的名称不会新增指标序列
+                    pack = metrics.pack_label(name, lambda item: _engram_exists(loader, item))
+                    metrics.observe(pack, fn.__name__, elapsed, error=failed)
+                token_meter.record(pack, fn.__name__, result)
+                return result
+
+            return app.tool()(tool_pool.wrap(measured))
+
+        return register
 
     def _compact_text(value: object, *, max_len: int = 120) -> str:
         text = " ".join(str(value).split())
@@ -633,15 +795,20 @@ def create_mcp_app(loader: EngramLoader, packs_dir: Path) -> FastMCP:
             seen.add(normalized)
             deduped_tags.append(normalized)
 
-        loader.capture_tool_trace(
-            name=name,
-            tool_name=tool_name,
-            intent=_compact_text(intent),
-            result_summary=_compact_text(result_summary),
-            args_summary=_compact_text(args_summary),
-            status=_compact_text(status, max_len=24).lower() or "ok",
-            tags=deduped_tags,
-            summary=f"{tool_name} [{status.strip().lower() or 'ok'}] {_compact_text(intent, max_len=72)}",
+        trace_writer.submit(
+            name,
+            {
+                "tool_name": tool_name,
+                "intent": _compact_text(intent),
+                "result_summary": _compact_text(result_summary),
+                "args_summary": _compact_text(args_summary),
+                "status": _compact_text(status, max_len=24).lower() or "ok",
+                "tags": deduped_tags,
+                "summary": (
+                    f"{tool_name} [{status.strip().lower() or 'ok'}] "
+                    f"{_compact_text(intent, max_len=72)}"
+                ),
+            },
         )
 
     @app.prompt(
@@ -649,14 +816,16 @@ def create_mcp_app(loader: EngramLoader, packs_dir: Path) -> FastMCP:
         description="Engram 专家记忆系统提示词。将此注入 system prompt 以启用自动专家加载。",
     )
     def engram_system_prompt() -> str:
+        if prepare_workspace is not None:
+            prepare_workspace()
         return _build_engram_system_prompt(loader.list_engrams())
 
     @app.tool()
-    def ping() -> str:
+    async def ping() -> str:
         """Connectivity check tool."""
         return "pong"
 
-    @app.tool()
+    @blocking_tool()
     def list_engrams() -> str:
         """List all available Engram packs.
 
@@ -666,12 +835,12 @@ load_engram(name, query). After that, inspect the knowledge index and
 call read_engram_file(name, path) to fetch specific knowledge or case files."""
         return _format_engrams(loader.list_engrams())
 
-    @app.tool()
+    @blocking_tool()
     def get_engram_info(name: str) -> str:
         """Get one Engram's full meta.json content."""
         info = loader.get_engram_info(name)
         if info is None:
-            return f"未找到 Engram: {name}"
+            return ToolFailure(f"未找到 Engram: {name}")
         payload = json.dumps(info, ensure_ascii=False, indent=2)
         _auto_capture_tool_trace(
             name,
@@ -682,17 +851,27 @@ call read_engram_file(name, path) to fetch specific knowledge or case files."""
         )
         return payload
 
-    @app.tool()
-    def load_engram(name: str, query: str) -> str:
+    @blocking_tool()
+    def load_engram(
+        name: str, query: str, max_tokens: int = 0, include_headings: bool = False
+    ) -> str:
         """Load one Engram's base memory and indices.
 
 Returns full role/workflow/rules layers and knowledge/examples indexes.
 Use query as a focus hint, then call read_engram_file(name, path) to fetch
-specific knowledge or case files selected from the indexes."""
+specific knowledge or case files selected from the indexes.
+
+Set max_tokens (> 0) to cap the estimated context size: index entries are ranked
+by the query, low-ranked ones collapse into one-line group stubs, and a
+「上下文预算」section lists what was omitted.
+
+Set include_headings=True to append a 「章节目录」listing the ##/### headings of each
+knowledge/examples file, then fetch one with read_engram_section(name, path, heading)."""
         if not _engram_exists(loader, name):
-            return f"未找到 Engram: {name}"
+            return ToolFailure(f"未找到 Engram: {name}")
 
-        base = loader.load_engram_base(name)
+        budget = max_tokens if max_tokens > 0 else None
+        base = loader.load_engram_base(name, query=query, max_tokens=budget)
         if base is None:
             _auto_capture_tool_trace(
                 name,
@@ -702,7 +881,7 @@ specific knowledge or case files selected from the indexes."""
                 args_summary=f"query={query}",
                 status="error",
             )
-            return f"未找到 Engram: {name}"
+            return ToolFailure(f"未找到 Engram: {name}")
         if not base.strip():
             _auto_capture_tool_trace(
                 name,
@@ -714,10 +893,19 @@ specific knowledge or case files selected from the indexes."""
             )
             return f"Engram {name} 没有可用上下文。"
 
+        outline = ""
+        if include_headings:
+            outline_lines = [
+                f"- `{path}`: {' / '.join(titles)}"
+                for path, titles in loader.section_outline(name).items()
+            ]
+            if outline_lines:
+                outline = "## 章节目录\n" + "\n".join(outline_lines) + "\n\n"
         result = (
             f"# 已加载 Engram: {name}\n\n"
             f"## 用户关注方向\n{query}\n\n"
             f"{base}\n\n"
+            f"{outline}"
             "## 下一步\n"
             "请查看知识索引中的摘要，按需调用 read_engram_file(name, path) 读取完整知识或案例。"
         )
@@ -726,20 +914,40 @@ specific knowledge or case files selected from the indexes."""
             tool_name="load_engram",
             intent=f"加载专家上下文（query: {query}）",
             result_summary="成功加载 role/workflow/rules 与索引",
-            args_summary=f"query={query}",
+            args_summary=f"query={query}, max_tokens={max_tokens}" if budget else f"query={query}",
         )
         return result
 
-    @app.tool()
-    def read_engram_file(name: str, path: str) -> str:
+    @blocking_tool()
+    def read_engram_file(
+        name: str,
+        path: str,
+        offset: int = 0,
+        limit: int = 0,
+        unit: str = "entry",
+        cursor: str = "",
+        include_related: bool = False,
+    ) -> str:
         """Read one markdown file from an Engram pack.
 
 Use this after load_engram to read selected files like
 knowledge/*.md or examples/*.md. Path traversal outside the Engram directory
-is blocked."""
+is blocked.
+
+For large memory files (e.g. memory/tool-trace.md) read page by page: set limit
+(> 0) with unit="entry" (memory entries, default 20 per page) or unit="bytes", and
+pass back the returned cursor (e.g. "entry:20:20", i.e. unit:offset:limit) to get
+the next page of the same size.
+
+Set include_related=True on an examples/ file to also get the knowledge files it
+declares in `uses:`, or on a knowledge/ file to list the examples that use it."""
         if not _engram_exists(loader, name):
-            return f"未找到 Engram: {name}"
+            return ToolFailure(f"未找到 Engram: {name}")
 
+        if Path(path).as_posix().startswith("memory/"):
+            trace_writer.flush(name)
+        if cursor.strip() or limit > 0 or offset > 0:
+            return _read_engram_file_page(name, path, offset, limit, unit, cursor)
         content = loader.load_file(name, path)
         if content is None:
             _auto_capture_tool_trace(
@@ -750,7 +958,7 @@ is blocked."""
                 args_summary=f"path={path}",
                 status="error",
             )
-            return f"未找到文件: {path}"
+            return ToolFailure(f"未找到文件: {path}")
         if not content.strip():
             _auto_capture_tool_trace(
                 name,
@@ -767,30 +975,265 @@ is blocked."""
             result_summary="读取成功",
             args_summary=f"path={path}",
         )
-        return f"## {path}\n{content.strip()}"
+        result = f"## {path}\n{content.strip()}"
+        if include_related:
+            result += _render_related(name, path)
+        return result
 
-    @app.tool()
+    def _render_related(name: str, path: str) -> str:
+        normalized = Path(path).as_posix()
+        related = loader.related_files(name, normalized)
+        if not related:
+            return ""
+        if not normalized.startswith("examples/"):
+            listed = "\n".join(f"- `{item}`" for item in related)
+            return f"\n\n## 引用此知识的案例\n{listed}"
+        blocks = ["", "## 关联知识（uses）"]
+        for item in loader.load_files(name, related):
+            if item["error"]:
+                blocks.append(f"### {item['path']}\n⚠️ {item['error']}")
+            else:
+                blocks.append(f"### {item['path']}\n{item['content'].strip()}")
+        return "\n\n".join(blocks)
+
+    def _read_engram_file_page(
+        name: str, path: str, offset: int, limit: int, unit: str, cursor: str
+    ) -> str:
+        if cursor.strip():
+            # cursor 为 unit:offset:limit；兼容旧的两段式 unit:offset
+            parts = cursor.strip().split(":")
+            if len(parts) not in {2, 3}:
+                return ToolFailure(f"无效的 cursor: {cursor}")
+            unit = parts[0]
+            try:
+                offset = int(parts[1])
+                cursor_limit = int(parts[2]) if len(parts) == 3 else 0
+            except ValueError:
+                return ToolFailure(f"无效的 cursor: {cursor}")
+            if limit <= 0:
+                limit = cursor_limit
+        unit = unit.strip().lower() or "entry"
+        if unit not in {"entry", "bytes"}:
+            return ToolFailure("不支持的 unit。可选：entry/bytes")
+
+        page = loader.load_file_page(name, path, offset=offset, limit=limit, unit=unit)
+        if page is None:
+            _auto_capture_tool_trace(
+                name,
+                tool_name="read_engram_file",
+                intent=f"分页读取文件 {path}",
+                result_summary=f"读取失败：文件不存在 {path}",
+                args_summary=f"path={path}, {unit}:{offset}",
+                status="error",
+            )
+            return ToolFailure(f"未找到文件: {path}")
+
+        if unit == "entry":
+            span = f"第 {page['start'] + 1}-{page['end']} 条记忆，共 {page['total']} 条"
+        else:
+            span = f"字节 {page['start']}-{page['end']}，共 {page['total']} 字节"
+        header = f"## {path}（{span}）"
+        # 续读 cursor 带上本页大小，客户端只回传 cursor 也能拿到同样大小的下一页
+        footer = (
+            f"下一页 cursor: {unit}:{page['next']}:{page['limit']}"
+            if page["next"] is not None
+            else "（已到末尾）"
+        )
+        _auto_capture_tool_trace(
+            name,
+            tool_name="read_engram_file",
+            intent=f"分页读取文件 {path}",
+            result_summary=f"读取 {unit} {page['start']}-{page['end']} / {page['total']}",
+            args_summary=f"path={path}, {unit}:{offset}, limit={limit}",
+        )
+        return f"{header}\n{page['content'].strip()}\n\n{footer}"
+
+    @blocking_tool()
+    def read_engram_section(name: str, path: str, heading: str) -> str:
+        """Read only one heading section of a markdown file in an Engram pack.
+
+Use this for large knowledge/examples files when you need a single ## section.
+heading matches a heading title (e.g. "进阶标准") or a path like "膝关节 > 进阶标准";
+the section runs until the next heading of the same or higher level."""
+        if not _engram_exists(loader, name):
+            return ToolFailure(f"未找到 Engram: {name}")
+
+        sections = loader.list_sections(name, path)
+        if sections is None:
+            return ToolFailure(f"未找到文件: {path}")
+        content = loader.load_section(name, path, heading)
+        if content is None:
+            _auto_capture_tool_trace(
+                name,
+                tool_name="read_engram_section",
+                intent=f"读取章节 {path} § {heading}",
+                result_summary="未找到章节",
+                args_summary=f"path={path}, heading={heading}",
+                status="error",
+            )
+            available = "\n".join(
+                f"- {'  ' * (section.level - 1)}{section.title}" for section in sections
+            )
+            return ToolFailure(f"未找到章节: {heading}\n可用章节：\n{available or '（无标题）'}")
+        _auto_capture_tool_trace(
+            name,
+            tool_name="read_engram_section",
+            intent=f"读取章节 {path} § {heading}",
+            result_summary="读取成功",
+            args_summary=f"path={path}, heading={heading}",
+        )
+        return f"## {path} § {heading}\n{content.strip()}"
+
+    @blocking_tool()
+    def read_engram_files(name: str, paths: list[str]) -> str:
+        """Read several files from an Engram pack in one call.
+
+Use this instead of repeated read_engram_file calls after load_engram. Files are read
+in parallel; the batch is capped at 256 KB in total, and missing, out-of-pack or
+over-cap paths are reported individually without failing the others.
+
+Args:
+    name: Engram pack name
+    paths: Relative paths such as ["knowledge/a.md", "examples/b.md"] (max 20)"""
+        if not _engram_exists(loader, name):
+            return ToolFailure(f"未找到 Engram: {name}")
+        if not paths:
+            return ToolFailure("paths 不能为空")
+        if len(paths) > _BATCH_READ_MAX_PATHS:
+            return ToolFailure(f"一次最多读取 {_BATCH_READ_MAX_PATHS} 个文件")
+
+        if any(Path(path).as_posix().startswith("memory/") for path in paths):
+            trace_writer.flush(name)
+        results = loader.load_files(name, paths)
+        blocks: list[str] = []
+        failed = 0
+        for result in results:
+            if result["error"]:
+                failed += 1
+                blocks.append(f"## {result['path']}\n⚠️ {result['error']}")
+            elif not result["content"].strip():
+                blocks.append(f"## {result['path']}\n（文件为空）")
+            else:
+                blocks.append(f"## {result['path']}\n{result['content'].strip()}")
+
+        _auto_capture_tool_trace(
+            name,
+            tool_name="read_engram_files",
+            intent=f"批量读取 {len(results)} 个文件",
+            result_summary=f"成功 {len(results) - failed} 个，失败 {failed} 个",
+            args_summary=f"paths={', '.join(result['path'] for result in results)}",
+            status="error" if failed == len(results) else "ok",
+        )
+        return "\n\n".join(blocks)
+
+    @blocking_tool()
+    def search_knowledge(name: str, query: str, top_k: int = 5) -> str:
+        """Full-text search over an Engram's knowledge/ and examples/ files (BM25).
+
+Returns matching paths with scores and snippets in one call, so you can pick
+which files to read_engram_file instead of guessing from the index.
+
+Args:
+    name: Engram pack name
+    query: Search keywords (Chinese or English)
+    top_k: Maximum number of results (default 5)"""
+        if not _engram_exists(loader, name):
+            return ToolFailure(f"未找到 Engram: {name}")
+        if not query.strip():
+            return ToolFailure("query 不能为空")
+
+        hits = loader.search_knowledge(name, query, top_k=max(1, min(top_k, 50))) or []
+        _auto_capture_tool_trace(
+            name,
+            tool_name="search_knowledge",
+            intent=f"检索知识 {query}",
+            result_summary=f"命中 {len(hits)} 个文件",
+            args_summary=f"query={query}, top_k={top_k}",
+        )
+        if not hits:
+            return f"未找到与「{query}」相关的知识"
+        lines = [f"## 检索结果：{query}"]
+        for hit in hits:
+            lines.append(f"- `{hit['path']}` (score={hit['score']})")
+            if hit["snippet"]:
+                lines.append(f"  {hit['snippet']}")
+        return "\n".join(lines)
+
+    @blocking_tool()
+    def context_report(name: str) -> str:
+        """Show the estimated token cost of each load_engram section of an Engram.
+
+Also lists this server process's accumulated response tokens for the pack, per tool,
+so you can see which packs and tools bloat the context."""
+        if not _engram_exists(loader, name):
+            return ToolFailure(f"未找到 Engram: {name}")
+
+        sections = loader.load_engram_sections(name) or []
+        costs = [(key, estimate_tokens(text), len(text)) for key, text in sections]
+        total = sum(tokens for _, tokens, _ in costs)
+        lines = [
+            f"## 上下文成本：{name}",
+            "",
+            "| 区块 | 估算 tokens | 字符数 | 占比 |",
+            "|---|---|---|---|",
+        ]
+        for key, tokens, chars in costs:
+            share = f"{tokens * 100 / total:.1f}%" if total else "0%"
+            lines.append(f"| {_SECTION_LABELS.get(key, key)} | {tokens} | {chars} | {share} |")
+        lines.append(f"| 合计 | {total} | {sum(chars for _, _, chars in costs)} | 100% |")
+
+        usage = token_meter.snapshot(name)
+        lines.extend(["", "## 本进程响应累计（按工具）"])
+        if not usage["by_tool"]:
+            lines.append("暂无记录")
+        for tool, cell in usage["by_tool"].items():
+            lines.append(
+                f"- {tool}: calls={cell['calls']} tokens={cell['tokens']} "
+                f"max={cell['max_tokens']}"
+            )
+        return "\n".join(lines)
+
+    @blocking_tool()
+    def metrics_engrams(name: str | None = None, format: str = "plain") -> str:
+        """Show per-tool latency and call/error counters of this server process.
+
+Covers every MCP tool plus the main loader operations (prefixed "loader.").
+Pass name to restrict to one Engram. format: plain / json / prometheus."""
+        normalized = format.strip().lower()
+        if normalized in {"plain", ""}:
+            return metrics.render_plain(name or None)
+        if normalized == "json":
+            return json.dumps(metrics.snapshot(name or None), ensure_ascii=False, indent=2)
+        if normalized == "prometheus":
+            return metrics.render_prometheus()
+        return ToolFailure("不支持的 format。可选：plain/json/prometheus")
+
+    @blocking_tool()
     def install_engram(source: str) -> str:
         """Install an Engram pack from git URL or registry name."""
         if _is_url_source(source):
             result = install_engram_from_source(source=source, packs_dir=packs_dir)
         else:
             result = _install_engram_by_name(source, packs_dir)
-        return str(result["message"])
+        message = str(result["message"])
+        return message if result.get("ok") else ToolFailure(message)
 
-    @app.tool()
+    @blocking_tool()
     def init_engram(name: str, nested: bool = False) -> str:
         """Initialize a new Engram from template.
 
 If nested=True, generates a template with grouped knowledge indexes."""
         result = init_engram_pack(name, packs_dir, nested=nested)
-        return str(result["message"])
+        message = str(result["message"])
+        return message if result.get("ok") else ToolFailure(message)
 
-    @app.tool()
+    @blocking_tool()
     def lint_engrams(name: str | None = None) -> str:
         """Run consistency checks for one or all Engrams.
 
 Returns per-Engram error/warning counts and detailed issues."""
+        from engram_server.lint import lint_engram
+
         if name:
             targets = [name]
         else:
@@ -804,14 +1247,18 @@ Returns per-Engram error/warning counts and detailed issues."""
         total_warnings = 0
 
         for target in targets:
-            engram_dir = loader._resolve_engram_dir(target)
-            if engram_dir is None:
+            with loader.lint_source(target) as engram_dir:
+                messages = (
+                    lint_engram(engram_dir, roots=loader.packs_dirs)
+                    if engram_dir is not None
+                    else None
+                )
+            if messages is None:
                 lines.append(f"{target}: 1 errors, 0 warnings")
                 lines.append("  [error] .: 未找到 Engram")
                 total_errors += 1
                 continue
 
-            messages = lint_engram(engram_dir)
             error_count = sum(1 for m in messages if m.level == "error")
             warning_count = sum(1 for m in messages if m.level == "warning")
             total_errors += error_count
@@ -826,7 +1273,7 @@ Returns per-Engram error/warning counts and detailed issues."""
         )
         return "\n".join(lines)
 
-    @app.tool()
+    @blocking_tool()
     def search_engrams(query: str) -> str:
         """Search Engram registry entries by name/description/tags."""
         entries = _load_registry_entries()
@@ -835,22 +1282,39 @@ Returns per-Engram error/warning counts and detailed issues."""
             return "未找到匹配的 Engram"
         return "\n".join(_render_search_item(item) for item in matched)
 
-    @app.tool()
+    @blocking_tool()
     def stats_engrams(format: str = "plain") -> str:
         """Get Engram statistics in plain/json/csv format."""
         from engram_server.stats import gather_stats, render_csv, render_json, render_plain
 
+        trace_writer.flush()
         report = gather_stats(loader)
         normalized = format.strip().lower()
         if normalized in {"plain", ""}:
-            return render_plain(report)
+            writer = trace_writer.stats()
+            pool = tool_pool.stats()
+            tokens = token_meter.snapshot()["total"]
+            return (
+                f"{render_plain(report)}\n\n"
+                f"Trace writer: queue={writer['queue_depth']} written={writer['written']} "
+                f"dropped={writer['dropped']} failed={writer['failed']} "
+                f"last_flush_ms={writer['last_flush_ms']} max_flush_ms={writer['max_flush_ms']}\n"
+                f"Tool pool: workers={pool['max_workers']} in_flight={pool['in_flight']} "
+                f"peak={pool['peak_in_flight']} completed={pool['completed']}\n"
+                f"Response tokens: calls={tokens['calls']} tokens={tokens['tokens']} "
+                f"max={tokens['max_tokens']}"
+            )
         if normalized == "json":
-            return render_json(report)
+            data = json.loads(render_json(report))
+            data["trace_writer"] = trace_writer.stats()
+            data["tool_pool"] = tool_pool.stats()
+            data["response_tokens"] = token_meter.snapshot()
+            return json.dumps(data, ensure_ascii=False, indent=2)
         if normalized == "csv":
             return render_csv(report)
-        return "不支持的 format。可选：plain/json/csv"
+        return ToolFailure("不支持的 format。可选：plain/json/csv")
 
-    @app.tool()
+    @blocking_tool()
     def create_engram_assistant(
         mode: str,
         name: str | None = None,
@@ -866,6 +1330,8 @@ Returns per-Engram error/warning counts and detailed issues."""
 mode:
   - "from_conversation": summarize current dialog into a draft
   - "guided": build from user intent fields (auto-fill when missing)"""
+        from engram_server.creator import build_engram_draft, draft_response_payload
+
         try:
             draft = build_engram_draft(
                 mode=mode,
@@ -878,12 +1344,12 @@ mode:
                 conversation=conversation,
             )
         except ValueError as exc:
-            return f"草稿生成失败：{exc}"
+            return ToolFailure(f"草稿生成失败：{exc}")
 
         payload = draft_response_payload(draft)
         return json.dumps(payload, ensure_ascii=False, indent=2)
 
-    @app.tool()
+    @blocking_tool()
     def finalize_engram_draft(
         draft_json: str,
         name: str | None = None,
@@ -893,26 +1359,29 @@ mode:
         """Create an Engram pack from a confirmed draft.
 
 Set confirm=False to cancel (no files written)."""
+        from engram_server.creator import materialize_draft, parse_draft_payload
+        from engram_server.lint import lint_engram
+
         if not confirm:
             return "已取消创建：未确认落盘。"
 
         try:
             draft = parse_draft_payload(draft_json)
         except (ValueError, json.JSONDecodeError):
-            return "落盘失败：draft_json 不是合法草稿 JSON。"
+            return ToolFailure("落盘失败：draft_json 不是合法草稿 JSON。")
 
         draft_name = str(draft.get("meta", {}).get("name", "")).strip()
         target_name = (name or draft_name).strip()
         if not _is_valid_engram_name(target_name):
-            return f"落盘失败：非法名称 {target_name}"
+            return ToolFailure(f"落盘失败：非法名称 {target_name}")
 
         result = init_engram_pack(target_name, packs_dir, nested=nested)
         if not result.get("ok"):
-            return str(result.get("message", "落盘失败"))
+            return ToolFailure(str(result.get("message", "落盘失败")))
 
         engram_dir = loader._resolve_engram_dir(target_name)
         if engram_dir is None:
-            return "落盘失败：创建目录后无法定位 Engram。"
+            return ToolFailure("落盘失败：创建目录后无法定位 Engram。")
 
         draft.setdefault("meta", {})
         draft["meta"]["name"] = target_name
@@ -927,9 +1396,9 @@ Set confirm=False to cancel (no files written)."""
             materialize_draft(engram_dir, draft)
         except Exception as exc:  # noqa: BLE001
             shutil.rmtree(engram_dir, ignore_errors=True)
-            return f"落盘失败：写入草稿时发生错误：{exc}"
+            return ToolFailure(f"落盘失败：写入草稿时发生错误：{exc}")
 
-        messages = lint_engram(engram_dir)
+        messages = lint_engram(engram_dir, roots=loader.packs_dirs)
         error_count = sum(1 for m in messages if m.level == "error")
         warning_count = sum(1 for m in messages if m.level == "warning")
 
@@ -948,7 +1417,7 @@ Set confirm=False to cancel (no files written)."""
             lines.append("✅ 草稿已通过 lint 校验。")
         return "\n".join(lines)
 
-    @app.tool()
+    @blocking_tool()
     def write_engram_file(
         name: str, path: str, content: str, mode: str = "overwrite"
     ) -> str:
@@ -959,7 +1428,7 @@ knowledge/*.md, examples/*.md, or any other file.
 Set mode to "append" to add content to an existing file.
 Path traversal outside the Engram directory is blocked."""
         if not _engram_exists(loader, name):
-            return f"未找到 Engram: {name}"
+            return ToolFailure(f"未找到 Engram: {name}")
 
         append = mode == "append"
         ok = loader.write_file(name, path, content, append=append)
@@ -972,7 +1441,7 @@ Path traversal outside the Engram directory is blocked."""
                 args_summary=f"mode={mode}, path={path}",
                 status="error",
             )
-            return f"写入失败: {path}"
+            return ToolFailure(f"写入失败: {path}")
         action = "追加" if append else "写入"
         _auto_capture_tool_trace(
             name,
@@ -983,7 +1452,7 @@ Path traversal outside the Engram directory is blocked."""
         )
         return f"已{action}: {path}"
 
-    @app.tool()
+    @blocking_tool()
     def capture_memory(
         name: str,
         content: str,
@@ -1019,7 +1488,7 @@ Args:
              are moved to memory/{category}-expired.md and hidden from future loads.
     is_global: If True, write to shared _global/memory/ instead of this Engram"""
         if not is_global and not _engram_exists(loader, name):
-            return f"未找到 Engram: {name}"
+            return ToolFailure(f"未找到 Engram: {name}")
 
         ok = loader.capture_memory(
             name, content, category, summary,
@@ -1038,7 +1507,7 @@ Args:
                 args_summary=f"category={category}, type={memory_type}, is_global={is_global}",
                 status="error",
             )
-            return f"记忆捕获失败: {category}"
+            return ToolFailure(f"记忆捕获失败: {category}")
         scope = "[全局] " if is_global else ""
         type_label = f"[{memory_type}] " if memory_type != "general" else ""
         expires_label = f" (expires:{expires})" if expires else ""
@@ -1052,7 +1521,71 @@ Args:
         )
         return f"已记录: {scope}{type_label}[{category}] {summary}{expires_label}"
 
-    @app.tool()
+    @blocking_tool()
+    def capture_memories(
+        name: str,
+        entries: list[dict[str, Any]],
+        conversation_id: str | None = None,
+    ) -> str:
+        """Capture several memory entries at once (e.g. at the end of a conversation).
+
+Prefer this over repeated capture_memory calls when you have more than one fact
+to store: all entries are written in one pass and the index is rebuilt once.
+
+Args:
+    name: Engram pack name
+    entries: List of objects with the capture_memory fields — required "content",
+             "category", "summary"; optional "memory_type", "tags", "expires",
+             "is_global", "conversation_id"
+    conversation_id: Default conversation scope for entries that do not set one"""
+        needs_pack = any(
+            not (isinstance(item, dict) and item.get("is_global")) for item in entries
+        )
+        if needs_pack and not _engram_exists(loader, name):
+            return ToolFailure(f"未找到 Engram: {name}")
+        if not entries:
+            return ToolFailure("未提供任何记忆条目")
+
+        if conversation_id:
+            entries = [
+                {"conversation_id": conversation_id, **item} if isinstance(item, dict) else item
+                for item in entries
+            ]
+        results = loader.capture_memories(name, entries)
+
+        lines: list[str] = []
+        categories: list[str] = []
+        for item, ok in zip(entries, results):
+            if not isinstance(item, dict):
+                lines.append("- 失败: 条目格式无效")
+                continue
+            category = str(item.get("category", ""))
+            summary = str(item.get("summary", ""))
+            if not ok:
+                lines.append(f"- 失败: [{category}] {summary}")
+                continue
+            if category and category not in categories:
+                categories.append(category)
+            scope = "[全局] " if item.get("is_global") else ""
+            memory_type = item.get("memory_type") or "general"
+            type_label = f"[{memory_type}] " if memory_type != "general" else ""
+            lines.append(f"- 已记录: {scope}{type_label}[{category}] {summary}")
+
+        written = sum(1 for ok in results if ok)
+        failed = len(results) - written
+        _auto_capture_tool_trace(
+            name,
+            tool_name="capture_memories",
+            intent=f"批量记录记忆 ({len(results)} 条)",
+            result_summary=f"成功 {written} 条，失败 {failed} 条",
+            args_summary=f"count={len(results)}, categories={','.join(categories)}",
+            status="ok" if not failed else "error",
+            tags=[f"memory_category:{category}" for category in categories],
+        )
+        header = f"批量记忆：成功 {written} 条" + (f"，失败 {failed} 条" if failed else "")
+        return "\n".join([header, *lines])
+
+    @blocking_tool()
     def capture_tool_trace(
         name: str,
         tool_name: str,
@@ -1070,7 +1603,7 @@ Use this when you call an MCP tool or external tool and want to remember:
 what was called, why it was called, and what happened.
 Stored to memory/tool-trace.md as memory_type=tool_trace."""
         if not _engram_exists(loader, name):
-            return f"未找到 Engram: {name}"
+            return ToolFailure(f"未找到 Engram: {name}")
 
         ok = loader.capture_tool_trace(
             name=name,
@@ -1084,16 +1617,17 @@ Stored to memory/tool-trace.md as memory_type=tool_trace."""
             conversation_id=conversation_id,
         )
         if not ok:
-            return "工具轨迹记录失败，请检查 tool_name/intent/result_summary 是否为空。"
+            return ToolFailure("工具轨迹记录失败，请检查 tool_name/intent/result_summary 是否为空。")
         return f"已记录工具轨迹: {tool_name} [{status.strip().lower() or 'ok'}] {intent}"
 
-    @app.tool()
+    @blocking_tool()
     def list_tool_traces(name: str, limit: int = 10) -> str:
         """List recent tool execution traces from memory index."""
         if not _engram_exists(loader, name):
-            return f"未找到 Engram: {name}"
+            return ToolFailure(f"未找到 Engram: {name}")
 
         normalized_limit = max(1, min(limit, 50))
+        trace_writer.flush(name)
         traces = loader.list_recent_memory_summaries(
             name,
             "tool-trace",
@@ -1120,7 +1654,7 @@ Stored to memory/tool-trace.md as memory_type=tool_trace."""
         )
         return "\n".join(lines)
 
-    @app.tool()
+    @blocking_tool()
     def consolidate_memory(
         name: str,
         category: str,
@@ -1132,6 +1666,7 @@ Stored to memory/tool-trace.md as memory_type=tool_trace."""
 Call this when a memory category has accumulated many entries (30+).
 Workflow:
   1. Call read_engram_file(name, "memory/{category}.md") to read all raw entries
+     (for very large categories, page with limit=20 and the returned cursor)
   2. Write a dense, deduplicated summary as consolidated_content
   3. Call this tool — originals are archived to memory/{category}-archive.md
 
@@ -1143,7 +1678,7 @@ Args:
     consolidated_content: Dense summary replacing all raw entries
     summary: One-line summary for the memory index"""
         if not _engram_exists(loader, name):
-            return f"未找到 Engram: {name}"
+            return ToolFailure(f"未找到 Engram: {name}")
 
         ok = loader.consolidate_memory(name, category, consolidated_content, summary)
         if not ok:
@@ -1156,7 +1691,7 @@ Args:
                 status="error",
                 tags=[f"memory_category:{category}"],
             )
-            return f"记忆压缩失败: {category}"
+            return ToolFailure(f"记忆压缩失败: {category}")
         _auto_capture_tool_trace(
             name,
             tool_name="consolidate_memory",
@@ -1167,94 +1702,111 @@ Args:
         )
         return f"已压缩: [{category}] 原始条目已归档至 memory/{category}-archive.md"
 
-    @app.tool()
-    def delete_memory(name: str, category: str, summary: str) -> str:
-        """Delete a specific memory entry by its summary.
+    @blocking_tool()
+    def delete_memory(
+        name: str, category: str = "", summary: str = "", entry_id: str = ""
+    ) -> str:
+        """Delete a specific memory entry by its id or summary.
 
 Use this when the user wants to remove an incorrect or outdated memory.
-First read memory/_index.md to find the exact summary text, then call this tool.
-The entry is removed from both the index and the category file."""
+First read memory/_index.md: every entry line ends with "(id:...)". Pass that
+entry_id (category may then be omitted), or the category plus the exact summary
+text. The entry is removed from both the index and the category file."""
         if not _engram_exists(loader, name):
-            return f"未找到 Engram: {name}"
+            return ToolFailure(f"未找到 Engram: {name}")
+
+        target = entry_id.strip() or summary
+        label = f"[{category}] {target}" if category else target
+        if not entry_id.strip() and not (category and summary.strip()):
+            return ToolFailure("请提供 entry_id，或同时提供 category 与 summary")
 
-        ok = loader.delete_memory(name, category, summary)
+        ok = loader.delete_memory(name, category, summary, entry_id=entry_id.strip() or None)
         if not ok:
             _auto_capture_tool_trace(
                 name,
                 tool_name="delete_memory",
-                intent=f"删除记忆 [{category}]",
-                result_summary=f"未找到匹配条目: {summary}",
-                args_summary=f"category={category}",
+                intent=f"删除记忆 [{category or entry_id}]",
+                result_summary=f"未找到匹配条目: {target}",
+                args_summary=f"category={category}, entry_id={entry_id}",
                 status="error",
-                tags=[f"memory_category:{category}"],
+                tags=[f"memory_category:{category}"] if category else None,
             )
-            return f"未找到匹配的记忆条目: [{category}] {summary}"
+            return ToolFailure(f"未找到匹配的记忆条目: {label}")
         _auto_capture_tool_trace(
             name,
             tool_name="delete_memory",
-            intent=f"删除记忆 [{category}]",
-            result_summary=f"删除成功: {summary}",
-            args_summary=f"category={category}",
-            tags=[f"memory_category:{category}"],
+            intent=f"删除记忆 [{category or entry_id}]",
+            result_summary=f"删除成功: {target}",
+            args_summary=f"category={category}, entry_id={entry_id}",
+            tags=[f"memory_category:{category}"] if category else None,
         )
-        return f"已删除: [{category}] {summary}"
+        return f"已删除: {label}"
 
-    @app.tool()
+    @blocking_tool()
     def correct_memory(
         name: str,
-        category: str,
-        old_summary: str,
         new_content: str,
         new_summary: str,
+        category: str = "",
+        old_summary: str = "",
         memory_type: str = "general",
         tags: list[str] | None = None,
+        entry_id: str = "",
     ) -> str:
         """Correct an existing memory entry with updated content.
 
 Use this when the user says a captured memory is wrong or outdated.
-First read memory/_index.md to find the exact old_summary, then call this
-with the corrected content and a new summary.
+First read memory/_index.md to find the entry's id (the "(id:...)" suffix) or
+its exact old_summary, then call this with the corrected content and a new summary.
 
 Args:
     name: Engram pack name
-    category: Memory category (e.g. "user-profile", "preferences")
-    old_summary: Exact summary text from the index to identify the entry
     new_content: The corrected memory content
     new_summary: Updated one-line summary for the index
+    category: Memory category (e.g. "user-profile", "preferences"); optional with entry_id
+    old_summary: Exact summary text from the index to identify the entry
     memory_type: Semantic type — "preference" | "fact" | "decision" | "history"
                  | "general" | "inferred" (LLM-deduced) | "stated" (user explicitly said)
-    tags: Optional updated tags"""
+    tags: Optional updated tags
+    entry_id: Entry id from the index line, alternative to category + old_summary"""
         if not _engram_exists(loader, name):
-            return f"未找到 Engram: {name}"
+            return ToolFailure(f"未找到 Engram: {name}")
+
+        target = entry_id.strip() or old_summary
+        label = f"[{category}] {target}" if category else target
+        if not entry_id.strip() and not (category and old_summary.strip()):
+            return ToolFailure("请提供 entry_id，或同时提供 category 与 old_summary")
 
         ok = loader.correct_memory(
             name, category, old_summary, new_content, new_summary,
             memory_type=memory_type,
             tags=tags,
+            entry_id=entry_id.strip() or None,
         )
         if not ok:
             _auto_capture_tool_trace(
                 name,
                 tool_name="correct_memory",
-                intent=f"修正记忆 [{category}]",
-                result_summary=f"修正失败: {old_summary}",
-                args_summary=f"category={category}, type={memory_type}",
+                intent=f"修正记忆 [{category or entry_id}]",
+                result_summary=f"修正失败: {target}",
+                args_summary=f"category={category}, type={memory_type}, entry_id={entry_id}",
                 status="error",
-                tags=[f"memory_category:{category}"],
+                tags=[f"memory_category:{category}"] if category else None,
             )
-            return f"未找到匹配的记忆条目: [{category}] {old_summary}"
+            return ToolFailure(f"未找到匹配的记忆条目: {label}")
         type_label = f"[{memory_type}] " if memory_type != "general" else ""
         _auto_capture_tool_trace(
             name,
             tool_name="correct_memory",
-            intent=f"修正记忆 [{category}]",
+            intent=f"修正记忆 [{category or entry_id}]",
             result_summary=f"修正成功: {new_summary}",
-            args_summary=f"category={category}, type={memory_type}",
-            tags=[f"memory_category:{category}"],
+            args_summary=f"category={category}, type={memory_type}, entry_id={entry_id}",
+            tags=[f"memory_category:{category}"] if category else None,
         )
-        return f"已修正: {type_label}[{category}] {new_summary}"
+        category_label = f"[{category}] " if category else ""
+        return f"已修正: {type_label}{category_label}{new_summary}"
 
-    @app.tool()
+    @blocking_tool()
     def add_knowledge(
         name: str, filename: str, content: str, summary: str
     ) -> str:
@@ -1269,7 +1821,7 @@ Args:
     content: Full markdown content for the knowledge file
     summary: One-line description for the knowledge index"""
         if not _engram_exists(loader, name):
-            return f"未找到 Engram: {name}"
+            return ToolFailure(f"未找到 Engram: {name}")
 
         ok = loader.add_knowledge(name, filename, content, summary)
         if not ok:
@@ -1281,7 +1833,7 @@ Args:
                 args_summary=f"filename={filename}",
                 status="error",
             )
-            return f"写入失败: knowledge/{filename}"
+            return ToolFailure(f"写入失败: knowledge/{filename}")
         fn = filename if filename.endswith(".md") else f"{filename}.md"
         _auto_capture_tool_trace(
             name,
@@ -1292,7 +1844,7 @@ Args:
         )
         return f"已添加知识: knowledge/{fn} — {summary}"
 
-    @app.tool()
+    @blocking_tool()
     def open_ui(port: int = 9470) -> str:
         """Open the Engram visual management UI in the browser.
 
@@ -1306,7 +1858,7 @@ Args:
 
         from engram_server.web import create_web_app
 
-        web_app = create_web_app(packs_dir)
+        web_app = create_web_app(packs_dir, metrics=metrics)
 
         def _serve() -> None:
             import uvicorn
@@ -1321,23 +1873,76 @@ Args:
     return app
 
 
-def run_server(packs_dir: Path) -> None:
+def run_server(
+    packs_dir: Path,
+    *,
+    base_dirs: list[Path] | None = None,
+    startup_profile: bool = False,
+    metrics_file: Path | None = None,
+    trace_file: Path | None = None,
+) -> None:
+    profile = StartupProfile()
+    metrics = ToolMetrics()
+    # 仅在指定 --trace-file 时记录 I/O span，否则 loader 使用无开销的默认 tracer
+    tracer = RecordingTracer() if trace_file is not None else None
     packs_dir = packs_dir.expanduser().resolve()
     packs_dir.mkdir(parents=True, exist_ok=True)
-    project_packs = _ensure_project_engram_workspace()
+    # 项目工作区延迟到首次工具调用时创建，但其目录始终作为加载根目录
+    workspace = _ProjectWorkspace()
+    project_packs = workspace.path
 
-    loader_roots = _build_loader_roots(packs_dir)
-    loader = EngramLoader(
-        packs_dir=loader_roots,
-        default_packs_dir=packs_dir,
-    )
+    loader_roots = _build_loader_roots(packs_dir, include_project=True)
+    with profile.phase("EngramLoader()"):
+        loader = EngramLoader(
+            packs_dir=loader_roots,
+            default_packs_dir=packs_dir,
+            background_maintenance=True,
+            base_dirs=base_dirs or [],
+            metrics=metrics,
+            tracer=tracer,
+        )
     default_global = DEFAULT_PACKS_DIR.expanduser().resolve()
     cwd = Path.cwd().resolve()
     project_engram_from_cwd = (cwd / ".claude" / "engram").resolve()
     project_scoped_override = packs_dir in {cwd, project_engram_from_cwd}
     write_target = project_packs if (packs_dir == default_global or project_scoped_override) else packs_dir
-    app = create_mcp_app(loader=loader, packs_dir=write_target)
-    app.run(transport="stdio")
+    trace_writer = TraceWriter(loader.capture_tool_traces)
+    with profile.phase("import mcp.server.fastmcp"):
+        import mcp.server.fastmcp  # noqa: F401
+
+        from engram_server.tool_pool import BlockingToolPool
+    tool_pool = BlockingToolPool()
+    with profile.phase("create_mcp_app (tool registration)"):
+        app = create_mcp_app(
+            loader=loader,
+            packs_dir=write_target,
+            trace_writer=trace_writer,
+            tool_pool=tool_pool,
+            prepare_workspace=workspace.ensure,
+            metrics=metrics,
+        )
+    if startup_profile:
+        # stdout 是 stdio 协议通道，报告只写 stderr
+        with profile.phase("catalog scan (list_engrams)"):
+            loader.list_engrams()
+        profile.mark_ready()
+        print(profile.render(imports=import_breakdown()), file=sys.stderr, flush=True)
+    try:
+        app.run(transport="stdio")
+    finally:
+        tool_pool.shutdown(wait=True)
+        trace_writer.close()
+        loader.drain_maintenance(timeout=5)
+        if metrics_file is not None:
+            try:
+                metrics.dump_jsonl(metrics_file.expanduser())
+            except OSError as exc:
+                print(f"写入指标文件失败：{exc}", file=sys.stderr)
+        if tracer is not None and trace_file is not None:
+            try:
+                tracer.write_chrome(trace_file.expanduser())
+            except OSError as exc:
+                print(f"写入 trace 文件失败：{exc}", file=sys.stderr)
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -1346,9 +1951,31 @@ def build_parser() -> argparse.ArgumentParser:
 
     serve_parser = subparsers.add_parser("serve", help="Start MCP stdio server")
     serve_parser.add_argument("--packs-dir", default=str(DEFAULT_PACKS_DIR))
+    serve_parser.add_argument(
+        "--base-dir",
+        action="append",
+        default=[],
+        help="Read-only packs root layered under --packs-dir (writes go to its .overlay)",
+    )
+    serve_parser.add_argument(
+        "--startup-profile",
+        action="store_true",
+        help="Print an import and initialization timing breakdown to stderr",
+    )
+    serve_parser.add_argument(
+        "--metrics-file",
+        default=None,
+        help="Append per-tool metrics to this JSONL file on shutdown",
+    )
+    serve_parser.add_argument(
+        "--trace-file",
+        default=None,
+        help="Record loader I/O spans and write them as Chrome trace JSON on shutdown",
+    )
 
     list_parser = subparsers.add_parser("list", help="List installed Engrams")
     list_parser.add_argument("--packs-dir", default=str(DEFAULT_PACKS_DIR))
+    list_parser.add_argument("--base-dir", action="append", default=[])
 
     install_parser = subparsers.add_parser(
         "install",
@@ -1376,6 +2003,36 @@ def build_parser() -> argparse.ArgumentParser:
     lint_parser = subparsers.add_parser("lint", help="Validate Engram data consistency")
     lint_parser.add_argument("name", nargs="?")
     lint_parser.add_argument("--packs-dir", default=str(DEFAULT_PACKS_DIR))
+    lint_parser.add_argument("--base-dir", action="append", default=[])
+
+    compile_parser = subparsers.add_parser(
+        "compile", help="Compile Engrams into single-file bundles for faster loading"
+    )
+    compile_parser.add_argument("name", nargs="?")
+    compile_parser.add_argument("--packs-dir", default=str(DEFAULT_PACKS_DIR))
+
+    bench_parser = subparsers.add_parser(
+        "bench", help="Run the tool-latency benchmarks, optionally against a baseline"
+    )
+    bench_parser.add_argument(
+        "--scales",
+        default=None,
+        help="Comma-separated scale points: small,medium,large "
+        "(default small,medium, or the baseline's)",
+    )
+    bench_parser.add_argument("--scenarios", default="", help="Comma-separated scenario subset")
+    bench_parser.add_argument("--iterations", type=int, default=None)
+    bench_parser.add_argument("--output", default="", help="Write the JSON report to this file")
+    bench_parser.add_argument("--compare", default="", help="Baseline JSON report to compare with")
+    bench_parser.add_argument("--tolerance-p50", type=float, default=0.25)
+    bench_parser.add_argument("--tolerance-p95", type=float, default=0.50)
+    bench_parser.add_argument("--tolerance-rss", type=float, default=0.20)
+    bench_parser.add_argument(
+        "--min-delta-ms",
+        type=float,
+        default=0.5,
+        help="Ignore latency changes smaller than this many milliseconds",
+    )
 
     search_parser = subparsers.add_parser("search", help="Search Engrams from registry")
     search_parser.add_argument("query")
@@ -1389,6 +2046,61 @@ def build_parser() -> argparse.ArgumentParser:
     return parser
 
 
+def _run_bench_command(args: argparse.Namespace) -> None:
+    from engram_server import bench
+
+    baseline: dict[str, Any] | None = None
+    if args.compare:
+        try:
+            baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as exc:
+            print(f"无法读取基线文件：{args.compare}（{exc}）")
+            raise SystemExit(2) from exc
+
+    if args.scales:
+        names = [item.strip() for item in args.scales.split(",") if item.strip()]
+        unknown = [name for name in names if name not in bench.SCALES]
+        if unknown:
+            print(f"未知规模：{', '.join(unknown)}（可选：{', '.join(bench.SCALES)}）")
+            raise SystemExit(2)
+        scales = {name: bench.SCALES[name] for name in names}
+    elif baseline is not None:
+        # 未指定规模时按基线记录的规模点重跑，保证对比的是同一矩阵
+        scales = bench.specs_from_report(baseline)
+    else:
+        scales = {name: bench.SCALES[name] for name in ("small", "medium")}
+
+    iterations = args.iterations
+    if iterations is None:
+        iterations = int((baseline or {}).get("iterations", bench.DEFAULT_ITERATIONS))
+    scenarios = [item.strip() for item in args.scenarios.split(",") if item.strip()] or None
+
+    report = bench.run_suite(
+        scales,
+        iterations=max(1, iterations),
+        scenarios=scenarios,
+        progress=lambda line: print(line, file=sys.stderr),
+    )
+    if args.output:
+        Path(args.output).write_text(
+            json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8"
+        )
+    if baseline is None:
+        print(bench.render_table(report))
+        return
+
+    tolerances = bench.Tolerances(
+        p50=args.tolerance_p50,
+        p95=args.tolerance_p95,
+        rss=args.tolerance_rss,
+        min_delta_ms=args.min_delta_ms,
+    )
+    rows = bench.compare_reports(report, baseline, tolerances)
+    print(bench.render_comparison(rows))
+    if bench.has_regression(rows):
+        raise SystemExit(1)
+
+
 def main(argv: list[str] | None = None) -> None:
     args_list = list(sys.argv[1:] if argv is None else argv)
     if not args_list or args_list[0].startswith("-"):
@@ -1398,7 +2110,13 @@ def main(argv: list[str] | None = None) -> None:
     args = parser.parse_args(args_list)
 
     if args.command == "serve":
-        run_server(packs_dir=Path(args.packs_dir))
+        run_server(
+            packs_dir=Path(args.packs_dir),
+            base_dirs=[Path(item) for item in args.base_dir],
+            startup_profile=args.startup_profile,
+            metrics_file=Path(args.metrics_file) if args.metrics_file else None,
+            trace_file=Path(args.trace_file) if args.trace_file else None,
+        )
         return
 
     if args.command == "list":
@@ -1406,6 +2124,7 @@ def main(argv: list[str] | None = None) -> None:
         loader = EngramLoader(
             packs_dir=_build_loader_roots(packs_dir),
             default_packs_dir=packs_dir,
+            base_dirs=[Path(item) for item in args.base_dir],
         )
         print(_format_engrams(loader.list_engrams()))
         return
@@ -1458,10 +2177,13 @@ def main(argv: list[str] | None = None) -> None:
         return
 
     if args.command == "lint":
+        from engram_server.lint import lint_engram
+
         packs_dir = Path(args.packs_dir)
         loader = EngramLoader(
             packs_dir=_build_loader_roots(packs_dir),
             default_packs_dir=packs_dir,
+            base_dirs=[Path(item) for item in args.base_dir],
         )
 
         if args.name:
@@ -1471,14 +2193,18 @@ def main(argv: list[str] | None = None) -> None:
 
         total_errors = 0
         for name in targets:
-            engram_dir = loader._resolve_engram_dir(name)
-            if engram_dir is None:
+            with loader.lint_source(name) as engram_dir:
+                messages = (
+                    lint_engram(engram_dir, roots=loader.packs_dirs)
+                    if engram_dir is not None
+                    else None
+                )
+            if messages is None:
                 print(f"{name}: 1 errors, 0 warnings")
                 print("  [error] .: 未找到 Engram")
                 total_errors += 1
                 continue
 
-            messages = lint_engram(engram_dir)
             error_count = sum(1 for m in messages if m.level == "error")
             warning_count = sum(1 for m in messages if m.level == "warning")
             print(f"{name}: {error_count} errors, {warning_count} warnings")
@@ -1490,6 +2216,31 @@ def main(argv: list[str] | None = None) -> None:
             raise SystemExit(1)
         return
 
+    if args.command == "compile":
+        packs_dir = Path(args.packs_dir)
+        loader = EngramLoader(
+            packs_dir=_build_loader_roots(packs_dir),
+            default_packs_dir=packs_dir,
+        )
+        targets = [args.name] if args.name else [item["name"] for item in loader.list_engrams()]
+
+        failed = 0
+        for name in targets:
+            report = loader.compile_bundle(name)
+            if report is None:
+                print(f"{name}: 未找到 Engram")
+                failed += 1
+                continue
+            print(f"{name}: {report['files']} files, {report['bytes']} bytes -> {report['path']}")
+
+        if failed:
+            raise SystemExit(1)
+        return
+
+    if args.command == "bench":
+        _run_bench_command(args)
+        return
+
     if args.command == "search":
         _ = args.packs_dir  # kept for CLI interface consistency
         entries = _load_registry_entries()
@@ -0,0 +1,85 @@
+"""Cold-start timing for `engram-server --startup-profile`."""
+
+from __future__ import annotations
+
+import re
+import subprocess
+import sys
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+_IMPORT_TOP = 12
+
+
+class StartupProfile:
+    """Wall-clock durations of named startup phases, rendered as a breakdown table."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.ready: float | None = None
+        self.phases: list[tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - begin))
+
+    def mark_ready(self) -> None:
+        """Freeze the total; work done afterwards (e.g. profiling itself) is excluded."""
+        self.ready = time.perf_counter()
+
+    def render(self, *, imports: list[tuple[str, float]] | None = None) -> str:
+        lines = ["Engram startup profile"]
+        if imports:
+            total = sum(seconds for _name, seconds in imports)
+            lines.append(f"imports (cold, python -X importtime) {total * 1000:8.1f} ms")
+            for name, seconds in imports[:_IMPORT_TOP]:
+                lines.append(f"  {name:<36} {seconds * 1000:8.1f} ms")
+        lines.append("initialization")
+        for name, seconds in self.phases:
+            lines.append(f"  {name:<36} {seconds * 1000:8.1f} ms")
+        elapsed = (self.ready or time.perf_counter()) - self.started
+        lines.append(f"ready to serve (after imports)       {elapsed * 1000:8.1f} ms")
+        lines.append("project workspace: deferred to first tool call")
+        return "\n".join(lines)
+
+
+def parse_importtime(output: str) -> list[tuple[str, float]]:
+    """Sum `-X importtime` self times per group, largest first.
+
+    engram_server modules are listed one by one; everything else is grouped by
+    its top-level package.
+    """
+    totals: dict[str, float] = {}
+    for line in output.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match is None:
+            continue
+        self_us, _cumulative, _indent, module = match.groups()
+        group = module if module.startswith("engram_server") else module.split(".", 1)[0]
+        totals[group] = totals.get(group, 0.0) + int(self_us) / 1_000_000
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def import_breakdown(module: str = "engram_server.server") -> list[tuple[str, float]]:
+    """Import `module` in a fresh interpreter and return its import cost per group.
+
+    Imports of the current process are already cached, so a child process with
+    `-X importtime` is the only way to see the cold numbers.
+    """
+    try:
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+            timeout=60,
+            check=False,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return []
+    return parse_importtime(completed.stderr)
@@ -0,0 +1,57 @@
+"""Per-process accounting of estimated tool response sizes, by pack and by tool."""
+
+from __future__ import annotations
+
+import threading
+from typing import Any
+
+from engram_server.tokenizer import estimate_tokens
+
+
+class TokenMeter:
+    """Accumulate estimated response tokens per (pack, tool) pair.
+
+    Responses without a pack argument are recorded under pack "".
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._cells: dict[tuple[str, str], dict[str, int]] = {}
+
+    def record(self, pack: str, tool: str, response: object) -> int:
+        """Estimate a response's size, add it to the counters and return it."""
+        tokens = estimate_tokens(response if isinstance(response, str) else str(response))
+        with self._lock:
+            cell = self._cells.setdefault(
+                (pack, tool), {"calls": 0, "tokens": 0, "max_tokens": 0}
+            )
+            cell["calls"] += 1
+            cell["tokens"] += tokens
+            cell["max_tokens"] = max(cell["max_tokens"], tokens)
+        return tokens
+
+    def snapshot(self, pack: str | None = None) -> dict[str, Any]:
+        """Return totals plus `by_pack` / `by_tool` breakdowns (optionally for one pack)."""
+        with self._lock:
+            cells = {
+                key: dict(value)
+                for key, value in self._cells.items()
+                if pack is None or key[0] == pack
+            }
+        by_pack: dict[str, dict[str, int]] = {}
+        by_tool: dict[str, dict[str, int]] = {}
+        total = {"calls": 0, "tokens": 0, "max_tokens": 0}
+        for (pack_name, tool), cell in sorted(cells.items()):
+            for bucket in (
+                by_pack.setdefault(pack_name, {"calls": 0, "tokens": 0, "max_tokens": 0}),
+                by_tool.setdefault(tool, {"calls": 0, "tokens": 0, "max_tokens": 0}),
+                total,
+            ):
+                bucket["calls"] += cell["calls"]
+                bucket["tokens"] += cell["tokens"]
+                bucket["max_tokens"] = max(bucket["max_tokens"], cell["max_tokens"])
+        return {"total": total, "by_pack": by_pack, "by_tool": by_tool}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._cells.clear()
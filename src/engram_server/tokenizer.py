@@ -0,0 +1,88 @@
+"""Shared CJK-aware tokenizer for local search (registry, knowledge, memory)."""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+
+_CJK_CHARS = r"\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_TOKEN_RE = re.compile(rf"(?P<cjk>[{_CJK_CHARS}]+)|(?P<word>[^\W_{_CJK_CHARS}]+)")
+_CJK_RE = re.compile(rf"[{_CJK_CHARS}]+")
+# 估算用：CJK 字符（含全角标点）、拉丁词、其余可见符号
+_ESTIMATE_RE = re.compile(
+    rf"(?P<cjk>[{_CJK_CHARS}\u3000-\u303f\uff00-\uffef])|(?P<word>[^\W_{_CJK_CHARS}]+)|(?P<sym>\S)"
+)
+_CHARS_PER_WORD_TOKEN = 4
+_ANALYZE_CACHE_SIZE = 4096
+
+
+def normalize(text: str) -> str:
+    """NFKC + casefold, so full-width forms and letter case compare equal."""
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+def is_cjk(token: str) -> bool:
+    return bool(_CJK_RE.fullmatch(token))
+
+
+def tokenize(text: str, *, normalized: bool = False) -> list[str]:
+    """Split text into word tokens (Latin, digits, kana...) and CJK character bigrams.
+
+    A CJK run of a single character yields that character; longer runs yield the
+    overlapping bigrams ("深蹲动作" -> 深蹲, 蹲动, 动作). Order is preserved.
+    """
+    source = text if normalized else normalize(text)
+    tokens: list[str] = []
+    for match in _TOKEN_RE.finditer(source):
+        run = match.group()
+        if match.lastgroup == "word":
+            tokens.append(run)
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough BPE token count for mixed CJK/Latin text, without a model tokenizer.
+
+    Each CJK character (and full-width punctuation) counts as one token, each
+    Latin word as one token per started 4 characters, any other visible symbol as
+    one token; whitespace is free.
+    """
+    total = 0
+    for match in _ESTIMATE_RE.finditer(text):
+        if match.lastgroup == "word":
+            total += -(-len(match.group()) // _CHARS_PER_WORD_TOKEN)
+        else:
+            total += 1
+    return total
+
+
+@dataclass(frozen=True)
+class AnalyzedText:
+    """Precomputed normalized form and token set of one field."""
+
+    normalized: str
+    tokens: tuple[str, ...]
+    terms: frozenset[str]
+
+    def matches(self, token: str) -> bool:
+        """Exact term hit, Latin prefix hit, or (for CJK) a substring hit."""
+        if token in self.terms:
+            return True
+        if is_cjk(token):
+            # 单字查询或跨词边界时退回到规范化文本的子串判断
+            return token in self.normalized
+        return any(term.startswith(token) for term in self.terms)
+
+
+@lru_cache(maxsize=_ANALYZE_CACHE_SIZE)
+def analyze(text: str) -> AnalyzedText:
+    """Normalize and tokenize text once; repeated fields are served from a cache."""
+    normalized = normalize(text).strip()
+    tokens = tuple(tokenize(normalized, normalized=True))
+    return AnalyzedText(normalized=normalized, tokens=tokens, terms=frozenset(tokens))
@@ -0,0 +1,74 @@
+"""Bounded thread pool that runs blocking MCP tool bodies off the event loop."""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+_MAX_WORKERS = 8
+
+T = TypeVar("T")
+
+
+class BlockingToolPool:
+    """Offload synchronous tool handlers (file I/O, lint, stats, git clone) to threads.
+
+    `wrap(fn)` turns a blocking function into an async handler with the same
+    signature, so FastMCP can keep serving other requests while it runs. At most
+    `max_workers` handlers execute at once; further calls wait for a free worker.
+    """
+
+    def __init__(self, max_workers: int = _MAX_WORKERS, *, name: str = "engram-tool"):
+        self.max_workers = max(1, max_workers)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix=name
+        )
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._peak = 0
+        self._completed = 0
+
+    async def run(self, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+        """Run `fn(*args, **kwargs)` on the pool and await its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(self._call, fn, *args, **kwargs)
+        )
+
+    def wrap(self, fn: Callable[..., T]) -> Callable[..., Awaitable[T]]:
+        """Return an async wrapper of `fn` that keeps its name, docstring and signature."""
+
+        @functools.wraps(fn)
+        async def handler(*args: Any, **kwargs: Any) -> T:
+            return await self.run(fn, *args, **kwargs)
+
+        return handler
+
+    def stats(self) -> dict[str, int]:
+        """Return worker limit, current / peak in-flight calls and completed calls."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "in_flight": self._in_flight,
+                "peak_in_flight": self._peak,
+                "completed": self._completed,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting work; optionally wait for running handlers to finish."""
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _call(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        with self._lock:
+            self._in_flight += 1
+            self._peak = max(self._peak, self._in_flight)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._completed += 1
@@ -0,0 +1,144 @@
+"""Buffered, group-committed writer for automatic tool traces."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+_MAX_BATCH = 32
+_FLUSH_INTERVAL = 1.0
+_MAX_QUEUE = 1024
+
+FlushFn = Callable[[str, list[dict[str, Any]]], list[bool]]
+
+
+class TraceWriter:
+    """Queue trace records in memory and write them in groups on a background thread.
+
+    Records are flushed per pack through `flush_fn(name, records)` once `max_batch`
+    records are queued, every `flush_interval` seconds, on explicit `flush()` and on
+    `close()`. When more than `max_queue` records are waiting, new ones are dropped
+    (and counted) instead of blocking the caller.
+    """
+
+    def __init__(
+        self,
+        flush_fn: FlushFn,
+        *,
+        max_batch: int = _MAX_BATCH,
+        flush_interval: float = _FLUSH_INTERVAL,
+        max_queue: int = _MAX_QUEUE,
+    ):
+        self._flush_fn = flush_fn
+        self.max_batch = max(1, max_batch)
+        self.flush_interval = flush_interval
+        self.max_queue = max(1, max_queue)
+        self._queue: list[tuple[str, dict[str, Any]]] = []
+        self._cond = threading.Condition()
+        # 写盘串行化：后台线程与同步 flush() 不会并发提交同一批记录
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self._thread: threading.Thread | None = None
+        self._counters = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "failed": 0,
+            "flushes": 0,
+        }
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    def submit(self, name: str, record: dict[str, Any]) -> bool:
+        """Queue one trace record; return False when it was dropped."""
+        with self._cond:
+            if self._closed or len(self._queue) >= self.max_queue:
+                self._counters["dropped"] += 1
+                return False
+            self._queue.append((name, record))
+            self._counters["enqueued"] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="engram-trace-writer", daemon=True
+                )
+                self._thread.start()
+            if len(self._queue) >= self.max_batch:
+                self._cond.notify_all()
+            return True
+
+    def flush(self, name: str | None = None) -> int:
+        """Synchronously write queued records (of one pack, or all); return the count."""
+        with self._write_lock:
+            with self._cond:
+                if name is None:
+                    taken, self._queue = self._queue, []
+                else:
+                    taken = [item for item in self._queue if item[0] == name]
+                    self._queue = [item for item in self._queue if item[0] != name]
+            return self._write(taken)
+
+    def close(self, timeout: float | None = 5.0) -> None:
+        """Stop accepting records, flush what is queued and stop the thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        self.flush()
+
+    def stats(self) -> dict[str, Any]:
+        """Return queue depth, counters and flush latency (milliseconds)."""
+        with self._cond:
+            flushes = self._counters["flushes"]
+            return {
+                "queue_depth": len(self._queue),
+                **self._counters,
+                "last_flush_ms": round(self._last_flush_ms, 3),
+                "max_flush_ms": round(self._max_flush_ms, 3),
+                "avg_flush_ms": round(self._total_flush_ms / flushes, 3) if flushes else 0.0,
+            }
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._closed or len(self._queue) >= self.max_batch,
+                    timeout=self.flush_interval,
+                )
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    def _write(self, items: list[tuple[str, dict[str, Any]]]) -> int:
+        if not items:
+            return 0
+        by_name: dict[str, list[dict[str, Any]]] = {}
+        for name, record in items:
+            by_name.setdefault(name, []).append(record)
+
+        started = time.perf_counter()
+        written = 0
+        failed = 0
+        for name, records in by_name.items():
+            try:
+                results = self._flush_fn(name, records)
+            except Exception:  # noqa: BLE001
+                results = [False] * len(records)
+            ok = sum(1 for result in results if result)
+            written += ok
+            failed += len(records) - ok
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        with self._cond:
+            self._counters["written"] += written
+            self._counters["failed"] += failed
+            self._counters["flushes"] += 1
+            self._last_flush_ms = elapsed_ms
+            self._max_flush_ms = max(self._max_flush_ms, elapsed_ms)
+            self._total_flush_ms += elapsed_ms
+        return written
@@ -0,0 +1,160 @@
+"""Pluggable spans around loader filesystem I/O, with a Chrome trace-event exporter."""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any
+
+# 叶子 I/O 操作；其余 span（load_engram_base 等）归为 engram 类别
+IO_OPS = frozenset({"read", "write", "append", "stat", "scandir"})
+_MAX_SPANS = 100_000
+
+
+class Span:
+    """One timed operation; call `record()` inside the block to count the bytes moved."""
+
+    __slots__ = ("op", "path", "bytes", "start_ns", "duration_ns", "depth", "thread_id")
+
+    def __init__(self, op: str, path: str, depth: int, thread_id: int) -> None:
+        self.op = op
+        self.path = path
+        self.bytes: int | None = None
+        self.start_ns = 0
+        self.duration_ns = 0
+        self.depth = depth
+        self.thread_id = thread_id
+
+    def record(self, data: str | bytes) -> None:
+        """Add the size of data (UTF-8 bytes for text) to the span."""
+        size = len(data.encode("utf-8")) if isinstance(data, str) else len(data)
+        self.bytes = (self.bytes or 0) + size
+
+
+class _NullSpan:
+    """Shared stand-in yielded while tracing is off; it is its own context manager."""
+
+    __slots__ = ()
+
+    def record(self, data: str | bytes) -> None:
+        return None
+
+    def __enter__(self) -> _NullSpan:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """No-op tracer: `span()` returns a shared object, so disabled tracing costs one call."""
+
+    enabled = False
+
+    def span(self, op: str, path: Path | str | None = None) -> Any:
+        return _NULL_SPAN
+
+
+NULL_TRACER = Tracer()
+
+
+class _ActiveSpan:
+    __slots__ = ("tracer", "span")
+
+    def __init__(self, tracer: RecordingTracer, span: Span) -> None:
+        self.tracer = tracer
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self.tracer._local.depth = self.span.depth + 1
+        self.span.start_ns = time.perf_counter_ns()
+        return self.span
+
+    def __exit__(self, *exc: object) -> None:
+        span = self.span
+        span.duration_ns = time.perf_counter_ns() - span.start_ns
+        self.tracer._local.depth = span.depth
+        self.tracer._finish(span)
+
+
+class RecordingTracer(Tracer):
+    """Keep the most recent `max_spans` finished spans in memory.
+
+    Nesting is tracked per thread; spans from the batch-read pool keep their own
+    thread id so a trace viewer shows them on separate tracks.
+    """
+
+    enabled = True
+
+    def __init__(self, max_spans: int = _MAX_SPANS) -> None:
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._spans: deque[Span] = deque(maxlen=max_spans)
+        self._thread_names: dict[int, str] = {}
+        self.origin_ns = time.perf_counter_ns()
+
+    def span(self, op: str, path: Path | str | None = None) -> _ActiveSpan:
+        depth = getattr(self._local, "depth", 0)
+        thread_id = threading.get_ident()
+        return _ActiveSpan(self, Span(op, "" if path is None else str(path), depth, thread_id))
+
+    def _finish(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+            if span.thread_id not in self._thread_names:
+                self._thread_names[span.thread_id] = threading.current_thread().name
+
+    def spans(self) -> list[Span]:
+        """Finished spans in completion order (children before their parent)."""
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+    def chrome_events(self) -> dict[str, Any]:
+        """Chrome trace-event JSON object: one complete ("X") event per span."""
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self._spans)
+            names = dict(self._thread_names)
+        events: list[dict[str, Any]] = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in names.items()
+        ]
+        # 按开始时间、深度排序，查看器据此恢复嵌套
+        for span in sorted(spans, key=lambda s: (s.start_ns, s.depth)):
+            args: dict[str, Any] = {"path": span.path}
+            if span.bytes is not None:
+                args["bytes"] = span.bytes
+            events.append(
+                {
+                    "name": span.op,
+                    "cat": "io" if span.op in IO_OPS else "engram",
+                    "ph": "X",
+                    "ts": (span.start_ns - self.origin_ns) / 1000,
+                    "dur": span.duration_ns / 1000,
+                    "pid": pid,
+                    "tid": span.thread_id,
+                    "args": args,
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome(self, path: Path) -> int:
+        """Write the Chrome trace to path (open it in Perfetto or chrome://tracing).
+
+        Returns the number of spans written.
+        """
+        payload = self.chrome_events()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        return sum(1 for event in payload["traceEvents"] if event["ph"] == "X")
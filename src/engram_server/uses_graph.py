@@ -0,0 +1,103 @@
+"""Forward/reverse graph of example `uses:` references to knowledge files."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+def parse_uses_frontmatter(content: str) -> list[str]:
+    """Return the `uses:` list (inline `[a, b]` or `- item` lines) of a markdown frontmatter."""
+    lines = content.splitlines()
+    if not lines or lines[0].strip() != "---":
+        return []
+
+    end_idx = None
+    for idx in range(1, len(lines)):
+        if lines[idx].strip() == "---":
+            end_idx = idx
+            break
+    if end_idx is None:
+        return []
+
+    uses: list[str] = []
+    frontmatter = lines[1:end_idx]
+    i = 0
+    while i < len(frontmatter):
+        stripped = frontmatter[i].strip()
+        if stripped.startswith("uses:"):
+            inline = stripped[len("uses:"):].strip()
+            if inline.startswith("[") and inline.endswith("]"):
+                items = [part.strip() for part in inline[1:-1].split(",")]
+                uses.extend(item for item in items if item)
+                return uses
+
+            i += 1
+            while i < len(frontmatter):
+                entry = frontmatter[i].strip()
+                if not entry:
+                    i += 1
+                    continue
+                if entry.startswith("- "):
+                    uses.append(entry[2:].strip())
+                    i += 1
+                    continue
+                break
+            return uses
+        i += 1
+    return uses
+
+
+@dataclass(frozen=True)
+class UsesGraph:
+    # 案例 -> 引用的知识文件；知识文件 -> 引用它的案例（均为包内相对路径）
+    forward: dict[str, list[str]] = field(default_factory=dict)
+    reverse: dict[str, list[str]] = field(default_factory=dict)
+
+    def related(self, path: str) -> list[str]:
+        """Knowledge used by an example, or examples using a knowledge file."""
+        return list(self.forward.get(path) or self.reverse.get(path) or [])
+
+
+def example_files(engram_dir: Path) -> list[Path]:
+    examples_dir = engram_dir / "examples"
+    if not examples_dir.is_dir():
+        return []
+    return [path for path in sorted(examples_dir.rglob("*.md")) if path.name != "_index.md"]
+
+
+def build_uses_graph(engram_dir: Path, files: list[Path] | None = None) -> UsesGraph:
+    """Parse the `uses:` frontmatter of every example; out-of-pack refs are dropped."""
+    forward: dict[str, list[str]] = {}
+    for path in example_files(engram_dir) if files is None else files:
+        try:
+            content = path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            continue
+        refs = example_refs(engram_dir, content)
+        if refs:
+            forward[path.relative_to(engram_dir).as_posix()] = refs
+    return graph_from_forward(forward)
+
+
+def example_refs(engram_dir: Path, content: str) -> list[str]:
+    """In-pack relative paths listed in one example's `uses:` frontmatter."""
+    refs: list[str] = []
+    for ref in parse_uses_frontmatter(content):
+        target = (engram_dir / ref).resolve()
+        try:
+            relative = target.relative_to(engram_dir).as_posix()
+        except ValueError:
+            continue
+        if relative not in refs:
+            refs.append(relative)
+    return refs
+
+
+def graph_from_forward(forward: dict[str, list[str]]) -> UsesGraph:
+    """Derive the reverse (knowledge -> examples) map from example -> knowledge refs."""
+    reverse: dict[str, list[str]] = {}
+    for example, refs in forward.items():
+        for ref in refs:
+            reverse.setdefault(ref, []).append(example)
+    return UsesGraph(forward=dict(forward), reverse=reverse)
@@ -16,6 +16,7 @@ from starlette.routing import Mount, Route
 from starlette.staticfiles import StaticFiles
 
 from engram_server.loader import EngramLoader
+from engram_server.metrics import ToolMetrics
 
 STATIC_DIR = Path(__file__).parent / "static"
 
@@ -56,7 +57,7 @@ async def api_get_engram(request: Request) -> JSONResponse:
 async def api_list_files(request: Request) -> JSONResponse:
     loader: EngramLoader = request.app.state.loader
     name = request.path_params["name"]
-    engram_dir = loader._resolve_engram_dir(name)
+    engram_dir = loader.source_dir(name)
     if engram_dir is None:
         return _json({"error": f"Engram not found: {name}"}, 404)
 
@@ -115,16 +116,25 @@ async def api_lint(request: Request) -> JSONResponse:
 
     loader: EngramLoader = request.app.state.loader
     name = request.path_params["name"]
-    engram_dir = loader._resolve_engram_dir(name)
-    if engram_dir is None:
+    with loader.lint_source(name) as engram_dir:
+        messages = (
+            lint_engram(engram_dir, roots=loader.packs_dirs) if engram_dir is not None else None
+        )
+    if messages is None:
         return _json({"error": f"Engram not found: {name}"}, 404)
-    messages = lint_engram(engram_dir)
     return _json([
         {"level": m.level, "file": m.file_path, "message": m.message}
         for m in messages
     ])
 
 
+async def api_metrics(request: Request) -> Response:
+    metrics: ToolMetrics = request.app.state.metrics
+    return Response(
+        metrics.render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 # ---------------------------------------------------------------------------
 # SPA fallback — serve index.html for non-API, non-static paths
 # ---------------------------------------------------------------------------
@@ -140,8 +150,13 @@ async def _spa_fallback(request: Request) -> Response:
 # App factory
 # ---------------------------------------------------------------------------
 
-def create_web_app(packs_dir: Path) -> Starlette:
+def create_web_app(packs_dir: Path, *, metrics: ToolMetrics | None = None) -> Starlette:
     loader = _build_loader(packs_dir)
+    # 从 MCP 内打开时传入服务进程的指标，/api/metrics 反映 MCP 工具的调用情况
+    if metrics is None:
+        metrics = ToolMetrics()
+    if loader.metrics is None:
+        loader.metrics = metrics
 
     api_routes = [
         Route("/engrams", api_list_engrams),
@@ -152,6 +167,7 @@ def create_web_app(packs_dir: Path) -> Starlette:
         Route("/engrams/{name}/memory", api_delete_memory, methods=["DELETE"]),
         Route("/engrams/{name}/lint", api_lint),
         Route("/stats", api_stats),
+        Route("/metrics", api_metrics),
     ]
 
     routes: list = [Mount("/api", routes=api_routes)]
@@ -166,6 +182,7 @@ def create_web_app(packs_dir: Path) -> Starlette:
     app = Starlette(routes=routes)
     app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
     app.state.loader = loader
+    app.state.metrics = metrics
     return app
 
 
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import shutil
+import tarfile
+import zipfile
+from pathlib import Path
+
+from engram_server.archive import ArchivePack, archive_pack_name
+from engram_server.lint import lint_engram
+from engram_server.loader import EngramLoader
+
+FIXTURE = Path(__file__).parent / "fixtures" / "fitness-coach"
+
+
+def _zip_fixture(target: Path, *, prefix: str = "fitness-coach/") -> Path:
+    with zipfile.ZipFile(target, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for path in sorted(FIXTURE.rglob("*")):
+            if path.is_file():
+                zf.write(path, f"{prefix}{path.relative_to(FIXTURE).as_posix()}")
+    return target
+
+
+def _tar_fixture(target: Path) -> Path:
+    with tarfile.open(target, "w") as tf:
+        for path in sorted(FIXTURE.rglob("*")):
+            if path.is_file():
+                tf.add(path, path.relative_to(FIXTURE).as_posix())
+    return target
+
+
+def test_archive_member_index_strips_common_root(tmp_path: Path) -> None:
+    archive = ArchivePack.open(_zip_fixture(tmp_path / "coach.engram.zip"))
+    assert archive is not None
+    assert archive.is_file("meta.json")
+    assert archive.is_dir("knowledge")
+    assert "_index.md" in archive.list_dir("knowledge")
+    assert archive.read("role.md") == (FIXTURE / "role.md").read_bytes()
+    assert archive_pack_name(Path("coach.engram.tar")) == "coach"
+    assert archive_pack_name(Path("coach.zip")) is None
+
+
+def test_loader_serves_zip_pack_like_a_directory(tmp_path: Path) -> None:
+    packs = tmp_path / "packs"
+    packs.mkdir()
+    _zip_fixture(packs / "fitness-coach.engram.zip")
+    tree = EngramLoader(FIXTURE.parent)
+    loader = EngramLoader(packs, overlay_dir=tmp_path / "overlay")
+
+    assert [item["name"] for item in loader.list_engrams()] == ["fitness-coach"]
+    assert loader.load_engram_base("fitness-coach") == tree.load_engram_base("fitness-coach")
+    assert loader.list_files("fitness-coach", "knowledge") == tree.list_files(
+        "fitness-coach", "knowledge"
+    )
+    assert loader.uses_graph("fitness-coach") == tree.uses_graph("fitness-coach")
+    assert loader.section_outline("fitness-coach") == tree.section_outline("fitness-coach")
+    page = loader.load_file_page("fitness-coach", "role.md", limit=10, unit="bytes")
+    assert page is not None and page["total"] == (FIXTURE / "role.md").stat().st_size
+
+
+def test_archive_pack_writes_go_to_overlay(tmp_path: Path) -> None:
+    packs = tmp_path / "packs"
+    packs.mkdir()
+    archive = _tar_fixture(packs / "fitness-coach.engram.tar")
+    before = archive.read_bytes()
+    overlay = tmp_path / "overlay"
+    loader = EngramLoader(packs, overlay_dir=overlay)
+
+    assert loader.capture_memory("fitness-coach", "偏好晨练", "preferences", "偏好晨练")
+    assert (overlay / "fitness-coach" / "memory" / "preferences.md").is_file()
+    assert loader.add_knowledge("fitness-coach", "拉伸", "拉伸要点", "拉伸摘要")
+
+    index = loader.load_file("fitness-coach", "knowledge/_index.md")
+    assert index is not None
+    # overlay 中的索引是归档索引的副本加新条目
+    assert "knowledge/膝关节损伤训练.md" in index
+    assert "knowledge/拉伸.md" in index
+    assert loader.load_file("fitness-coach", "knowledge/拉伸.md") == "拉伸要点"
+    assert "## 动态记忆" in (loader.load_engram_base("fitness-coach") or "")
+    assert archive.read_bytes() == before
+
+
+def test_archive_pack_lint_and_search_read_members(tmp_path: Path) -> None:
+    packs = tmp_path / "packs"
+    packs.mkdir()
+    _zip_fixture(packs / "fitness-coach.engram.zip")
+    tree_root = tmp_path / "tree"
+    shutil.copytree(FIXTURE, tree_root / "fitness-coach")
+    loader = EngramLoader(packs, overlay_dir=tmp_path / "overlay")
+    tree = EngramLoader(tree_root)
+
+    with loader.lint_source("fitness-coach") as source:
+        assert source is not None and source.name == "fitness-coach"
+        messages = lint_engram(source)
+    assert not source.exists()
+    assert messages == lint_engram(tree_root / "fitness-coach")
+    assert not [m for m in messages if m.level == "error"]
+    with loader.lint_source("missing") as source:
+        assert source is None
+
+    hits = loader.search_knowledge("fitness-coach", "深蹲 膝盖")
+    assert hits
+    assert hits == tree.search_knowledge("fitness-coach", "深蹲 膝盖")
+
+
+def test_archive_listed_under_its_file_stem(tmp_path: Path) -> None:
+    packs = tmp_path / "packs"
+    packs.mkdir()
+    _tar_fixture(packs / "coach.engram.tar")
+    loader = EngramLoader(packs, overlay_dir=tmp_path / "overlay")
+
+    listed = loader.list_engrams()
+    assert [item["name"] for item in listed] == ["coach"]
+    # meta.json 里的 name 是 fitness-coach，列表名必须能被 loader 解析
+    assert loader.get_engram_info("coach")["name"] == "fitness-coach"
+    assert loader.load_file(listed[0]["name"], "role.md") is not None
+    assert loader.get_engram_info("fitness-coach") is None
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import json
+from dataclasses import asdict
+from pathlib import Path
+
+import pytest
+
+from engram_server.bench import (
+    SCENARIOS,
+    Tolerances,
+    compare_reports,
+    has_regression,
+    percentile,
+    render_comparison,
+    render_table,
+    run_suite,
+)
+from engram_server.corpus import CorpusSpec, generate_corpus
+from engram_server.lint import lint_engram
+from engram_server.loader import EngramLoader
+from engram_server.server import main
+
+TINY = CorpusSpec(packs=2, knowledge_files=9, index_depth=3, memory_entries=12, trace_lines=8)
+
+
+def test_generated_corpus_is_lint_clean_and_nested(tmp_path: Path) -> None:
+    corpus = generate_corpus(tmp_path, TINY)
+
+    assert corpus.packs == ["bench-000", "bench-001"]
+    paths = corpus.knowledge["bench-000"]
+    assert len(paths) == 9
+    assert any(path.count("/") >= 3 for path in paths)
+    for name in corpus.packs:
+        assert lint_engram(tmp_path / name) == []
+
+    loader = EngramLoader(tmp_path)
+    assert loader.load_file("bench-000", paths[-1]) is not None
+    traces = loader.list_recent_memory_summaries("bench-000", "tool-trace", limit=50)
+    assert len(traces) == 8
+    # 同一 spec 与 seed 生成相同内容
+    again = generate_corpus(tmp_path / "again", TINY)
+    assert (again.root / "bench-001" / paths[0]).read_text(encoding="utf-8") == (
+        tmp_path / "bench-001" / paths[0]
+    ).read_text(encoding="utf-8")
+
+
+def test_run_suite_reports_every_scenario(tmp_path: Path) -> None:
+    report = run_suite({"tiny": TINY}, iterations=2, work_dir=tmp_path)
+
+    assert json.loads(json.dumps(report))["scales"]["tiny"]["index_depth"] == 3
+    rows = report["results"]
+    assert [row["scenario"] for row in rows] == [scenario.name for scenario in SCENARIOS]
+    for row in rows:
+        assert 0 < row["p50_ms"] <= row["p95_ms"] <= row["max_ms"]
+        assert row["alloc_peak_kb"] > 0
+        # 每个场景在独立子进程中运行，RSS 是该场景自己的峰值
+        if row["peak_rss_kb"] is not None:
+            assert 0 <= row["rss_delta_kb"] <= row["peak_rss_kb"]
+    assert "delete_memory" in render_table(report)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_percentile_interpolates() -> None:
+    assert percentile([3.0], 95) == 3.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+    assert percentile([1.0, 2.0, 3.0, 4.0, 5.0], 95) == 4.8
+
+
+def _report(**rows: tuple[float, float, float]) -> dict:
+    return {
+        "results": [
+            {"scale": "s", "scenario": name, "p50_ms": p50, "p95_ms": p95, "peak_rss_kb": rss}
+            for name, (p50, p95, rss) in rows.items()
+        ]
+    }
+
+
+def test_compare_reports_flags_regressions_beyond_tolerance_and_floor() -> None:
+    baseline = _report(load=(10.0, 20.0, 50_000), fast=(0.1, 0.2, 50_000), gone=(1, 1, 1))
+    current = _report(load=(14.0, 21.0, 70_000), fast=(0.3, 0.4, 50_000), added=(1, 1, 1))
+
+    rows = compare_reports(current, baseline, Tolerances())
+    status = {(row["scenario"], row["metric"]): row["status"] for row in rows}
+    assert status[("load", "p50_ms")] == "REGRESSION"
+    assert status[("load", "p95_ms")] == "ok"
+    assert status[("load", "peak_rss_kb")] == "REGRESSION"
+    # +200% 但绝对变化低于 0.5 ms 的下限
+    assert status[("fast", "p50_ms")] == "ok"
+    assert status[("added", "-")] == "new"
+    assert status[("gone", "-")] == "missing"
+    assert has_regression(rows)
+    assert "2 regression(s)" in render_comparison(rows)
+
+    loose = compare_reports(current, baseline, Tolerances(p50=0.5, rss=0.5))
+    assert not has_regression(loose)
+
+
+def test_compare_reports_flags_growth_from_zero_baseline() -> None:
+    baseline = _report(grew=(0.0, 0.0, 0), flat=(0.0, 0.0, 0))
+    current = _report(grew=(2.0, 0.1, 4096), flat=(0.2, 0.0, 0))
+
+    rows = compare_reports(current, baseline, Tolerances())
+    status = {(row["scenario"], row["metric"]): (row["status"], row["change"]) for row in rows}
+    # 基线为 0 时按绝对下限判断，不计算相对变化
+    assert status[("grew", "p50_ms")] == ("REGRESSION", None)
+    assert status[("grew", "p95_ms")] == ("ok", None)
+    assert status[("grew", "peak_rss_kb")] == ("REGRESSION", None)
+    assert status[("flat", "p50_ms")] == ("ok", None)
+    assert "2 regression(s)" in render_comparison(rows)
+
+
+def test_cli_bench_compare_exits_nonzero_on_regression(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    baseline = {
+        "iterations": 2,
+        "scales": {"tiny": asdict(TINY)},
+        "results": [
+            {"scale": "tiny", "scenario": "load_engram", "p50_ms": 1e-6, "p95_ms": 1e-6,
+             "peak_rss_kb": None}
+        ],
+    }
+    path = tmp_path / "baseline.json"
+    path.write_text(json.dumps(baseline), encoding="utf-8")
+    output = tmp_path / "current.json"
+
+    main(
+        [
+            "bench", "--compare", str(path), "--scenarios", "load_engram",
+            "--min-delta-ms", "1000", "--output", str(output),
+        ]
+    )
+    assert "0 regression(s)" in capsys.readouterr().out
+    assert json.loads(output.read_text(encoding="utf-8"))["iterations"] == 2
+
+    with pytest.raises(SystemExit) as exc:
+        main(["bench", "--compare", str(path), "--scenarios", "load_engram", "--min-delta-ms", "0"])
+    assert exc.value.code == 1
+    assert "REGRESSION" in capsys.readouterr().out
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+from engram_server.bundle import BUNDLE_FILENAME, PackBundle
+from engram_server.loader import EngramLoader
+from engram_server.sections import parse_sections
+from engram_server.server import main
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _copy_fixture(tmp_path: Path) -> Path:
+    pack = tmp_path / "fitness-coach"
+    shutil.copytree(FIXTURES / "fitness-coach", pack)
+    return pack
+
+
+def test_compiled_bundle_serves_fresh_files_and_falls_back_when_stale(tmp_path: Path) -> None:
+    pack = _copy_fixture(tmp_path)
+    expected = EngramLoader(tmp_path).load_engram_base("fitness-coach")
+
+    loader = EngramLoader(tmp_path)
+    report = loader.compile_bundle("fitness-coach")
+    assert report is not None
+    assert report["path"] == pack / BUNDLE_FILENAME
+    assert report["files"] > 10
+
+    role = pack / "role.md"
+    assert loader._read_bundled(role) == role.read_bytes()
+    assert loader.load_engram_base("fitness-coach") == expected
+
+    role.write_text("# 新角色\n", encoding="utf-8")
+    assert loader._read_bundled(role) is None
+    assert loader.load_file("fitness-coach", "role.md") == "# 新角色\n"
+    # 编译后新增的文件不在 bundle 中，直接读目录树
+    (pack / "knowledge" / "新增.md").write_text("new", encoding="utf-8")
+    assert loader.load_file("fitness-coach", "knowledge/新增.md") == "new"
+
+
+def test_bundle_carries_sections_and_uses_graph(tmp_path: Path) -> None:
+    pack = _copy_fixture(tmp_path)
+    loader = EngramLoader(tmp_path)
+    tree_graph = loader.uses_graph("fitness-coach")
+    loader.compile_bundle("fitness-coach")
+
+    bundle = PackBundle.open(pack / BUNDLE_FILENAME)
+    assert bundle is not None
+    path = pack / "knowledge" / "_index.md"
+    entry = bundle.fresh_entry("knowledge/_index.md", path)
+    assert entry is not None
+    assert entry.sections
+    assert list(entry.sections) == parse_sections(path.read_bytes())
+    assert bundle.covers_examples(pack)
+
+    fresh = EngramLoader(tmp_path)
+    assert fresh.uses_graph("fitness-coach") == tree_graph
+    title = entry.sections[-1].title
+    section = fresh.load_section("fitness-coach", "knowledge/_index.md", title)
+    assert section is not None and section.startswith("#")
+
+
+def test_corrupt_bundle_is_ignored(tmp_path: Path) -> None:
+    pack = _copy_fixture(tmp_path)
+    (pack / BUNDLE_FILENAME).write_bytes(b"not a bundle")
+
+    loader = EngramLoader(tmp_path)
+    assert loader.load_file("fitness-coach", "role.md") == (pack / "role.md").read_text(
+        encoding="utf-8"
+    )
+
+
+def test_cli_compile(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    pack = _copy_fixture(tmp_path)
+
+    main(["compile", "fitness-coach", "--packs-dir", str(tmp_path)])
+    assert "fitness-coach:" in capsys.readouterr().out
+    assert (pack / BUNDLE_FILENAME).is_file()
+
+    with pytest.raises(SystemExit) as exc:
+        main(["compile", "missing", "--packs-dir", str(tmp_path)])
+    assert exc.value.code == 1
@@ -0,0 +1,39 @@
+from pathlib import Path
+
+from engram_server.cache import FingerprintLRU, file_fingerprint
+
+
+def test_file_fingerprint_tracks_size_and_missing_files(tmp_path: Path) -> None:
+    target = tmp_path / "a.md"
+    missing = tmp_path / "missing.md"
+    target.write_text("v1", encoding="utf-8")
+
+    first = file_fingerprint([target, missing])
+    target.write_text("v1 plus more", encoding="utf-8")
+    second = file_fingerprint([target, missing])
+
+    assert first != second
+    assert first[1] == (str(missing), None, None)
+
+
+def test_fingerprint_lru_counts_hits_and_misses() -> None:
+    cache = FingerprintLRU(maxsize=2)
+
+    assert cache.get("a", 1) is None
+    cache.put("a", 1, "value-a")
+    assert cache.get("a", 1) == "value-a"
+    assert cache.get("a", 2) is None  # stale fingerprint
+
+    assert cache.stats() == {"hits": 1, "misses": 2, "size": 1, "maxsize": 2}
+
+
+def test_fingerprint_lru_evicts_least_recently_used() -> None:
+    cache = FingerprintLRU(maxsize=2)
+    cache.put("a", 1, "A")
+    cache.put("b", 1, "B")
+    cache.get("a", 1)
+    cache.put("c", 1, "C")
+
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) == "A"
+    assert cache.get("c", 1) == "C"
@@ -0,0 +1,100 @@
+import json
+import shutil
+from pathlib import Path
+
+from engram_server.catalog import PackCatalog
+from engram_server.loader import EngramLoader
+
+
+def _write_pack(root: Path, name: str, description: str = "desc") -> Path:
+    pack = root / name
+    pack.mkdir(parents=True, exist_ok=True)
+    (pack / "meta.json").write_text(
+        json.dumps({"name": name, "description": description}), encoding="utf-8"
+    )
+    return pack
+
+
+def test_catalog_maps_names_to_first_root(tmp_path: Path) -> None:
+    project = tmp_path / "project"
+    global_root = tmp_path / "global"
+    _write_pack(project, "shared", "project version")
+    _write_pack(global_root, "shared", "global version")
+    _write_pack(global_root, "global-only")
+
+    catalog = PackCatalog([project, global_root])
+
+    entry = catalog.get("shared")
+    assert entry is not None
+    assert entry.root == project
+    assert entry.meta == {"name": "shared", "description": "project version"}
+    assert catalog.get("global-only") is not None
+    assert catalog.get("missing") is None
+    assert [e.name for e in catalog.entries()] == ["shared", "global-only", "shared"]
+
+
+def test_catalog_picks_up_added_and_removed_packs(tmp_path: Path) -> None:
+    _write_pack(tmp_path, "alpha")
+    catalog = PackCatalog([tmp_path])
+    assert catalog.get("beta") is None
+
+    _write_pack(tmp_path, "beta")
+    assert catalog.get("beta") is not None
+
+    shutil.rmtree(tmp_path / "alpha")
+    assert catalog.get("alpha") is None
+
+
+def test_catalog_reparses_meta_when_it_changes(tmp_path: Path) -> None:
+    pack = _write_pack(tmp_path, "alpha", "v1")
+    catalog = PackCatalog([tmp_path])
+    assert catalog.get("alpha").meta["description"] == "v1"
+
+    (pack / "meta.json").write_text(
+        json.dumps({"name": "alpha", "description": "v2 with a longer text"}),
+        encoding="utf-8",
+    )
+    assert catalog.get("alpha").meta["description"] == "v2 with a longer text"
+    assert catalog.entries()[0].meta["description"] == "v2 with a longer text"
+
+
+def test_catalog_does_not_rescan_between_changes(tmp_path: Path, monkeypatch) -> None:
+    _write_pack(tmp_path, "alpha")
+    catalog = PackCatalog([tmp_path])
+    catalog.get("alpha")
+
+    calls: list[Path] = []
+    original = Path.iterdir
+
+    def _tracking_iterdir(self: Path):
+        calls.append(self)
+        return original(self)
+
+    monkeypatch.setattr(Path, "iterdir", _tracking_iterdir)
+    for _ in range(5):
+        assert catalog.get("alpha") is not None
+        catalog.entries()
+    assert calls == []
+
+
+def test_loader_write_file_refreshes_meta(tmp_path: Path) -> None:
+    _write_pack(tmp_path, "alpha", "old")
+    loader = EngramLoader(tmp_path)
+    assert loader.get_engram_info("alpha")["description"] == "old"
+
+    loader.write_file(
+        "alpha", "meta.json", json.dumps({"name": "alpha", "description": "new"})
+    )
+
+    assert loader.get_engram_info("alpha")["description"] == "new"
+    assert loader.list_engrams()[0]["description"] == "new"
+
+
+def test_loader_info_is_a_copy_of_cached_meta(tmp_path: Path) -> None:
+    _write_pack(tmp_path, "alpha", "old")
+    loader = EngramLoader(tmp_path)
+
+    info = loader.get_engram_info("alpha")
+    info["description"] = "mutated"
+
+    assert loader.get_engram_info("alpha")["description"] == "old"
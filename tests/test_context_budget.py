@@ -0,0 +1,78 @@
+import json
+from pathlib import Path
+
+from engram_server.context_budget import fit_to_budget
+from engram_server.loader import EngramLoader
+from engram_server.tokenizer import estimate_tokens
+
+_KNOWLEDGE = (
+    "## 知识索引\n"
+    "### 训练基础\n"
+    "- `knowledge/增肌.md` - 渐进超负荷与训练量区间。\n"
+    "  摘要：主动作稳定加重，每2-4周复盘重量与动作质量。\n"
+    "- `knowledge/新手.md` - 新手前4周训练模板。\n"
+    "### 损伤与康复\n"
+    "- `knowledge/膝盖.md` - 膝盖疼痛时的无痛区间训练。\n"
+    "- `knowledge/肩部.md` - 肩袖激活与疼痛替代策略。\n"
+)
+
+
+def _sections() -> list[tuple[str, str]]:
+    return [
+        ("role", "## 角色\n你是健身教练。"),
+        ("knowledge", _KNOWLEDGE),
+        ("examples", "## 案例索引\n- `examples/膝盖疼.md` - 膝盖疼的上班族。"),
+    ]
+
+
+def test_large_budget_keeps_everything() -> None:
+    result = fit_to_budget(_sections(), "膝盖", 10_000)
+
+    assert "摘要：主动作稳定加重" in result
+    assert "未展开" not in result
+    assert "索引条目保留 5/5，省略 0 条" in result
+
+
+def test_small_budget_keeps_query_matches_and_stubs_the_rest() -> None:
+    sections = _sections()
+    fixed = estimate_tokens(sections[0][1])
+    result = fit_to_budget(sections, "膝盖疼", fixed + 150)
+
+    assert "- `knowledge/膝盖.md` - 膝盖疼痛时的无痛区间训练。" in result
+    assert "- `examples/膝盖疼.md` - 膝盖疼的上班族。" in result
+    assert "knowledge/增肌.md` -" not in result
+    assert "- （另有 2 条未展开：knowledge/增肌.md, knowledge/新手.md）" in result
+    assert "已省略：" in result and "knowledge/肩部.md" in result
+    body = result.split("\n\n## 上下文预算")[0]
+    assert estimate_tokens(body) <= fixed + 150
+    assert result.startswith("## 角色\n你是健身教练。")
+
+
+def test_budget_below_fixed_sections_collapses_all_entries() -> None:
+    result = fit_to_budget(_sections(), "膝盖", 5)
+
+    assert "基础层已超出预算" in result
+    assert "索引条目保留 0/5" in result
+
+
+def test_loader_load_engram_base_with_budget(tmp_path: Path) -> None:
+    engram_dir = tmp_path / "test-expert"
+    (engram_dir / "knowledge").mkdir(parents=True)
+    (engram_dir / "meta.json").write_text(
+        json.dumps({"name": "test-expert", "description": "test"}), encoding="utf-8"
+    )
+    (engram_dir / "role.md").write_text("你是健身教练。", encoding="utf-8")
+    (engram_dir / "knowledge" / "_index.md").write_text(_KNOWLEDGE, encoding="utf-8")
+    loader = EngramLoader(tmp_path)
+
+    full = loader.load_engram_base("test-expert")
+    trimmed = loader.load_engram_base(
+        "test-expert", query="肩袖", max_tokens=estimate_tokens(full) - 10
+    )
+
+    assert "上下文预算" not in full
+    assert "knowledge/肩部.md` - 肩袖激活" in trimmed
+    assert "未展开" in trimmed
+    assert [key for key, _ in loader.load_engram_sections("test-expert")][:2] == [
+        "role", "knowledge",
+    ]
@@ -0,0 +1,106 @@
+import json
+from pathlib import Path
+
+from engram_server.knowledge_index import INDEX_FILENAME, KnowledgeIndex
+from engram_server.loader import EngramLoader
+
+
+def _make_pack(tmp_path: Path) -> Path:
+    engram_dir = tmp_path / "test-expert"
+    (engram_dir / "knowledge").mkdir(parents=True)
+    (engram_dir / "examples").mkdir()
+    (engram_dir / "meta.json").write_text(
+        json.dumps({"name": "test-expert", "description": "test"}), encoding="utf-8"
+    )
+    (engram_dir / "knowledge" / "_index.md").write_text(
+        "- `knowledge/深蹲.md` - 深蹲要点\n", encoding="utf-8"
+    )
+    (engram_dir / "knowledge" / "深蹲.md").write_text(
+        "# 深蹲\n\n深蹲时膝盖与脚尖方向一致，核心收紧。深蹲是下肢力量训练的基础动作。",
+        encoding="utf-8",
+    )
+    (engram_dir / "knowledge" / "饮食.md").write_text(
+        "# 饮食\n\n增肌期每天蛋白质摄入约 1.6g/kg，碳水分配在训练前后。", encoding="utf-8"
+    )
+    (engram_dir / "examples" / "膝盖不适.md").write_text(
+        "用户深蹲时膝盖疼，建议降低重量并检查膝盖内扣。", encoding="utf-8"
+    )
+    return engram_dir
+
+
+def test_bm25_ranks_chinese_and_latin_queries(tmp_path: Path) -> None:
+    engram_dir = _make_pack(tmp_path)
+    index = KnowledgeIndex(engram_dir)
+
+    assert index.refresh() is True
+    hits = index.search("深蹲 膝盖", top_k=3)
+
+    assert {hit.path for hit in hits} == {"knowledge/深蹲.md", "examples/膝盖不适.md"}
+    assert hits[0].score >= hits[1].score > 0
+    top = index.search("深蹲动作")[0]
+    assert top.path == "knowledge/深蹲.md"
+    assert "深蹲" in top.snippet
+    assert index.search("1.6g/kg 蛋白质")[0].path == "knowledge/饮食.md"
+    assert index.search("不存在的词") == []
+    assert index.stats()["documents"] == 3
+
+
+def test_index_is_persisted_and_refreshed_incrementally(tmp_path: Path, monkeypatch) -> None:
+    engram_dir = _make_pack(tmp_path)
+    KnowledgeIndex(engram_dir).refresh()
+    assert (engram_dir / INDEX_FILENAME).is_file()
+
+    reloaded = KnowledgeIndex(engram_dir)
+    indexed: list[str] = []
+    original = KnowledgeIndex._index_file
+
+    def tracking(self, rel):
+        indexed.append(rel)
+        return original(self, rel)
+
+    monkeypatch.setattr(KnowledgeIndex, "_index_file", tracking)
+    assert reloaded.refresh() is False
+    assert indexed == []
+
+    (engram_dir / "knowledge" / "饮食.md").unlink()
+    (engram_dir / "knowledge" / "睡眠.md").write_text("睡眠不足会影响恢复。", encoding="utf-8")
+    assert reloaded.refresh() is True
+    assert indexed == ["knowledge/睡眠.md"]
+    assert reloaded.search("蛋白质") == []
+    assert reloaded.search("睡眠")[0].path == "knowledge/睡眠.md"
+
+
+def test_loader_updates_index_on_add_knowledge_and_write(tmp_path: Path) -> None:
+    engram_dir = _make_pack(tmp_path)
+    loader = EngramLoader(tmp_path)
+
+    assert loader.search_knowledge("missing", "深蹲") is None
+    assert loader.search_knowledge("test-expert", "硬拉") == []
+
+    assert loader.add_knowledge("test-expert", "硬拉", "硬拉保持背部中立。", "硬拉要点")
+    assert loader.write_file("test-expert", "examples/腰酸.md", "硬拉后腰酸的处理。")
+    fresh = KnowledgeIndex(engram_dir)
+    assert {hit.path for hit in fresh.search("硬拉")} == {
+        "knowledge/硬拉.md",
+        "examples/腰酸.md",
+    }
+
+    results = loader.search_knowledge("test-expert", "硬拉", top_k=1)
+    assert len(results) == 1
+    assert set(results[0]) == {"path", "score", "snippet"}
+
+
+def test_snippet_maps_normalized_match_back_to_source(tmp_path: Path) -> None:
+    engram_dir = _make_pack(tmp_path)
+    # NFKC/casefold 会改变长度：… -> ...，㎏ -> kg，ß -> ss，ﬁ -> fi
+    prefix = "…㎏ßﬁ" * 30
+    (engram_dir / "knowledge" / "硬拉.md").write_text(
+        f"{prefix}硬拉锁定时髋部前送。{'尾' * 100}", encoding="utf-8"
+    )
+    index = KnowledgeIndex(engram_dir)
+    index.refresh()
+
+    hit = index.search("硬拉")[0]
+    assert hit.path == "knowledge/硬拉.md"
+    assert "硬拉锁定时髋部前送" in hit.snippet
+    assert hit.snippet.startswith("…") and hit.snippet.endswith("…")
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+import zipfile
 from pathlib import Path
 
 import pytest
@@ -126,6 +127,55 @@ def test_lint_accepts_extends_parent_exists(tmp_path: Path) -> None:
     assert not any("extends" in m.message and m.level == "error" for m in messages)
 
 
+def test_lint_resolves_extends_across_roots(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    packs = tmp_path / "packs"
+    base = tmp_path / "base"
+    child = _create_valid_pack(packs, "child")
+    _write(
+        child / "meta.json",
+        json.dumps({"name": "child", "description": "desc", "extends": "parent"}),
+    )
+    parent = _create_valid_pack(base, "parent")
+    _write(
+        parent / "meta.json",
+        json.dumps({"name": "parent", "description": "desc", "extends": "origin"}),
+    )
+    # 祖先以归档包形式放在另一个根目录里
+    with zipfile.ZipFile(base / "origin.engram.zip", "w") as archive:
+        archive.writestr("meta.json", json.dumps({"name": "origin", "description": "desc"}))
+        archive.writestr("role.md", "# role\n")
+
+    isolated = lint_engram(child)
+    assert any("extends 引用的父 Engram 不存在：parent" in m.message for m in isolated)
+
+    messages = lint_engram(child, roots=[packs, base])
+    assert not any("extends" in m.message for m in messages)
+
+    main(["lint", "child", "--packs-dir", str(packs), "--base-dir", str(base)])
+    assert "child: 0 errors, 0 warnings" in capsys.readouterr().out
+
+
+def test_lint_detects_extends_cycle(tmp_path: Path) -> None:
+    for name, parent in (("a", "b"), ("b", "c"), ("c", "a")):
+        pack = _create_valid_pack(tmp_path, name)
+        _write(
+            pack / "meta.json",
+            json.dumps(
+                {"name": name, "description": "desc", "extends": parent},
+                ensure_ascii=False,
+                indent=2,
+            ),
+        )
+
+    messages = lint_engram(tmp_path / "a")
+    assert any(
+        m.level == "error" and "extends 存在循环引用：a → b → c → a" in m.message
+        for m in messages
+    )
+
+
 def test_lint_checks_recursive_nested_indexes(tmp_path: Path) -> None:
     pack = _create_valid_pack(tmp_path)
     _write(
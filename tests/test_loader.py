@@ -131,6 +131,34 @@ def test_write_file_creates_and_overwrites(tmp_path: Path) -> None:
     assert (tmp_path / "test-expert" / "knowledge" / "topic.md").read_text() == "v2"
 
 
+def test_load_files_reads_batch_with_cap_and_per_path_errors(tmp_path: Path) -> None:
+    loader = _make_engram(tmp_path)
+    knowledge = tmp_path / "test-expert" / "knowledge"
+    knowledge.mkdir()
+    (knowledge / "a.md").write_text("甲" * 10, encoding="utf-8")
+    (knowledge / "b.md").write_text("b" * 40, encoding="utf-8")
+    (knowledge / "c.md").write_text("c" * 5, encoding="utf-8")
+
+    results = loader.load_files(
+        "test-expert",
+        ["knowledge/a.md", "knowledge/b.md", "knowledge/a.md", "knowledge/missing.md",
+         "../other/meta.json", "knowledge/c.md"],
+        max_total_bytes=40,
+    )
+
+    assert [r["path"] for r in results] == [
+        "knowledge/a.md", "knowledge/b.md", "knowledge/missing.md",
+        "../other/meta.json", "knowledge/c.md",
+    ]
+    assert results[0]["content"] == "甲" * 10
+    assert results[0]["bytes"] == 30
+    assert "上限" in results[1]["error"] and results[1]["content"] is None
+    assert results[2]["error"] == "文件不存在"
+    assert results[3]["error"] == "路径越界"
+    assert results[4]["content"] == "c" * 5
+    assert loader.load_files("missing", ["role.md"])[0]["error"] == "未找到 Engram: missing"
+
+
 def test_write_file_append_mode(tmp_path: Path) -> None:
     loader = _make_engram(tmp_path)
 
@@ -165,6 +193,7 @@ def test_capture_memory_creates_entry_and_index(tmp_path: Path) -> None:
     assert "用户膝盖有旧伤" in text
     assert "type:general" in text
 
+    assert loader.flush_memory_index("test-expert") is True
     index_file = memory_dir / "_index.md"
     assert index_file.is_file()
     index_content = index_file.read_text()
@@ -191,6 +220,7 @@ def test_capture_memory_with_type_and_tags(tmp_path: Path) -> None:
     assert "type:preference" in text
     assert "tags:fitness,schedule" in text
 
+    loader.flush_memory_index("test-expert")
     index_content = (tmp_path / "test-expert" / "memory" / "_index.md").read_text()
     assert "[preference]" in index_content
     assert "[fitness,schedule]" in index_content
@@ -234,6 +264,7 @@ def test_capture_tool_trace_creates_structured_memory(tmp_path: Path) -> None:
     assert "result: 命中 3 个候选专家" in text
     assert "type:tool_trace" in text
 
+    loader.flush_memory_index("test-expert")
     index_text = (tmp_path / "test-expert" / "memory" / "_index.md").read_text(
         encoding="utf-8"
     )
@@ -534,6 +565,7 @@ def test_hot_index_contains_category_summaries(tmp_path: Path) -> None:
         "test-expert", "完成第一次训练", "history", "第一次训练已完成", memory_type="history"
     )
 
+    loader.flush_memory_index("test-expert")
     index_text = (tmp_path / "test-expert" / "memory" / "_index.md").read_text(encoding="utf-8")
     assert "## 分类摘要" in index_text
     assert "`preferences`" in index_text
@@ -619,6 +651,7 @@ def test_loader_reads_from_project_and_global_roots(tmp_path: Path) -> None:
         is_global=True,
     )
     assert ok is True
+    assert loader.flush_memory_index("shared-expert", is_global=True) is True
     assert (global_root / "_global" / "memory" / "_index.md").is_file()
 
 
@@ -651,6 +684,142 @@ def test_load_engram_base_supports_parent_knowledge_inheritance(tmp_path: Path)
     assert "knowledge/base.md" in loaded
 
 
+def test_load_engram_base_is_served_from_cache_until_sources_change(
+    tmp_path: Path,
+) -> None:
+    loader = _make_engram(tmp_path)
+
+    first = loader.load_engram_base("test-expert")
+    second = loader.load_engram_base("test-expert")
+    assert first == second
+    assert loader.context_cache_stats()["hits"] == 1
+
+    (tmp_path / "test-expert" / "role.md").write_text(
+        "# updated role with more text", encoding="utf-8"
+    )
+    third = loader.load_engram_base("test-expert")
+    assert third is not None
+    assert "updated role" in third
+    assert loader.context_cache_stats()["misses"] == 2
+
+
+def test_load_engram_base_cache_tracks_memory_and_parent(tmp_path: Path) -> None:
+    loader = _make_engram(tmp_path, "parent")
+    child = tmp_path / "child"
+    child.mkdir()
+    (child / "meta.json").write_text(
+        '{"name":"child","description":"child","extends":"parent"}',
+        encoding="utf-8",
+    )
+    (child / "role.md").write_text("child role", encoding="utf-8")
+
+    before = loader.load_engram_base("child")
+    assert before is not None
+    assert "继承知识索引" not in before
+
+    (tmp_path / "parent" / "knowledge").mkdir()
+    (tmp_path / "parent" / "knowledge" / "_index.md").write_text(
+        "- `knowledge/base.md` - 父知识", encoding="utf-8"
+    )
+    after_parent = loader.load_engram_base("child")
+    assert after_parent is not None
+    assert "knowledge/base.md" in after_parent
+
+    loader.capture_memory("child", "偏好晨练", "preferences", "偏好晨练")
+    after_memory = loader.load_engram_base("child")
+    assert after_memory is not None
+    assert "## 动态记忆" in after_memory
+
+
+def _make_extends_pack(
+    root: Path, name: str, parent: str | None, index: str | None = None
+) -> None:
+    pack = root / name
+    pack.mkdir()
+    meta = {"name": name, "description": name}
+    if parent:
+        meta["extends"] = parent
+    (pack / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+    (pack / "role.md").write_text(f"{name} role", encoding="utf-8")
+    if index is not None:
+        (pack / "knowledge").mkdir()
+        (pack / "knowledge" / "_index.md").write_text(index, encoding="utf-8")
+
+
+def test_load_engram_base_merges_multi_level_extends_chain(tmp_path: Path) -> None:
+    shared = "- `knowledge/shared.md` - 共享规范"
+    _make_extends_pack(
+        tmp_path, "base", None, f"## 通用\n{shared}\n\n## 基础\n- `knowledge/base.md` - 基础"
+    )
+    _make_extends_pack(tmp_path, "domain", "base", f"## 通用\n{shared}\n")
+    _make_extends_pack(tmp_path, "team", "domain", "- `knowledge/team.md` - 团队约定")
+    _make_extends_pack(tmp_path, "person", "team")
+
+    loader = EngramLoader(tmp_path)
+    assert loader.extends_chain("person").names == ["team", "domain", "base"]
+
+    loaded = loader.load_engram_base("person")
+    assert loaded is not None
+    team_at = loaded.index("## 继承知识索引（来自 team）")
+    domain_at = loaded.index("## 继承知识索引（来自 domain）")
+    base_at = loaded.index("## 继承知识索引（来自 base）")
+    assert team_at < domain_at < base_at
+    # 相同索引行只出现一次；base 中去重后为空的分组标题也被去掉
+    assert loaded.count("knowledge/shared.md") == 1
+    assert "knowledge/base.md" in loaded[base_at:]
+    assert "## 通用" not in loaded[base_at:]
+
+    (tmp_path / "base" / "knowledge" / "_index.md").write_text(
+        "- `knowledge/root.md` - 新的根知识", encoding="utf-8"
+    )
+    updated = loader.load_engram_base("person")
+    assert updated is not None
+    assert "knowledge/root.md" in updated
+    assert "knowledge/base.md" not in updated
+
+
+def test_extends_cycle_is_cut_and_reported(tmp_path: Path) -> None:
+    _make_extends_pack(tmp_path, "a", "b", "- `knowledge/a.md` - A")
+    _make_extends_pack(tmp_path, "b", "a", "- `knowledge/b.md` - B")
+
+    loader = EngramLoader(tmp_path)
+    chain = loader.extends_chain("a")
+    assert chain.names == ["b"]
+    assert chain.cycle == ("a", "b", "a")
+
+    loaded = loader.load_engram_base("a")
+    assert loaded is not None
+    assert "## 继承知识索引（来自 b）" in loaded
+    assert "extends 存在循环引用：a → b → a" in loaded
+
+
+def test_inherited_sections_are_memoized_across_memory_writes(tmp_path: Path) -> None:
+    _make_extends_pack(tmp_path, "base", None, "- `knowledge/base.md` - 基础")
+    _make_extends_pack(tmp_path, "child", "base")
+    loader = EngramLoader(tmp_path)
+
+    loader.load_engram_base("child")
+    loader.capture_memory("child", "偏好晨练", "preferences", "偏好晨练")
+    loaded = loader.load_engram_base("child")
+    assert loaded is not None
+    assert "knowledge/base.md" in loaded
+    assert loader.inheritance_cache.stats()["hits"] == 1
+
+
+def test_context_cache_is_bounded(tmp_path: Path) -> None:
+    _make_engram(tmp_path, "expert-a")
+    _make_engram(tmp_path, "expert-b")
+    loader = EngramLoader(tmp_path, context_cache_size=1)
+
+    loader.load_engram_base("expert-a")
+    loader.load_engram_base("expert-b")
+    loader.load_engram_base("expert-a")
+
+    stats = loader.context_cache_stats()
+    assert stats["size"] == 1
+    assert stats["hits"] == 0
+
+
 def test_onboarding_prompt_only_shows_before_first_memory(tmp_path: Path) -> None:
     engram_dir = tmp_path / "guide-expert"
     engram_dir.mkdir()
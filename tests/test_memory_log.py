@@ -0,0 +1,296 @@
+import json
+from pathlib import Path
+
+from engram_server.loader import EngramLoader
+from engram_server.memory_log import LOG_FILENAME, MemoryLog, scan_blocks
+
+
+def _make_engram(tmp_path: Path) -> EngramLoader:
+    engram_dir = tmp_path / "test-expert"
+    engram_dir.mkdir()
+    (engram_dir / "meta.json").write_text(
+        json.dumps({"name": "test-expert", "description": "test"}), encoding="utf-8"
+    )
+    (engram_dir / "role.md").write_text("role", encoding="utf-8")
+    return EngramLoader(tmp_path)
+
+
+def _log_records(memory_dir: Path) -> list[dict]:
+    lines = (memory_dir / LOG_FILENAME).read_text(encoding="utf-8").splitlines()
+    return [json.loads(line) for line in lines]
+
+
+def test_capture_appends_log_and_defers_hot_index(tmp_path: Path) -> None:
+    loader = _make_engram(tmp_path)
+    memory_dir = tmp_path / "test-expert" / "memory"
+
+    loader.capture_memory("test-expert", "内容一", "profile", "摘要一")
+    loader.capture_memory("test-expert", "内容二", "profile", "摘要二")
+
+    records = _log_records(memory_dir)
+    assert [r["op"] for r in records] == ["add", "add"]
+    entry_id = records[0]["id"]
+    assert f"id:{entry_id}" in (memory_dir / "profile.md").read_text(encoding="utf-8")
+    assert "摘要二" in (memory_dir / "_index_full.md").read_text(encoding="utf-8")
+    assert not (memory_dir / "_index.md").exists()
+
+    content = loader.load_engram_base("test-expert")
+    assert content is not None
+    assert "摘要二" in content
+    assert "摘要二" in (memory_dir / "_index.md").read_text(encoding="utf-8")
+
+
+def test_delete_and_correct_append_tombstones(tmp_path: Path) -> None:
+    loader = _make_engram(tmp_path)
+    memory_dir = tmp_path / "test-expert" / "memory"
+    loader.capture_memory("test-expert", "旧内容", "profile", "旧摘要")
+    loader.capture_memory("test-expert", "保留内容", "profile", "保留摘要")
+
+    assert loader.correct_memory("test-expert", "profile", "旧摘要", "新内容", "新摘要")
+    assert loader.delete_memory("test-expert", "profile", "保留摘要")
+
+    ops = [r["op"] for r in _log_records(memory_dir)]
+    assert ops == ["add", "add", "put", "block", "block", "del"]
+    full_index = (memory_dir / "_index_full.md").read_text(encoding="utf-8")
+    assert "新摘要" in full_index
+    assert "旧摘要" not in full_index
+    assert "保留摘要" not in full_index
+    category_text = (memory_dir / "profile.md").read_text(encoding="utf-8")
+    assert "新内容" in category_text
+    assert "保留内容" not in category_text
+
+
+def test_delete_only_removes_targeted_entry_in_same_minute(tmp_path: Path) -> None:
+    loader = _make_engram(tmp_path)
+    memory_dir = tmp_path / "test-expert" / "memory"
+    loader.capture_memory("test-expert", "甲内容", "profile", "甲摘要")
+    loader.capture_memory("test-expert", "乙内容", "profile", "乙摘要")
+
+    assert loader.delete_memory("test-expert", "profile", "甲摘要")
+
+    category_text = (memory_dir / "profile.md").read_text(encoding="utf-8")
+    assert "甲内容" not in category_text
+    assert "乙内容" in category_text
+
+
+def test_delete_and_correct_by_id_use_recorded_offsets(tmp_path: Path) -> None:
+    loader = _make_engram(tmp_path)
+    memory_dir = tmp_path / "test-expert" / "memory"
+    for i in range(3):
+        loader.capture_memory("test-expert", f"内容{i}", "profile", f"摘要{i}")
+    first, second, third = (r["id"] for r in _log_records(memory_dir))
+
+    assert loader.correct_memory(
+        "test-expert", "", "", "更长的新内容" * 3, "新摘要", entry_id=first
+    )
+    assert loader.delete_memory("test-expert", "", entry_id=second)
+    assert loader.delete_memory("test-expert", "other", entry_id=third) is False
+
+    assert "locate" not in [r["op"] for r in _log_records(memory_dir)]
+    category_bytes = (memory_dir / "profile.md").read_bytes()
+    blocks = scan_blocks(memory_dir / "profile.md")
+    assert list(blocks) == [first, third]
+    assert "更长的新内容" in category_bytes.decode("utf-8")
+    assert "内容1" not in category_bytes.decode("utf-8")
+    # 重放得到的偏移与实际文件一致
+    fresh = MemoryLog(memory_dir)
+    assert fresh.location(first) == ("profile", *blocks[first])
+    assert fresh.location(third) == ("profile", *blocks[third])
+
+
+def test_stale_offsets_fall_back_to_scan(tmp_path: Path) -> None:
+    loader = _make_engram(tmp_path)
+    memory_dir = tmp_path / "test-expert" / "memory"
+    loader.capture_memory("test-expert", "甲内容", "profile", "甲摘要")
+    loader.capture_memory("test-expert", "乙内容", "profile", "乙摘要")
+    category_file = memory_dir / "profile.md"
+    category_file.write_text(
+        "# 手工加的标题\n" + category_file.read_text(encoding="utf-8"), encoding="utf-8"
+    )
+
+    assert loader.delete_memory("test-expert", "profile", "乙摘要")
+
+    assert _log_records(memory_dir)[-2]["op"] == "locate"
+    text = category_file.read_text(encoding="utf-8")
+    assert "乙内容" not in text
+    assert "甲内容" in text
+    assert loader.delete_memory("test-expert", "profile", "甲摘要")
+    assert _log_records(memory_dir)[-2]["op"] == "block"
+    assert category_file.read_text(encoding="utf-8") == "# 手工加的标题\n"
+
+
+def test_capture_memories_writes_batch_in_one_pass(tmp_path: Path) -> None:
+    loader = _make_engram(tmp_path)
+    memory_dir = tmp_path / "test-expert" / "memory"
+
+    results = loader.capture_memories(
+        "test-expert",
+        [
+            {"content": "喜欢晨练", "category": "preferences", "summary": "晨练"},
+            {"content": "膝盖旧伤", "category": "profile", "summary": "旧伤", "tags": ["injury"]},
+            {"content": "家有哑铃", "category": "preferences", "summary": "哑铃"},
+            {"content": "中文回复", "category": "profile", "summary": "语言", "is_global": True},
+            {"content": "", "category": "profile", "summary": "空内容"},
+        ],
+    )
+
+    assert results == [True, True, True, True, False]
+    records = _log_records(memory_dir)
+    assert [r["category"] for r in records] == ["preferences", "preferences", "profile"]
+    blocks = scan_blocks(memory_dir / "preferences.md")
+    assert [blocks[r["id"]] for r in records[:2]] == [
+        [r["at"], r["len"]] for r in records[:2]
+    ]
+    hot_index = (memory_dir / "_index.md").read_text(encoding="utf-8")
+    assert "晨练" in hot_index and "哑铃" in hot_index and "[injury]" in hot_index
+    assert (memory_dir / "_onboarded").exists()
+    global_full = tmp_path / "_global" / "memory" / "_index_full.md"
+    assert "语言" in global_full.read_text(encoding="utf-8")
+
+    again = loader.capture_memories(
+        "test-expert", [{"content": "喜欢晨练", "category": "preferences", "summary": "晨练"}]
+    )
+    assert again == [True]
+    assert len(_log_records(memory_dir)) == 3
+
+
+def test_legacy_index_is_migrated_into_log(tmp_path: Path) -> None:
+    loader = _make_engram(tmp_path)
+    memory_dir = tmp_path / "test-expert" / "memory"
+    memory_dir.mkdir()
+    (memory_dir / "_index_full.md").write_text(
+        "- `memory/profile.md` [2026-01-01 10:00] [general] 旧数据\n", encoding="utf-8"
+    )
+    (memory_dir / "profile.md").write_text(
+        "\n---\n[2026-01-01 10:00] type:general\n旧数据内容\n", encoding="utf-8"
+    )
+
+    (line,) = loader.list_recent_memory_summaries("test-expert", "profile")
+    assert "旧数据 (id:" in line
+    records = _log_records(memory_dir)
+    assert [r["op"] for r in records] == ["add"]
+    assert records[0]["line"] == line
+    assert "## 分类摘要" in (memory_dir / "_index.md").read_text(encoding="utf-8")
+
+    assert loader.delete_memory("test-expert", "profile", "旧数据")
+    assert "旧数据内容" not in (memory_dir / "profile.md").read_text(encoding="utf-8")
+
+
+def test_compaction_drops_dead_records(tmp_path: Path) -> None:
+    memory_dir = tmp_path / "memory"
+    log = MemoryLog(memory_dir)
+    log.append([{"op": "add", "id": f"e{i}", "line": f"- `memory/a.md` x{i}"} for i in range(3)])
+    log.append([{"op": "del", "id": "e0"}, {"op": "put", "id": "e1", "line": "- `memory/a.md` y"}])
+
+    log.compact()
+
+    records = _log_records(memory_dir)
+    assert [(r["op"], r["id"]) for r in records] == [("add", "e1"), ("add", "e2")]
+    assert [e.line for e in MemoryLog(memory_dir).entries()] == [
+        "- `memory/a.md` y",
+        "- `memory/a.md` x2",
+    ]
+
+
+def test_log_picks_up_appends_from_other_writers(tmp_path: Path) -> None:
+    memory_dir = tmp_path / "memory"
+    first = MemoryLog(memory_dir)
+    second = MemoryLog(memory_dir)
+    first.append([{"op": "add", "id": "a", "line": "- `memory/a.md` one"}])
+    assert [e.id for e in second.entries()] == ["a"]
+
+    second.append([{"op": "add", "id": "b", "line": "- `memory/a.md` two"}])
+    first.append([{"op": "drop", "category": "a"}])
+
+    assert first.entries() == []
+    assert second.entries() == []
+
+
+def test_next_expiry_watermark_is_persisted(tmp_path: Path) -> None:
+    memory_dir = tmp_path / "memory"
+    log = MemoryLog(memory_dir)
+    log.append(
+        [
+            {"op": "add", "id": "a", "line": "- `memory/a.md` [x] [fact] expires:2031-05-01 a"},
+            {"op": "add", "id": "b", "line": "- `memory/a.md` [x] [fact] expires:2030-01-01 b"},
+            {"op": "add", "id": "c", "line": "- `memory/a.md` [x] [fact] c"},
+        ]
+    )
+    log.materialize()
+
+    assert log.next_expiry() == "2030-01-01"
+    assert log.state()["next_expiry"] == "2030-01-01"
+    fresh = MemoryLog(memory_dir)
+    assert fresh.expiry_due("2030-01-02") is True
+    assert fresh.expiry_due("2030-01-01") is False
+
+    log.append([{"op": "del", "id": "b"}])
+    assert log.next_expiry() == "2030-01-01"
+    log.materialize()
+    assert log.recompute_next_expiry() == "2031-05-01"
+    assert MemoryLog(memory_dir).next_expiry() == "2031-05-01"
+
+
+def test_load_skips_archive_scan_without_due_entries(tmp_path: Path, monkeypatch) -> None:
+    loader = _make_engram(tmp_path)
+    loader.capture_memory("test-expert", "长期内容", "profile", "长期摘要")
+    loader.capture_memory(
+        "test-expert", "未来过期", "status", "未来状态", expires="2999-01-01"
+    )
+
+    calls: list[Path] = []
+    monkeypatch.setattr(loader, "_archive_expired_entries", calls.append)
+    assert "长期摘要" in loader.load_engram_base("test-expert")
+    assert calls == []
+
+
+def test_background_maintenance_archives_expired_entries(tmp_path: Path) -> None:
+    engram_dir = tmp_path / "test-expert"
+    engram_dir.mkdir()
+    (engram_dir / "meta.json").write_text(
+        json.dumps({"name": "test-expert", "description": "test"}), encoding="utf-8"
+    )
+    loader = EngramLoader(tmp_path, background_maintenance=True)
+    loader.capture_memory(
+        "test-expert", "过期内容", "status", "过期状态", expires="2000-01-01"
+    )
+
+    loaded = loader.load_engram_base("test-expert")
+    assert "过期状态" not in loaded
+    assert loader.drain_maintenance(timeout=5) is True
+
+    memory_dir = engram_dir / "memory"
+    assert "过期内容" in (memory_dir / "status-expired.md").read_text(encoding="utf-8")
+    assert "过期内容" not in (memory_dir / "status.md").read_text(encoding="utf-8")
+    assert MemoryLog(memory_dir).next_expiry() is None
+
+
+def test_load_file_page_walks_entries_and_bytes(tmp_path: Path) -> None:
+    loader = _make_engram(tmp_path)
+    for i in range(5):
+        loader.capture_tool_trace(
+            "test-expert", tool_name=f"tool{i}", intent="测试分页", result_summary="成功"
+        )
+    trace_file = tmp_path / "test-expert" / "memory" / "tool-trace.md"
+    text = trace_file.read_text(encoding="utf-8")
+
+    pages, offset = [], 0
+    while offset is not None:
+        page = loader.load_file_page("test-expert", "memory/tool-trace.md", offset=offset, limit=2)
+        pages.append(page)
+        offset = page["next"]
+    assert [(p["start"], p["end"], p["total"]) for p in pages] == [(0, 2, 5), (2, 4, 5), (4, 5, 5)]
+    assert "".join(p["content"] for p in pages) == text
+    assert "tool2" in pages[1]["content"] and "tool0" not in pages[1]["content"]
+    assert loader.block_index_cache.stats()["misses"] == 1
+
+    chunks, offset = [], 0
+    while offset is not None:
+        page = loader.load_file_page(
+            "test-expert", "memory/tool-trace.md", offset=offset, limit=5, unit="bytes"
+        )
+        chunks.append(page["content"])
+        offset = page["next"]
+    assert "".join(chunks) == text
+    assert loader.load_file_page("test-expert", "memory/none.md") is None
+    assert loader.load_file_page("test-expert", "role.md", unit="lines") is None
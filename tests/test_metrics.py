@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from engram_server.loader import EngramLoader
+from engram_server.metrics import UNKNOWN_PACK, ToolMetrics
+from engram_server.server import create_mcp_app
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def test_tool_metrics_histogram_and_exports(tmp_path: Path) -> None:
+    metrics = ToolMetrics()
+    metrics.observe("coach", "load_engram", 0.002)
+    metrics.observe("coach", "load_engram", 0.030, error=True)
+    metrics.observe("", "list_engrams", 20.0)
+
+    rows = {(row["pack"], row["tool"]): row for row in metrics.snapshot()}
+    load = rows[("coach", "load_engram")]
+    assert (load["calls"], load["errors"]) == (2, 1)
+    assert load["sum_ms"] == 32.0
+    assert load["buckets"]["0.0025"] == 1
+    assert load["buckets"]["0.05"] == 2
+    assert load["buckets"]["+Inf"] == 2
+    assert rows[("", "list_engrams")]["p95_ms"] is None
+    assert [row["tool"] for row in metrics.snapshot("coach")] == ["load_engram"]
+
+    text = metrics.render_prometheus()
+    assert 'engram_tool_calls_total{pack="coach",tool="load_engram"} 2' in text
+    assert 'engram_tool_errors_total{pack="coach",tool="load_engram"} 1' in text
+    assert 'engram_tool_duration_seconds_bucket{pack="coach",tool="load_engram",le="+Inf"} 2' in text
+
+    dump = tmp_path / "metrics.jsonl"
+    assert metrics.dump_jsonl(dump) == 2
+    lines = [json.loads(line) for line in dump.read_text(encoding="utf-8").splitlines()]
+    assert {line["tool"] for line in lines} == {"load_engram", "list_engrams"}
+
+
+@pytest.mark.asyncio
+async def test_mcp_tools_and_loader_methods_are_measured(tmp_path: Path) -> None:
+    shutil.copytree(FIXTURES / "fitness-coach", tmp_path / "fitness-coach")
+    metrics = ToolMetrics()
+    loader = EngramLoader(tmp_path, metrics=metrics)
+    app = create_mcp_app(loader, tmp_path)
+
+    await app.call_tool("load_engram", {"name": "fitness-coach", "query": "膝盖"})
+    await app.call_tool("load_engram", {"name": "missing", "query": ""})
+    await app.call_tool("load_engram", {"name": "fitnes-coach", "query": ""})
+    await app.call_tool("read_engram_file", {"name": "fitness-coach", "path": "role.md"})
+    # 正常的空结果与以「失败：」开头的文件内容都不算错误
+    empty = str(
+        await app.call_tool("search_knowledge", {"name": "fitness-coach", "query": "zyxq"})
+    )
+    assert "未找到与「zyxq」相关的知识" in empty
+    notes = tmp_path / "fitness-coach" / "notes.md"
+    notes.write_text("写入失败：这是笔记原文\n", encoding="utf-8")
+    await app.call_tool("read_engram_file", {"name": "fitness-coach", "path": "notes.md"})
+    await app.call_tool("read_engram_file", {"name": "fitness-coach", "path": "absent.md"})
+
+    rows = {(row["pack"], row["tool"]): row for row in metrics.snapshot()}
+    assert rows[("fitness-coach", "load_engram")]["calls"] == 1
+    # 无法解析的 pack 名都归到同一个标签下，不会各自新增序列
+    unknown = rows[(UNKNOWN_PACK, "load_engram")]
+    assert (unknown["calls"], unknown["errors"]) == (2, 2)
+    assert not any(pack in {"missing", "fitnes-coach"} for pack, _ in rows)
+    assert rows[("fitness-coach", "search_knowledge")]["errors"] == 0
+    reads = rows[("fitness-coach", "read_engram_file")]
+    assert (reads["calls"], reads["errors"]) == (3, 1)
+    assert rows[("fitness-coach", "loader.load_engram_base")]["calls"] == 1
+    assert rows[("fitness-coach", "loader.load_file")]["errors"] == 0
+
+    report = str(await app.call_tool("metrics_engrams", {"name": "fitness-coach"}))
+    assert "loader.load_engram_base" in report
+    assert "missing" not in report
+    prom = str(await app.call_tool("metrics_engrams", {"format": "prometheus"}))
+    assert "engram_tool_duration_seconds_bucket" in prom
+
+
+def test_web_metrics_endpoint_serves_prometheus_text(tmp_path: Path) -> None:
+    from starlette.testclient import TestClient
+
+    from engram_server.web import create_web_app
+
+    metrics = ToolMetrics()
+    metrics.observe("coach", "load_engram", 0.01)
+    client = TestClient(create_web_app(tmp_path, metrics=metrics))
+
+    response = client.get("/api/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'engram_tool_calls_total{pack="coach",tool="load_engram"} 1' in response.text
+    client.get("/api/engrams")
+    assert "loader.list_engrams" in client.get("/api/metrics").text
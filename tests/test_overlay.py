@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+
+from engram_server.loader import EngramLoader
+from engram_server.overlay import LOWER_LINK_FILENAME, DirectoryLayer, read_lower_link
+from engram_server.server import (
+    _install_engram_from_local_examples,
+    _link_engram_from_directory,
+)
+
+FIXTURE = Path(__file__).parent / "fixtures" / "fitness-coach"
+EXAMPLES = Path(__file__).resolve().parents[1] / "examples"
+
+
+def _snapshot(root: Path) -> dict[str, bytes]:
+    return {
+        path.relative_to(root).as_posix(): path.read_bytes()
+        for path in sorted(root.rglob("*"))
+        if path.is_file()
+    }
+
+
+def test_directory_layer_path_map() -> None:
+    layer = DirectoryLayer(FIXTURE)
+    assert layer.is_file("meta.json")
+    assert layer.is_dir("knowledge")
+    assert "_index.md" in layer.list_dir("knowledge")
+    assert layer.size("role.md") == (FIXTURE / "role.md").stat().st_size
+    assert layer.read("role.md") == (FIXTURE / "role.md").read_bytes()
+    assert layer.read("missing.md") is None
+
+
+def test_base_root_pack_reads_lower_and_writes_upper(tmp_path: Path) -> None:
+    base = tmp_path / "base"
+    shutil.copytree(FIXTURE, base / "fitness-coach")
+    before = _snapshot(base)
+    packs = tmp_path / "packs"
+    packs.mkdir()
+    overlay = tmp_path / "overlay"
+    loader = EngramLoader(packs, base_dirs=[base], overlay_dir=overlay)
+    tree = EngramLoader(FIXTURE.parent)
+
+    assert [item["name"] for item in loader.list_engrams()] == ["fitness-coach"]
+    assert loader.load_engram_base("fitness-coach") == tree.load_engram_base("fitness-coach")
+    assert loader.source_dir("fitness-coach") == (base / "fitness-coach").resolve()
+
+    assert loader.capture_memory("fitness-coach", "偏好晨练", "preferences", "偏好晨练")
+    assert loader.add_knowledge("fitness-coach", "拉伸", "拉伸要点", "拉伸摘要")
+    upper = overlay / "fitness-coach"
+    assert (upper / "memory" / "preferences.md").is_file()
+    assert (upper / "knowledge" / "拉伸.md").is_file()
+
+    index = loader.load_file("fitness-coach", "knowledge/_index.md")
+    assert index is not None
+    assert "knowledge/膝关节损伤训练.md" in index
+    assert "knowledge/拉伸.md" in index
+    # 上层覆盖下层：改写上层的 role.md 后读到新内容
+    (upper / "role.md").write_text("# 新角色\n", encoding="utf-8")
+    assert loader.load_file("fitness-coach", "role.md") == "# 新角色\n"
+    assert _snapshot(base) == before
+
+
+def test_zero_copy_install_links_upper_to_source(tmp_path: Path) -> None:
+    source = tmp_path / "examples" / "fitness-coach"
+    shutil.copytree(FIXTURE, source)
+    before = _snapshot(source)
+    packs = tmp_path / "packs"
+
+    result = _link_engram_from_directory(source, packs, target_name="fitness-coach")
+    assert result["ok"] is True
+    upper = packs / "fitness-coach"
+    assert sorted(path.name for path in upper.iterdir()) == [LOWER_LINK_FILENAME]
+    assert read_lower_link(upper) == source.resolve()
+    assert _link_engram_from_directory(source, packs, target_name="fitness-coach")["ok"] is False
+
+    loader = EngramLoader(packs)
+    assert loader.load_file("fitness-coach", "role.md") == (FIXTURE / "role.md").read_text(
+        encoding="utf-8"
+    )
+    assert loader.source_dir("fitness-coach") == source.resolve()
+    assert loader.capture_memory("fitness-coach", "膝盖旧伤", "context", "膝盖旧伤")
+    assert (upper / "memory" / "context.md").is_file()
+    assert _snapshot(source) == before
+
+
+def test_search_knowledge_on_linked_example_install(tmp_path: Path) -> None:
+    packs = tmp_path / "packs"
+    result = _install_engram_from_local_examples("fitness-coach", packs)
+    assert result is not None and result["ok"] is True
+    upper = packs / "fitness-coach"
+    assert read_lower_link(upper) is not None
+    in_place = tmp_path / "in-place"
+    shutil.copytree(EXAMPLES / "fitness-coach", in_place / "fitness-coach")
+
+    linked = EngramLoader(packs)
+    hits = linked.search_knowledge("fitness-coach", "深蹲 膝盖", top_k=5)
+    assert hits
+    assert hits == EngramLoader(in_place).search_knowledge("fitness-coach", "深蹲 膝盖", top_k=5)
+
+    # 上层同名文件覆盖下层，索引按实际来源的 stamp 刷新
+    shadowed = hits[0]["path"]
+    (upper / shadowed).parent.mkdir(parents=True, exist_ok=True)
+    (upper / shadowed).write_text("# 覆盖\n\nzyxrowing tempo only.\n", encoding="utf-8")
+    again = linked.search_knowledge("fitness-coach", "深蹲 膝盖")
+    assert shadowed not in [hit["path"] for hit in again]
+    override = linked.search_knowledge("fitness-coach", "zyxrowing")
+    assert [hit["path"] for hit in override] == [shadowed]
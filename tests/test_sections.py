@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from engram_server.loader import EngramLoader
+from engram_server.sections import find_section, parse_sections
+from engram_server.server import create_mcp_app
+
+_DOC = (
+    "# 膝关节\n"
+    "概述段落。\n"
+    "## 急性期\n"
+    "先排除急性损伤。\n"
+    "```\n"
+    "# 代码里的井号不是标题\n"
+    "```\n"
+    "### 冰敷\n"
+    "每次15分钟。\n"
+    "## 进阶标准\n"
+    "疼痛≤3/10且24小时不加重。\n"
+)
+
+
+def _make_pack(tmp_path: Path) -> EngramLoader:
+    engram_dir = tmp_path / "test-expert"
+    (engram_dir / "knowledge").mkdir(parents=True)
+    (engram_dir / "meta.json").write_text(
+        json.dumps({"name": "test-expert", "description": "test"}), encoding="utf-8"
+    )
+    (engram_dir / "role.md").write_text("你是健身教练。", encoding="utf-8")
+    (engram_dir / "knowledge" / "膝关节.md").write_text(_DOC, encoding="utf-8")
+    return EngramLoader(tmp_path)
+
+
+def test_parse_sections_builds_heading_tree_with_byte_ranges() -> None:
+    data = _DOC.encode("utf-8")
+    sections = parse_sections(data)
+
+    assert [s.heading_path for s in sections] == [
+        "膝关节",
+        "膝关节 > 急性期",
+        "膝关节 > 急性期 > 冰敷",
+        "膝关节 > 进阶标准",
+    ]
+    acute = sections[1]
+    assert data[acute.start : acute.end].decode("utf-8").startswith("## 急性期\n")
+    assert "每次15分钟" in data[acute.start : acute.end].decode("utf-8")
+    assert "进阶标准" not in data[acute.start : acute.end].decode("utf-8")
+    assert sections[0].end == len(data)
+    assert find_section(sections, "急性期 > 冰敷") is sections[2]
+    assert find_section(sections, "## 进阶") is sections[3]
+    assert find_section(sections, "不存在") is None
+
+
+def test_load_section_uses_cache_until_file_changes(tmp_path: Path) -> None:
+    loader = _make_pack(tmp_path)
+    path = tmp_path / "test-expert" / "knowledge" / "膝关节.md"
+
+    assert loader.load_section("test-expert", "knowledge/膝关节.md", "进阶标准") == (
+        "## 进阶标准\n疼痛≤3/10且24小时不加重。\n"
+    )
+    loader.list_sections("test-expert", "knowledge/膝关节.md")
+    assert loader.section_cache.stats()["hits"] == 1
+
+    path.write_text(_DOC + "## 新增章节\n新内容\n", encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert loader.load_section("test-expert", "knowledge/膝关节.md", "新增章节") == (
+        "## 新增章节\n新内容\n"
+    )
+    assert loader.load_section("test-expert", "knowledge/missing.md", "x") is None
+    assert loader.section_outline("test-expert") == {
+        "knowledge/膝关节.md": ["急性期", "冰敷", "进阶标准", "新增章节"]
+    }
+
+
+@pytest.mark.asyncio
+async def test_read_engram_section_tool_and_heading_outline(tmp_path: Path) -> None:
+    app = create_mcp_app(_make_pack(tmp_path), tmp_path)
+
+    section = str(
+        await app.call_tool(
+            "read_engram_section",
+            {"name": "test-expert", "path": "knowledge/膝关节.md", "heading": "冰敷"},
+        )
+    )
+    missing = str(
+        await app.call_tool(
+            "read_engram_section",
+            {"name": "test-expert", "path": "knowledge/膝关节.md", "heading": "营养"},
+        )
+    )
+    loaded = str(
+        await app.call_tool(
+            "load_engram",
+            {"name": "test-expert", "query": "膝盖", "include_headings": True},
+        )
+    )
+
+    assert "每次15分钟" in section
+    assert "疼痛" not in section
+    assert "未找到章节: 营养" in missing and "进阶标准" in missing
+    assert "## 章节目录" in loaded
+    assert "`knowledge/膝关节.md`: 急性期 / 冰敷 / 进阶标准" in loaded
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+import re
 import shutil
 import sys
 import tempfile
@@ -126,6 +127,76 @@ async def test_read_engram_file_reads_knowledge_file() -> None:
     assert "疼痛不超过3/10" in content
 
 
+@pytest.mark.asyncio
+async def test_read_engram_files_reads_batch_in_one_call() -> None:
+    session = await _open_session(FIXTURES)
+    try:
+        content = _result_text(
+            await session.call_tool(
+                "read_engram_files",
+                {
+                    "name": "fitness-coach",
+                    "paths": [
+                        "knowledge/膝关节损伤训练.md",
+                        "knowledge/不存在.md",
+                        "role.md",
+                    ],
+                },
+            )
+        )
+    finally:
+        await _close_session(session)
+
+    assert "## knowledge/膝关节损伤训练.md" in content
+    assert "疼痛不超过3/10" in content
+    assert "## knowledge/不存在.md\n⚠️ 文件不存在" in content
+    assert "## role.md" in content
+
+
+@pytest.mark.asyncio
+async def test_read_engram_file_pages_memory_entries_with_cursor(tmp_path: Path) -> None:
+    _setup_tmp_engram(tmp_path, "fitness-coach")
+    memory_dir = tmp_path / "fitness-coach" / "memory"
+    memory_dir.mkdir()
+    (memory_dir / "user-profile.md").write_text(
+        "".join(f"\n---\n[2026-01-0{i} 10:00] type:fact\n条目{i}\n" for i in range(1, 4)),
+        encoding="utf-8",
+    )
+    session = await _open_session(tmp_path)
+    try:
+        first = _result_text(
+            await session.call_tool(
+                "read_engram_file",
+                {"name": "fitness-coach", "path": "memory/user-profile.md", "limit": 1},
+            )
+        )
+        cursor = re.search(r"cursor: (\S+)", first).group(1)
+        second = _result_text(
+            await session.call_tool(
+                "read_engram_file",
+                {"name": "fitness-coach", "path": "memory/user-profile.md", "cursor": cursor},
+            )
+        )
+        # 旧的两段式 cursor 仍然可用，页大小回到默认值
+        legacy = _result_text(
+            await session.call_tool(
+                "read_engram_file",
+                {"name": "fitness-coach", "path": "memory/user-profile.md", "cursor": "entry:1"},
+            )
+        )
+    finally:
+        await _close_session(session)
+
+    assert "（第 1-1 条记忆，共 3 条）" in first
+    assert "条目1" in first and "条目2" not in first
+    assert cursor == "entry:1:1"
+    # 只回传 cursor 时沿用第一页的 limit
+    assert "（第 2-2 条记忆，共 3 条）" in second
+    assert "下一页 cursor: entry:2:1" in second
+    assert "（第 2-3 条记忆，共 3 条）" in legacy
+    assert "（已到末尾）" in legacy
+
+
 @pytest.mark.asyncio
 async def test_read_engram_file_path_traversal_is_blocked() -> None:
     session = await _open_session(FIXTURES)
@@ -248,6 +319,37 @@ async def test_capture_memory_and_load(tmp_path: Path) -> None:
     assert "<memory>" in loaded
 
 
+@pytest.mark.asyncio
+async def test_capture_memories_batch(tmp_path: Path) -> None:
+    _setup_tmp_engram(tmp_path, "test-expert")
+    session = await _open_session(tmp_path)
+    try:
+        result = _result_text(
+            await session.call_tool(
+                "capture_memories",
+                {
+                    "name": "test-expert",
+                    "entries": [
+                        {"content": "偏好晨练", "category": "preferences", "summary": "喜欢早上训练"},
+                        {"content": "膝盖旧伤", "category": "profile", "summary": "膝关节受限",
+                         "memory_type": "fact"},
+                        {"content": "缺少摘要", "category": "profile"},
+                    ],
+                },
+            )
+        )
+        loaded = _result_text(
+            await session.call_tool("load_engram", {"name": "test-expert", "query": "训练"})
+        )
+    finally:
+        await _close_session(session)
+
+    assert "成功 2 条，失败 1 条" in result
+    assert "[fact] [profile] 膝关节受限" in result
+    assert "喜欢早上训练" in loaded
+    assert "膝关节受限" in loaded
+
+
 @pytest.mark.asyncio
 async def test_capture_and_list_tool_traces(tmp_path: Path) -> None:
     _setup_tmp_engram(tmp_path, "test-expert")
@@ -345,6 +447,46 @@ async def test_consolidate_memory(tmp_path: Path) -> None:
     assert "训练偏好摘要" in loaded
 
 
+@pytest.mark.asyncio
+async def test_delete_and_correct_memory_by_entry_id(tmp_path: Path) -> None:
+    _setup_tmp_engram(tmp_path, "test-expert")
+    session = await _open_session(tmp_path)
+    try:
+        await session.call_tool("capture_memory", {
+            "name": "test-expert", "content": "偏好晨练",
+            "category": "preferences", "summary": "喜欢早上训练",
+        })
+        await session.call_tool("capture_memory", {
+            "name": "test-expert", "content": "家有哑铃",
+            "category": "preferences", "summary": "居家训练设备",
+        })
+        index_text = _result_text(await session.call_tool(
+            "read_engram_file", {"name": "test-expert", "path": "memory/_index.md"}
+        ))
+        ids = dict(re.findall(r"\] (\S+) \(id:([0-9a-f]+)\)", index_text))
+        corrected = _result_text(await session.call_tool("correct_memory", {
+            "name": "test-expert", "entry_id": ids["喜欢早上训练"],
+            "new_content": "偏好傍晚训练", "new_summary": "喜欢傍晚训练",
+        }))
+        deleted = _result_text(await session.call_tool("delete_memory", {
+            "name": "test-expert", "entry_id": ids["居家训练设备"],
+        }))
+        missing = _result_text(await session.call_tool("delete_memory", {
+            "name": "test-expert", "entry_id": "000000000000",
+        }))
+    finally:
+        await _close_session(session)
+
+    assert "已修正" in corrected
+    assert "已删除" in deleted
+    assert "未找到匹配的记忆条目" in missing
+    category_text = (tmp_path / "test-expert" / "memory" / "preferences.md").read_text(
+        encoding="utf-8"
+    )
+    assert "偏好傍晚训练" in category_text
+    assert "家有哑铃" not in category_text
+
+
 @pytest.mark.asyncio
 async def test_mcp_stats_tool_supports_json_and_csv(tmp_path: Path) -> None:
     _setup_tmp_engram(tmp_path, "test-expert")
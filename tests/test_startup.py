@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from engram_server.loader import EngramLoader
+from engram_server.server import _build_loader_roots, _ProjectWorkspace, create_mcp_app
+from engram_server.startup import StartupProfile, parse_importtime
+
+
+def test_server_module_import_is_light() -> None:
+    heavy = ["mcp", "asyncio", "urllib.request", "engram_server.creator", "engram_server.lint"]
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, engram_server.server; "
+            f"print([m for m in {heavy!r} if m in sys.modules])",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert completed.stdout.strip() == "[]"
+
+
+def test_parse_importtime_groups_by_package() -> None:
+    output = "\n".join(
+        [
+            "import time: self [us] | cumulative | imported package",
+            "import time:       300 |        300 |     mcp.types",
+            "import time:       200 |        500 |   mcp",
+            "import time:      1000 |       1000 |   engram_server.loader",
+            "noise",
+        ]
+    )
+    assert parse_importtime(output) == [("engram_server.loader", 0.001), ("mcp", 0.0005)]
+
+    profile = StartupProfile()
+    with profile.phase("EngramLoader()"):
+        pass
+    profile.mark_ready()
+    report = profile.render(imports=parse_importtime(output))
+    assert "engram_server.loader" in report
+    assert "EngramLoader()" in report
+
+
+@pytest.mark.asyncio
+async def test_project_workspace_materializes_on_first_tool_call(tmp_path: Path) -> None:
+    global_packs = tmp_path / "global"
+    global_packs.mkdir()
+    workspace = _ProjectWorkspace(cwd=tmp_path)
+    roots = _build_loader_roots(global_packs, cwd=tmp_path, include_project=True)
+    assert roots[0] == workspace.path
+    assert not workspace.path.exists()
+
+    loader = EngramLoader(roots, default_packs_dir=global_packs)
+    app = create_mcp_app(loader, workspace.path, prepare_workspace=workspace.ensure)
+    assert not workspace.path.exists()
+
+    listing = str(await app.call_tool("list_engrams", {}))
+    assert "starter-complete" in listing
+    assert (workspace.path / "starter-template" / "meta.json").is_file()
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from engram_server.loader import EngramLoader
+from engram_server.server import create_mcp_app
+from engram_server.token_meter import TokenMeter
+
+
+def test_token_meter_breaks_down_by_pack_and_tool() -> None:
+    meter = TokenMeter()
+
+    assert meter.record("fitness", "load_engram", "深蹲动作") == 4
+    meter.record("fitness", "read_engram_file", "squat")
+    meter.record("lawyer", "load_engram", "合同")
+    meter.record("", "list_engrams", "a b")
+
+    snapshot = meter.snapshot()
+    assert snapshot["total"] == {"calls": 4, "tokens": 10, "max_tokens": 4}
+    assert snapshot["by_pack"]["fitness"]["tokens"] == 6
+    assert snapshot["by_tool"]["load_engram"] == {"calls": 2, "tokens": 6, "max_tokens": 4}
+    assert list(meter.snapshot("lawyer")["by_tool"]) == ["load_engram"]
+    meter.reset()
+    assert meter.snapshot()["total"]["calls"] == 0
+
+
+@pytest.mark.asyncio
+async def test_context_report_lists_section_costs_and_usage(tmp_path: Path) -> None:
+    engram_dir = tmp_path / "test-expert"
+    (engram_dir / "knowledge").mkdir(parents=True)
+    (engram_dir / "meta.json").write_text(
+        json.dumps({"name": "test-expert", "description": "test"}), encoding="utf-8"
+    )
+    (engram_dir / "role.md").write_text("你是健身教练。", encoding="utf-8")
+    (engram_dir / "rules.md").write_text("只回答健身问题。", encoding="utf-8")
+    (engram_dir / "knowledge" / "_index.md").write_text(
+        "- `knowledge/深蹲.md` - 深蹲要点\n", encoding="utf-8"
+    )
+    meter = TokenMeter()
+    app = create_mcp_app(EngramLoader(tmp_path), tmp_path, token_meter=meter)
+
+    await app.call_tool("load_engram", {"name": "test-expert", "query": "深蹲"})
+    report = str(await app.call_tool("context_report", {"name": "test-expert"}))
+
+    assert "| 角色 |" in report
+    assert "| 规则 |" in report
+    assert "| 知识索引 |" in report
+    assert "load_engram: calls=1" in report
+    assert meter.snapshot("test-expert")["by_tool"]["context_report"]["calls"] == 1
+    assert "未找到 Engram" in str(await app.call_tool("context_report", {"name": "nope"}))
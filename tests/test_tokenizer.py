@@ -0,0 +1,41 @@
+from engram_server import registry
+from engram_server.tokenizer import analyze, estimate_tokens, normalize, tokenize
+
+
+def test_tokenize_mixes_cjk_bigrams_and_words() -> None:
+    assert tokenize("深蹲动作 Squat") == ["深蹲", "蹲动", "动作", "squat"]
+    assert tokenize("练") == ["练"]
+    assert tokenize("ＡＢＣ增肌") == ["abc", "增肌"]
+    assert normalize("Ｆｉｔｎｅｓｓ") == "fitness"
+
+
+def test_analyzed_text_matching_rules() -> None:
+    field = analyze("训练计划与营养建议 fitness")
+
+    assert field.matches("营养")
+    assert field.matches("营")
+    assert field.matches("fit")
+    assert not field.matches("ness")
+    assert analyze("训练计划与营养建议 fitness") is field
+
+
+def test_search_registry_ranks_chinese_phrases() -> None:
+    entries = [
+        {"name": "fitness-coach", "description": "训练计划与营养建议", "tags": ["增肌"]},
+        {"name": "diet-helper", "description": "营养搭配与饮食记录", "tags": ["营养"]},
+        {"name": "contract-lawyer", "description": "合同审查", "tags": ["legal"]},
+    ]
+
+    matched = registry.search_registry("营养", entries)
+    assert [item["name"] for item in matched] == ["diet-helper", "fitness-coach"]
+    matched = registry.search_registry("营养建议", entries)
+    assert [item["name"] for item in matched] == ["fitness-coach"]
+    assert registry.search_registry("增肌训练", entries)[0]["name"] == "fitness-coach"
+    assert registry.search_registry("合同 fitness", entries) == []
+
+
+def test_estimate_tokens_counts_cjk_chars_and_latin_words() -> None:
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("深蹲动作") == 4
+    assert estimate_tokens("squat") == 2
+    assert estimate_tokens("深蹲，squat!") == 2 + 1 + 2 + 1
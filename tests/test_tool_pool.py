@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+from engram_server.loader import EngramLoader
+from engram_server.server import create_mcp_app
+from engram_server.tool_pool import BlockingToolPool
+
+
+def test_wrap_keeps_signature_and_docstring() -> None:
+    pool = BlockingToolPool(max_workers=2)
+
+    def read(name: str, path: str = "role.md") -> str:
+        """Read one file."""
+        return f"{name}/{path}"
+
+    handler = pool.wrap(read)
+
+    assert inspect.iscoroutinefunction(handler)
+    assert handler.__name__ == "read"
+    assert handler.__doc__ == "Read one file."
+    assert list(inspect.signature(handler).parameters) == ["name", "path"]
+    assert asyncio.run(handler("pack", path="a.md")) == "pack/a.md"
+    assert pool.stats()["completed"] == 1
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_pool_runs_blocking_calls_concurrently_within_bound() -> None:
+    pool = BlockingToolPool(max_workers=2)
+    barrier = threading.Barrier(2, timeout=5)
+
+    results = await asyncio.gather(pool.run(barrier.wait), pool.run(barrier.wait))
+
+    assert sorted(results) == [0, 1]
+    assert pool.stats()["peak_in_flight"] == 2
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_read_proceeds_while_stats_is_in_flight(tmp_path: Path, monkeypatch) -> None:
+    engram_dir = tmp_path / "test-expert"
+    engram_dir.mkdir()
+    (engram_dir / "meta.json").write_text(
+        json.dumps({"name": "test-expert", "description": "test"}), encoding="utf-8"
+    )
+    (engram_dir / "role.md").write_text("角色内容", encoding="utf-8")
+    loader = EngramLoader(tmp_path)
+    pool = BlockingToolPool(max_workers=4)
+    app = create_mcp_app(loader, tmp_path, tool_pool=pool)
+
+    import engram_server.stats as stats_module
+
+    release = threading.Event()
+    real_gather = stats_module.gather_stats
+
+    def slow_gather(loader_arg):
+        assert release.wait(5)
+        return real_gather(loader_arg)
+
+    monkeypatch.setattr(stats_module, "gather_stats", slow_gather)
+
+    stats_task = asyncio.create_task(app.call_tool("stats_engrams", {"format": "json"}))
+    await asyncio.sleep(0.05)
+    read_result = await asyncio.wait_for(
+        app.call_tool("read_engram_file", {"name": "test-expert", "path": "role.md"}),
+        timeout=5,
+    )
+
+    assert not stats_task.done()
+    assert "角色内容" in str(read_result)
+    release.set()
+    stats_result = await asyncio.wait_for(stats_task, timeout=5)
+    assert '"tool_pool"' in str(stats_result)
+    pool.shutdown()
@@ -0,0 +1,147 @@
+import gc
+import json
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from engram_server import server
+from engram_server.loader import EngramLoader
+from engram_server.server import create_mcp_app
+from engram_server.trace_writer import TraceWriter
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, list[dict]]] = []
+        self.event = threading.Event()
+
+    def __call__(self, name: str, records: list[dict]) -> list[bool]:
+        self.calls.append((name, list(records)))
+        self.event.set()
+        return [True] * len(records)
+
+
+def test_trace_writer_groups_records_by_count() -> None:
+    recorder = _Recorder()
+    writer = TraceWriter(recorder, max_batch=3, flush_interval=60)
+
+    for i in range(3):
+        assert writer.submit("pack", {"i": i})
+
+    assert recorder.event.wait(5)
+    writer.close()
+    assert recorder.calls == [("pack", [{"i": 0}, {"i": 1}, {"i": 2}])]
+    stats = writer.stats()
+    assert stats["written"] == 3
+    assert stats["queue_depth"] == 0
+    assert stats["flushes"] == 1
+
+
+def test_trace_writer_flushes_on_interval() -> None:
+    recorder = _Recorder()
+    writer = TraceWriter(recorder, max_batch=100, flush_interval=0.05)
+
+    writer.submit("pack", {"i": 0})
+
+    assert recorder.event.wait(5)
+    writer.close()
+    assert recorder.calls == [("pack", [{"i": 0}])]
+
+
+def test_trace_writer_flush_by_pack_and_close() -> None:
+    recorder = _Recorder()
+    writer = TraceWriter(recorder, max_batch=100, flush_interval=60)
+    writer.submit("a", {"i": 0})
+    writer.submit("b", {"i": 1})
+
+    assert writer.flush("a") == 1
+    assert recorder.calls == [("a", [{"i": 0}])]
+    assert writer.stats()["queue_depth"] == 1
+
+    writer.close()
+    assert recorder.calls[-1] == ("b", [{"i": 1}])
+    assert writer.submit("a", {"i": 2}) is False
+
+
+def test_trace_writer_drops_when_queue_is_full() -> None:
+    writer = TraceWriter(lambda name, records: [False] * len(records), max_queue=2,
+                         max_batch=100, flush_interval=60)
+
+    results = [writer.submit("pack", {"i": i}) for i in range(3)]
+    writer.flush()
+
+    assert results == [True, True, False]
+    stats = writer.stats()
+    assert stats["dropped"] == 1
+    assert stats["failed"] == 2
+    assert stats["last_flush_ms"] >= 0
+    writer.close()
+
+
+def test_loader_capture_tool_traces_writes_group(tmp_path: Path) -> None:
+    engram_dir = tmp_path / "test-expert"
+    engram_dir.mkdir()
+    (engram_dir / "meta.json").write_text(
+        json.dumps({"name": "test-expert", "description": "test"}), encoding="utf-8"
+    )
+    loader = EngramLoader(tmp_path)
+    writer = TraceWriter(loader.capture_tool_traces, max_batch=100, flush_interval=60)
+    started = time.perf_counter()
+    writer.submit("test-expert", {"tool_name": "read_engram_file", "intent": "读取 role.md",
+                                  "result_summary": "读取成功"})
+    writer.submit("test-expert", {"tool_name": "load_engram", "intent": "",
+                                  "result_summary": "缺少意图"})
+    assert time.perf_counter() - started < 1
+    assert not (engram_dir / "memory" / "tool-trace.md").exists()
+
+    assert writer.flush("test-expert") == 1
+    trace_text = (engram_dir / "memory" / "tool-trace.md").read_text(encoding="utf-8")
+    assert "tool: read_engram_file" in trace_text
+    assert writer.stats()["failed"] == 1
+    writer.close()
+
+
+def test_app_owned_trace_writer_flushes_at_exit(tmp_path: Path) -> None:
+    shutil.copytree(FIXTURES / "fitness-coach", tmp_path / "fitness-coach")
+    script = (
+        "import asyncio, sys\n"
+        "from pathlib import Path\n"
+        "from engram_server.loader import EngramLoader\n"
+        "from engram_server.server import create_mcp_app\n"
+        "packs = Path(sys.argv[1])\n"
+        "app = create_mcp_app(EngramLoader(packs), packs)\n"
+        "asyncio.run(app.call_tool('read_engram_file', "
+        "{'name': 'fitness-coach', 'path': 'role.md'}))\n"
+    )
+    # 进程直接退出、没有人调用 close()，排队的轨迹仍应落盘
+    subprocess.run([sys.executable, "-c", script, str(tmp_path)], check=True, timeout=60)
+
+    trace_text = (tmp_path / "fitness-coach" / "memory" / "tool-trace.md").read_text(
+        encoding="utf-8"
+    )
+    assert "tool: read_engram_file" in trace_text
+
+
+@pytest.mark.asyncio
+async def test_app_owned_trace_writer_closes_with_lifespan(tmp_path: Path) -> None:
+    shutil.copytree(FIXTURES / "fitness-coach", tmp_path / "fitness-coach")
+    before = set(server._APP_TRACE_WRITERS)
+    app = create_mcp_app(EngramLoader(tmp_path), tmp_path)
+    (writer,) = set(server._APP_TRACE_WRITERS) - before
+
+    async with app.settings.lifespan(app):
+        await app.call_tool("read_engram_file", {"name": "fitness-coach", "path": "role.md"})
+    assert writer.submit("fitness-coach", {"tool_name": "late"}) is False
+    assert (tmp_path / "fitness-coach" / "memory" / "tool-trace.md").is_file()
+
+    # 退出钩子只持有弱引用，app 释放后写入器随之回收
+    del app, writer
+    gc.collect()
+    assert set(server._APP_TRACE_WRITERS) == before
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import json
+import shutil
+import threading
+from pathlib import Path
+
+from engram_server.loader import EngramLoader
+from engram_server.tracing import NULL_TRACER, RecordingTracer
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _copy_fixtures(tmp_path: Path) -> Path:
+    packs = tmp_path / "packs"
+    shutil.copytree(FIXTURES, packs)
+    return packs
+
+
+def test_null_tracer_is_default_and_records_nothing(tmp_path: Path) -> None:
+    loader = EngramLoader(_copy_fixtures(tmp_path))
+    assert loader.tracer is NULL_TRACER
+    assert not loader.tracer.enabled
+
+    with loader.tracer.span("read", tmp_path) as span:
+        span.record("忽略")
+    # 关闭时所有 span 共享同一个对象
+    assert loader.tracer.span("write") is span
+    assert loader.load_engram_base("fitness-coach") is not None
+
+
+def test_load_engram_base_emits_nested_io_spans(tmp_path: Path) -> None:
+    packs = _copy_fixtures(tmp_path)
+    tracer = RecordingTracer()
+    loader = EngramLoader(packs, tracer=tracer)
+    loader.capture_memory(
+        "fitness-coach", "会过期的状态", "status", "临时状态", expires="2000-01-01"
+    )
+    tracer.clear()
+
+    assert loader.load_engram_base("fitness-coach") is not None
+    spans = tracer.spans()
+    by_op: dict[str, list] = {}
+    for span in spans:
+        by_op.setdefault(span.op, []).append(span)
+
+    (root,) = by_op["load_engram_base"]
+    assert root.depth == 0
+    assert {"memory.maintain", "memory.archive_expired", "memory.rebuild_hot_index"} <= set(by_op)
+    assert {"read", "write", "append", "stat", "load_engram_base.assemble"} <= set(by_op)
+    assert all(span.depth > 0 for span in spans if span is not root)
+
+    role = next(span for span in by_op["read"] if span.path.endswith("role.md"))
+    assert role.bytes == len((packs / "fitness-coach" / "role.md").read_bytes())
+    expired = next(span for span in by_op["append"] if span.path.endswith("status-expired.md"))
+    assert expired.bytes and expired.bytes > 0
+    # 子 span 落在父 span 的时间区间内
+    for span in spans:
+        assert root.start_ns <= span.start_ns
+        assert span.start_ns + span.duration_ns <= root.start_ns + root.duration_ns
+
+
+def test_chrome_trace_export(tmp_path: Path) -> None:
+    tracer = RecordingTracer(max_spans=3)
+    with tracer.span("stat", "/packs/coach"):
+        pass
+    with tracer.span("scandir", "/packs/coach/memory"):
+        pass
+    with tracer.span("load_engram_base", "/packs/coach"):
+        with tracer.span("read", "/packs/coach/role.md") as span:
+            span.record("角色")
+
+    output = tmp_path / "trace" / "engram.json"
+    # 缓冲区只保留最近的 3 个 span
+    assert tracer.write_chrome(output) == 3
+    payload = json.loads(output.read_text(encoding="utf-8"))
+    events = [event for event in payload["traceEvents"] if event["ph"] == "X"]
+    assert [event["name"] for event in events] == ["scandir", "load_engram_base", "read"]
+    assert [event["cat"] for event in events] == ["io", "engram", "io"]
+    scandir, parent, read = events
+    assert scandir["args"] == {"path": "/packs/coach/memory"}
+    assert read["args"] == {"path": "/packs/coach/role.md", "bytes": 6}
+    assert parent["ts"] <= read["ts"]
+    assert read["ts"] + read["dur"] <= parent["ts"] + parent["dur"]
+    names = [event for event in payload["traceEvents"] if event["ph"] == "M"]
+    assert names and names[0]["args"]["name"] == threading.current_thread().name
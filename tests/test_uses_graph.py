@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+from engram_server.loader import EngramLoader
+from engram_server.server import create_mcp_app
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _copy_fixture(tmp_path: Path) -> EngramLoader:
+    shutil.copytree(FIXTURES / "fitness-coach", tmp_path / "fitness-coach")
+    return EngramLoader(tmp_path)
+
+
+def test_uses_graph_forward_and_reverse(tmp_path: Path) -> None:
+    loader = _copy_fixture(tmp_path)
+
+    graph = loader.uses_graph("fitness-coach")
+
+    assert graph.forward["examples/膝盖疼的上班族.md"] == [
+        "knowledge/膝关节损伤训练.md",
+        "knowledge/新手训练计划.md",
+    ]
+    assert loader.related_files("fitness-coach", "knowledge/新手训练计划.md") == [
+        "examples/产后恢复训练.md",
+        "examples/想增肌的瘦子.md",
+        "examples/膝盖疼的上班族.md",
+    ]
+    assert loader.uses_graph("missing") is None
+    assert loader.related_files("fitness-coach", "role.md") == []
+
+
+def test_uses_graph_is_cached_until_examples_change(tmp_path: Path) -> None:
+    loader = _copy_fixture(tmp_path)
+    loader.uses_graph("fitness-coach")
+    loader.uses_graph("fitness-coach")
+    assert loader.uses_graph_cache.stats()["hits"] == 1
+
+    (tmp_path / "fitness-coach" / "examples" / "新案例.md").write_text(
+        "---\nuses:\n  - knowledge/减脂饮食原则.md\n  - ../outside.md\n---\n正文",
+        encoding="utf-8",
+    )
+    graph = loader.uses_graph("fitness-coach")
+    assert graph.forward["examples/新案例.md"] == ["knowledge/减脂饮食原则.md"]
+    assert graph.reverse["knowledge/减脂饮食原则.md"] == ["examples/新案例.md"]
+
+
+@pytest.mark.asyncio
+async def test_read_engram_file_include_related(tmp_path: Path) -> None:
+    app = create_mcp_app(_copy_fixture(tmp_path), tmp_path)
+
+    example = str(
+        await app.call_tool(
+            "read_engram_file",
+            {
+                "name": "fitness-coach",
+                "path": "examples/膝盖疼的上班族.md",
+                "include_related": True,
+            },
+        )
+    )
+    knowledge = str(
+        await app.call_tool(
+            "read_engram_file",
+            {
+                "name": "fitness-coach",
+                "path": "knowledge/膝关节损伤训练.md",
+                "include_related": True,
+            },
+        )
+    )
+
+    assert "## 关联知识（uses）" in example
+    assert "### knowledge/膝关节损伤训练.md" in example
+    assert "### knowledge/新手训练计划.md" in example
+    assert "疼痛不超过3/10" in example
+    assert "## 引用此知识的案例" in knowledge
+    assert "`examples/膝盖疼的上班族.md`" in knowledge